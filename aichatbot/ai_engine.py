@@ -1,5 +1,5 @@
 import os
-import openai
+import sys
 import docker 
 from docker_ops import get_container_logs, get_all_containers_info
 from log_analyzer import analyze_logs
@@ -12,9 +12,22 @@ from port_conflict import check_port_usage
 from container_trobleshoot import troubleshoot_container
 from exit_codes import explain_exit_code
 from exit_codes import handle_exit_code_query
+from crash_detector import crash_report
+from log_buffer import get_recent_entries
+from log_templates import summarize as summarize_logs
+from fleet_troubleshoot import extract_fleet_status, fleet_troubleshooting_report
+import fleet_hosts
+import jobs
+import image_pulls
+import compose_projects
+import diagnosis_cache
+import log_index
+from reclaim_planner import reclaim_report
+from metrics import instrument, set_intent, LLM_REQUESTS, LLM_TOKENS, LLM_LATENCY
+from tracing import span, traced
+import time
 
 from docker_ops import (
-    client,
     get_all_containers_info,
     get_container_health_summary,
     create_new_container,
@@ -27,21 +40,124 @@ from docker_ops import (
 )
 # 🧠 Track interactive container actions
 pending_action = {"action": None}
-pending_restart_all = {"awaiting_confirmation": False}
+pending_restart_all = {"awaiting_confirmation": False, "all_hosts": False}
+pending_project_action = {"project": None, "action": None}
+CONFIRM_PROJECT_ACTIONS = ("stop", "remove", "delete")  # asked "are you sure" first
+
+ALL_HOSTS_PHRASES = ("all hosts", "every host", "across hosts", "on each host")
 
 response = None
 
 # Initialize OpenAI safely
 #openai.api_key = os.getenv("OPENAI_API_KEY")
 
-LOG_SNIPPET_LENGTH = 400  # last N chars of logs
+LOG_SUMMARY_LINES = 500  # recent lines mined into a "top templates" log summary
+LOG_CONTEXT_CONTAINERS = 2  # containers whose log summary is added to an LLM prompt
+LLM_MODEL = "gpt-3.5-turbo"
 container_name = None
 
+
+def _load_openai():
+    """
+    Import openai only when it can be used (OPENAI_API_KEY set, or already
+    imported and configured elsewhere) — it is the slowest import on the
+    API worker's startup path.
+    """
+    if "openai" not in sys.modules and not os.getenv("OPENAI_API_KEY"):
+        return None
+    import openai
+    return openai
+
+def container_log_summary(name):
+    """(raw log text, compact "top templates" summary) of a container's recent logs."""
+    entries = get_recent_entries(name, LOG_SUMMARY_LINES)
+    if not entries:
+        entries = get_container_logs(name, tail=LOG_SUMMARY_LINES).splitlines()
+    logs = "\n".join(e[1] if isinstance(e, tuple) else e for e in entries)
+    return logs, summarize_logs(entries)
+
+
+def log_analysis_report(name):
+    """Top templates plus log analysis of a container, cached until its state changes."""
+    try:
+        attrs = docker_ops.client.api.inspect_container(name)
+    except Exception:
+        attrs = None  # unknown container or daemon down: analyze whatever logs there are, uncached
+    cached = diagnosis_cache.lookup("log_analysis", attrs) if attrs else None
+    if cached is not None:
+        return cached
+    logs, summary = container_log_summary(name)
+    report = f"📄 **Logs for '{name}' (top templates):**\n```\n{summary}\n```\n\n{analyze_logs(logs)}"
+    if attrs:
+        diagnosis_cache.store("log_analysis", attrs, report)
+    return report
+
+
+def _log_context(question, containers):
+    """Log summaries of the containers a log/error question names, for the LLM prompt."""
+    q_lower = question.lower()
+    if not any(word in q_lower for word in ("log", "error", "crash", "fail", "why")):
+        return ""
+    named = [c.get("name") for c in containers if c.get("name") and c["name"].lower() in q_lower]
+    return "".join(f"\nLog summary of {name}:\n{container_log_summary(name)[1]}\n"
+                   for name in named[:LOG_CONTEXT_CONTAINERS])
+
+# ================================
+# ⏳ Long actions run as background jobs
+# ================================
+def format_restart_result(restarted, troubleshooting):
+    response = ""
+    if restarted:
+        response += "✅ Restarted the following stopped containers:\n"
+        response += "\n".join([f" - {name}" for name in restarted])
+    if troubleshooting:
+        response += "\n\n⚠️ Some issues were detected:\n"
+        for name, info in troubleshooting.items():
+            response += f"- {name}:\n{info}\n"
+    if not restarted and not troubleshooting:
+        response = "ℹ️ No stopped containers found to restart."
+    return response
+
+
+def _restart_stopped_job(params, report):
+    def on_progress(done, total, name):
+        report(done / total, f"Restarted {done}/{total}: {name}")
+    return format_restart_result(*docker_ops.restart_stopped_containers(on_progress=on_progress))
+
+
+def _troubleshoot_job(params, report):
+    report(0.1, f"Troubleshooting {params['container']}")
+    return troubleshoot_container(params["container"])
+
+
+def _fix_dns_job(params, report):
+    return fix_dns_issue(report)
+
+
+jobs.register_job("restart_stopped", _restart_stopped_job)
+jobs.register_job("fleet_restart_stopped", lambda params, report: fleet_hosts.fleet_restart_report())
+jobs.register_job("troubleshoot", _troubleshoot_job, resumable=True)
+jobs.register_job("fix_dns", _fix_dns_job)
+jobs.register_job("pull_image", image_pulls.pull_job, resumable=True)
+
+
+def start_job(kind, description, params=None):
+    """Enqueue a long action and answer right away with its job id."""
+    job, created = jobs.submit(kind, params)
+    if not created:
+        return f"⏳ {description} is already in progress — job `{job['id']}` (status: {job['status']}). Follow it at `/jobs/{job['id']}`."
+    return f"⏳ {description} started in the background — job `{job['id']}`. Follow it at `/jobs/{job['id']}`."
+
+
+@instrument("ai_engine.interpret_docker_question")
+@traced("intent.route")
 def interpret_docker_question(question, containers):
    
     """
     Process user questions about Docker containers.
     Returns a clean response for chatbot UI.
+    `containers` is the container info list, or a zero-argument callable that
+    returns it; only the LLM/mock fallback reads it.
     """
     global pending_action  # ✅ enables access to global variable
     
@@ -51,53 +167,128 @@ def interpret_docker_question(question, containers):
          # 🧠 Step 1: User said "restart stopped containers"
    
     if re.search(r"\brestart (all )?stopped containers?\b", question, re.IGNORECASE) or pending_restart_all["awaiting_confirmation"]:
+        set_intent("restart_stopped")
         if pending_restart_all["awaiting_confirmation"]:
+            if q_lower in ["yes", "y"] and pending_restart_all["all_hosts"]:
+                pending_restart_all.update(awaiting_confirmation=False, all_hosts=False)
+                return start_job("fleet_restart_stopped", "Restarting stopped containers on all hosts")
             if q_lower in ["yes", "y"]:
-                restarted, troubleshooting = docker_ops.restart_stopped_containers()
                 pending_restart_all["awaiting_confirmation"] = False
-                response = ""
-                if restarted:
-                    response += "✅ Restarted the following stopped containers:\n"
-                    response += "\n".join([f" - {name}" for name in restarted])
-                if troubleshooting:
-                    response += "\n\n⚠️ Some issues were detected:\n"
-                    for name, info in troubleshooting.items():
-                        response += f"- {name}:\n{info}\n"
-                if not restarted and not troubleshooting:
-                    response = "ℹ️ No stopped containers found to restart."
-                return response
+                return start_job("restart_stopped", "Restarting stopped containers")
             elif q_lower in ["no", "n"]:
-                pending_restart_all["awaiting_confirmation"] = False
+                pending_restart_all.update(awaiting_confirmation=False, all_hosts=False)
                 return "❌ Restart operation cancelled."
             else:
                 return "⚠️ Please confirm: yes / no"
         else:
             pending_restart_all["awaiting_confirmation"] = True
+            if fleet_hosts.has_hosts() and any(p in q_lower for p in ALL_HOSTS_PHRASES):
+                pending_restart_all["all_hosts"] = True
+                return f"⚠️ Are you sure you want to restart all stopped containers on all {len(fleet_hosts.list_hosts())} hosts? (yes / no)"
             return "⚠️ Are you sure you want to restart all stopped containers? (yes / no)"
 
+    # 🧩 Compose projects ("restart project shop", "show projects") — dependency order, parallel per level
+    if pending_project_action["action"]:
+        set_intent("project_action")
+        project, action = pending_project_action["project"], pending_project_action["action"]
+        if q_lower in ["yes", "y"]:
+            pending_project_action.update(project=None, action=None)
+            return compose_projects.project_report(project, action)
+        elif q_lower in ["no", "n"]:
+            pending_project_action.update(project=None, action=None)
+            return f"❌ {action.capitalize()} of project `{project}` cancelled."
+        else:
+            return "⚠️ Please confirm: yes / no"
+    project_match = re.search(r"\b(start|stop|restart|pause|unpause|remove|delete)\s+(?:compose\s+)?project\s+([\w.-]+)", q_lower)
+    if project_match:
+        set_intent("project_action")
+        action, project = project_match.group(1), project_match.group(2)
+        if action in CONFIRM_PROJECT_ACTIONS:
+            pending_project_action.update(project=project, action=action)
+            return f"⚠️ Are you sure you want to {action} every container of project `{project}`? (yes / no)"
+        return compose_projects.project_report(project, action)
+    if re.search(r"\b(show|list)\s+(?:compose\s+)?projects\b", q_lower) or "compose projects" in q_lower:
+        set_intent("projects")
+        return compose_projects.projects_overview()
+
+    # 🔎 Cross-container log search ("which containers logged 'connection refused' in the last hour")
+    if re.search(r"\b(which|what) containers? (logged|log|printed|reported)\b", q_lower) or \
+            re.search(r"\b(search|grep) logs\b", q_lower):
+        set_intent("log_search")
+        return log_index.search_report(question)
+
+    # 🚑 Fleet troubleshooting ("troubleshoot all exited") — before "exited containers" below
+    fleet_status = extract_fleet_status(q_lower)
+    if fleet_status:
+        set_intent("fleet_troubleshoot")
+        return fleet_troubleshooting_report(fleet_status)
+
+    # 🌐 Multi-host queries ("... on all hosts") when DOCKER_HOSTS is configured
+    if fleet_hosts.has_hosts() and any(p in q_lower for p in ALL_HOSTS_PHRASES):
+        if "health" in q_lower:
+            set_intent("fleet_health")
+            return fleet_hosts.fleet_health_summary()
+        if "stopped" in q_lower or "exited" in q_lower:
+            set_intent("fleet_stopped")
+            return fleet_hosts.fleet_stopped_containers()
+        set_intent("fleet_overview")
+        return fleet_hosts.fleet_overview()
+
     # 🟢 Step 2: Show stopped containers
     if "show stopped" in q_lower or "list stopped" in q_lower or "exited containers" in q_lower:
+        set_intent("show_stopped")
         return show_stopped_containers()
     
 
+    # 💥 Crash / restart-loop detection (answered from the events detector state)
+    if "crashing" in q_lower or "crash loop" in q_lower or "restart loop" in q_lower:
+        set_intent("crash_report")
+        return crash_report()
+
     # 🩺 Step 3: Health check
     if "health" in q_lower or "healthy" in q_lower:
+        set_intent("health")
         return get_container_health_summary()
     
-    elif "exit code" in q_lower or "exited with code" in q_lower:
+    elif "exit code" in q_lower or "exited with code" in q_lower or re.search(r"exited \(\d+\)", q_lower):
+        set_intent("exit_code")
         return handle_exit_code_query(q_lower)
 
     
     #DNS issue    
     if "dns resolution issues" in q_lower or "temporary failure resolving" in q_lower:
+        set_intent("dns_help")
         return Dnsissue()
     elif q_lower.strip() in ["fix dns issue", "fix dns"]:
-        return fix_dns_issue()
+        set_intent("dns_fix")
+        return start_job("fix_dns", "DNS fix (tests resolvers, updates daemon.json and restarts Docker)")
+
+    # 📥 Image pull ("pull image nginx:latest", "docker pull redis:7") — a background job; duplicates join the running pull
+    pull_match = re.search(r"\b(?:pull\s+image|docker\s+pull)\b(?:\s+([\w./:@-]+))?", question, re.IGNORECASE)
+    if pull_match:
+        set_intent("pull_image")
+        reference = pull_match.group(1)
+        if not reference:
+            return "✅ I can pull/update container images if you specify the image name. Example: 'pull image nginx:latest'."
+        if not image_pulls.plausible_reference(reference):
+            return (f"⚠️ `{reference}` does not look like an image reference. "
+                    "Use a full name such as `pull image nginx:latest` or `pull image ghcr.io/org/app:1.2`.")
+        image = image_pulls.image_reference(reference)
+        return start_job("pull_image", f"Pulling `{image}`", {"image": image})
+
+    # 🧹 Disk reclamation plan ("free up 5GB", "disk cleanup plan") — proposes, never deletes
+    # Only an explicit size or cleanup phrase: "free up port 8080" / "out of disk space" are other questions
+    if re.search(r"\b(?:(?:free up|reclaim)\s+\d+(?:\.\d+)?\s*[kmgt]i?b?\b|disk cleanup|clean ?up (?:the )?disk"
+                 r"|(?:free up|reclaim) (?:some )?disk space)", q_lower):
+        set_intent("reclaim_plan")
+        return reclaim_report(q_lower)
    
     if "port conflict" in q_lower or "port in use" in q_lower:
+     set_intent("port_conflict")
      return PortConflict()
     
     elif "check port" in q_lower:
+     set_intent("check_port")
      words = q_lower.split()
      port = None
      for i, word in enumerate(words):
@@ -115,6 +306,7 @@ def interpret_docker_question(question, containers):
 
              #container trobleshooting
     if "troubleshoot" in q_lower :
+     set_intent("troubleshoot")
     # Try to extract container name from the user query
      words = q_lower.split()
      container_name = None
@@ -125,7 +317,7 @@ def interpret_docker_question(question, containers):
             container_name = words[i + 1]
             break
      if container_name:
-        return troubleshoot_container(container_name)
+        return start_job("troubleshoot", f"Troubleshooting `{container_name}`", {"container": container_name})
      else:
         return "⚠️ Please specify the container name, e.g. `troubleshoot api-container`."
 
@@ -133,6 +325,7 @@ def interpret_docker_question(question, containers):
     lifecycle_actions = ["start", "stop", "restart", "pause", "delete", "remove"]
     for act in lifecycle_actions:
         if act in q_lower:
+            set_intent("lifecycle")
             pending_action["action"] = "delete" if act in ["remove", "delete"] else act
             return (
                 f"⚙️ You want to **{pending_action['action']} containers**.\n\n"
@@ -143,6 +336,7 @@ def interpret_docker_question(question, containers):
 
     # ✅ Step 5: Create new container
     if "create" in q_lower or "run" in q_lower:
+        set_intent("create_container")
         words = question.split()
         image = None
         name = None
@@ -155,28 +349,49 @@ def interpret_docker_question(question, containers):
             elif word == "on" and "port" in words[i + 1:]:
                 port_index = words.index("port")
                 port = words[port_index + 1] if port_index + 1 < len(words) else None
-        return create_new_container(image, name, port)
+        replicas_match = re.search(r"\b(\d+)\s+(?:replicas|copies|instances)\b", q_lower)
+        return create_new_container(image, name, port, int(replicas_match.group(1)) if replicas_match else 1)
 
     # ✅ Step 6: Show popular images
     if "show images" in q_lower or "public images" in q_lower:
+        set_intent("show_images")
         return show_popular_images()
 
     # 🧠 Step 7: Fallback AI explanation
-    if not openai.api_key:
+    set_intent("llm")
+    if callable(containers):
+        containers = containers()
+    openai = _load_openai()
+    if openai is None or not openai.api_key:
+        set_intent("mock_ai")
+        LLM_REQUESTS.inc(model=LLM_MODEL, outcome="fallback")
         return mock_ai_response(question, containers)
 
+    start = time.perf_counter()
     try:
-        resp = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a DevOps AI that manages Docker containers interactively."},
-                {"role": "user", "content": f"User question: {question}\nContainers: {containers}"}
-            ]
-        )
+        with span("llm.chat_completion", model=LLM_MODEL) as llm_span:
+            resp = openai.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a DevOps AI that manages Docker containers interactively."},
+                    {"role": "user", "content": f"User question: {question}\nContainers: {containers}{_log_context(question, containers)}"}
+                ]
+            )
+        LLM_REQUESTS.inc(model=LLM_MODEL, outcome="ok")
+        usage = getattr(resp, "usage", None)
+        if usage:
+            LLM_TOKENS.inc(usage.prompt_tokens, model=LLM_MODEL, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens, model=LLM_MODEL, kind="completion")
+            if llm_span:
+                llm_span.set_attribute("llm.usage.total_tokens", usage.total_tokens)
         return resp.choices[0].message["content"]
     except Exception as e:
+        LLM_REQUESTS.inc(model=LLM_MODEL, outcome="error")
         return f"⚠️ AI error: {e}"
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - start, model=LLM_MODEL)
 
+@instrument("ai_engine.mock_ai_response")
 def mock_ai_response(question, containers):
     """
     Simulate AI answers without OpenAI API.
@@ -218,19 +433,12 @@ def mock_ai_response(question, containers):
         for c in containers:
             name = c.get("name", "").lower()
             if name and name in question_lower:
-                logs = get_container_logs(name)
-                troubleshooting = analyze_logs(logs)
-                return (
-                    f"📄 **Logs for '{name}':**\n```\n{logs[-LOG_SNIPPET_LENGTH:]}\n```\n\n{troubleshooting}"
-                )
+                return log_analysis_report(name)
         return "Please specify which container logs you want to see."
 
     elif "start container" in question_lower or "stop container" in question_lower or "remove container" in question_lower:
         return "✅ I can start, stop, or remove containers if you specify the container name. Example: 'start container webapp'."
 
-    elif "pull image" in question_lower:
-        return "✅ I can pull/update container images if you specify the image name. Example: 'pull image nginx:latest'."
-
     elif "network issue" in question_lower:
         return "⚠️ I can check container logs for network errors, unreachable hosts, or misconfigured ports. if you can just specify container name"
 
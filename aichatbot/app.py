@@ -1,16 +1,75 @@
-from fastapi import FastAPI, Request
+import time
+from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from docker_ops import get_all_containers_info, restart_stopped_containers
 from ai_engine import interpret_docker_question
+from crash_detector import start_crash_detector
+from log_buffer import start_log_capture
+from log_index import start_log_index
+from resource_diagnostics import start_resource_sampler
+from health_index import start_health_index
+from image_index import start_image_index
+import knowledge_base
+import fleet_hosts
+import metrics
+import tracing
+import profiler
+import jobs
+import container_specs
+import compose_projects
+import log_index
+import diagnosis_cache
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def start_background_watchers():
+    knowledge_base.load()
+    fleet_hosts.load_hosts_from_env()
+    start_crash_detector()
+    start_log_index()
+    start_log_capture()
+    start_resource_sampler()
+    start_health_index()
+    start_image_index()
+    jobs.start_job_workers()
+    if profiler.PROFILER_ENABLED:
+        profiler.start_profiler()
+
 @app.post("/ask")
 async def ask_docker_assistant(request: Request):
     data = await request.json()
     question = data.get("question", "")
+    trace_requested = request.query_params.get("trace") == "1"
+    # Docker and LLM calls block: answer on the threadpool so concurrent
+    # questions overlap (and identical ones are coalesced, see coalesce.py)
+    return await run_in_threadpool(answer_question, question, trace_requested)
+
 
-    containers = get_all_containers_info()
-    ai_response = interpret_docker_question(question, containers)
+def answer_question(question, trace_requested=False):
+    start = time.perf_counter()
+    metrics.set_intent("unknown")
+    jobs.clear_submitted()
+    with profiler.profile_request(), \
+            tracing.start_trace("POST /ask", enabled=trace_requested, question=question) as root_span:
+        # Per-container info (one stats call each) is only fetched when the
+        # question falls through to the LLM/mock answer
+        fetched = []
+
+        def containers():
+            if not fetched:
+                fetched.append(get_all_containers_info())
+            return fetched[0]
+
+        try:
+            ai_response = interpret_docker_question(question, containers)
+        finally:
+            intent = metrics.get_intent()
+            metrics.ASK_LATENCY.observe(time.perf_counter() - start, intent=intent)
+            metrics.ASK_REQUESTS.inc(intent=intent)
+            if root_span:
+                root_span.set_attribute("intent", intent)
 
     action_taken = None
     troubleshooting_info = None
@@ -21,10 +80,159 @@ async def ask_docker_assistant(request: Request):
        # if restarted:
         #    action_taken = f"Restarted containers: {', '.join(restarted)}"
 
-    return {
+    result = {
         "answer": ai_response,
-        "containers": containers,
+        "containers": fetched[0] if fetched else None,
         "action": action_taken,
         "troubleshooting": troubleshooting_info,
-        "troubleshooting_info":troubleshooting
+        "troubleshooting_info":troubleshooting,
+        "job": jobs.submitted_job(),
     }
+    if trace_requested and root_span:
+        result["trace"] = root_span.to_tree()
+    return result
+
+
+@app.get("/kb")
+def list_knowledge_documents():
+    return {"documents": knowledge_base.list_documents()}
+
+
+@app.get("/kb/{doc_id:path}")
+def get_knowledge_document(doc_id: str, request: Request, format: str = "md"):
+    """Serve a pre-rendered knowledge document; honours If-None-Match."""
+    document = knowledge_base.get_document(doc_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Unknown document '{doc_id}'")
+
+    if format == "html":
+        body, etag, media_type = document.html, document.html_etag, "text/html; charset=utf-8"
+    else:
+        body, etag, media_type = document.markdown, document.etag, "text/markdown; charset=utf-8"
+
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ================================
+# 🔥 Profiler admin (PROFILER_ENABLED=1)
+# ================================
+def _require_profiler():
+    if not profiler.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled (set PROFILER_ENABLED=1)")
+
+
+@app.get("/admin/profile")
+def profiler_dump():
+    """Collapsed stacks of /ask requests, for flamegraph.pl or speedscope."""
+    _require_profiler()
+    return Response(content=profiler.collapsed_stacks(), media_type="text/plain; charset=utf-8")
+
+
+@app.get("/admin/profile/status")
+def profiler_status():
+    _require_profiler()
+    return profiler.profile_status()
+
+
+@app.post("/admin/profile/start")
+def profiler_start():
+    _require_profiler()
+    profiler.start_profiler()
+    return profiler.profile_status()
+
+
+@app.post("/admin/profile/stop")
+def profiler_stop():
+    _require_profiler()
+    profiler.stop_profiler()
+    return profiler.profile_status()
+
+
+@app.post("/admin/profile/reset")
+def profiler_reset():
+    _require_profiler()
+    profiler.reset_profile()
+    return profiler.profile_status()
+
+
+# ================================
+# ⏳ Background jobs
+# ================================
+@app.get("/jobs")
+def list_background_jobs(status: str = None, limit: int = 50):
+    return {"jobs": jobs.list_jobs(status=status, limit=limit)}
+
+
+@app.get("/jobs/{job_id}")
+def get_background_job(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+
+# ================================
+# 📐 Declarative container creation
+# ================================
+@app.post("/containers/batch")
+def create_container_batch(spec: dict):
+    """Create spec["replicas"] containers from one spec (see container_specs.py)."""
+    try:
+        return container_specs.create_batch(spec)
+    except (ValueError, LookupError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ================================
+# 🧩 Compose projects
+# ================================
+@app.post("/projects/{project}/{action}")
+def run_project_action(project: str, action: str):
+    """Start/stop/restart/pause/unpause/remove a compose project in dependency order."""
+    try:
+        return compose_projects.project_action(project, action)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+# ================================
+# 🔎 Log search
+# ================================
+@app.get("/logs/search")
+def search_logs(q: str = "", last_seconds: int = None, since: float = None, until: float = None,
+                container: str = None, limit: int = 100):
+    """Full-text search over captured container logs ("quoted phrases", time range, containers=a,b)."""
+    if last_seconds:
+        since = time.time() - last_seconds
+    containers = [c.strip() for c in container.split(",") if c.strip()] if container else None
+    return log_index.search(q, since=since, until=until, containers=containers, limit=min(limit, 1000))
+
+
+@app.get("/logs/index")
+def log_index_status():
+    return log_index.index_stats()
+
+
+# ================================
+# 🗃 Diagnosis cache
+# ================================
+@app.get("/diagnosis-cache")
+def diagnosis_cache_status():
+    return diagnosis_cache.cache_stats()
+
+
+@app.delete("/diagnosis-cache")
+def clear_diagnosis_cache(container: str = None):
+    """Forget cached diagnoses of one container, or all of them."""
+    diagnosis_cache.invalidate(container)
+    return diagnosis_cache.cache_stats()
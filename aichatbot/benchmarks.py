@@ -0,0 +1,785 @@
+"""
+Benchmarks against the fake Docker daemon (no real dockerd needed).
+
+Run from the aichatbot/ directory:
+    python benchmarks.py                # all benchmarks
+    python benchmarks.py fleet pages    # only the named ones
+    python benchmarks.py --no-record    # don't append to the history file
+
+Every run is appended to BENCHMARK_HISTORY (one JSON line per benchmark,
+with timestamp and git commit) so results can be compared over time.
+"""
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import docker
+
+import coalesce
+from fake_docker_daemon import FakeDockerDaemon, make_compose_project, make_containers, make_images, make_volumes
+
+BENCHMARK_HISTORY = os.getenv(
+    "BENCHMARK_HISTORY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_history.jsonl"),
+)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _median_ms(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        coalesce.invalidate()  # measure the work, not the coalescing cache
+        _, elapsed = _timed(fn)
+        timings.append(elapsed)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+@contextlib.contextmanager
+def fake_fleet(containers, latencies=None, images=None, volumes=None):
+    """Start a fake daemon and point the shared Docker client (and DOCKER_HOST) at it."""
+    import docker_client
+
+    with FakeDockerDaemon(containers, latencies=latencies, images=images, volumes=volumes) as daemon:
+        client = docker.DockerClient(base_url=daemon.base_url, max_pool_size=16)
+        previous_client, previous_host = docker_client.set_client(client), os.environ.get("DOCKER_HOST")
+        os.environ["DOCKER_HOST"] = daemon.base_url
+        coalesce.invalidate()
+        try:
+            yield daemon, client
+        finally:
+            coalesce.invalidate()
+            docker_client.set_client(previous_client)
+            if previous_host is None:
+                os.environ.pop("DOCKER_HOST", None)
+            else:
+                os.environ["DOCKER_HOST"] = previous_host
+            client.close()
+
+
+def _api_calls(daemon, fn):
+    """Run fn and return (seconds, Docker API requests it made)."""
+    coalesce.invalidate()
+    before = sum(daemon.request_counts.values())
+    _, elapsed = _timed(fn)
+    return round(elapsed, 3), sum(daemon.request_counts.values()) - before
+
+
+def _fleet(count):
+    half = count // 2
+    volumes = make_volumes(max(1, count // 4))
+    names = [v["Name"] for v in volumes]
+    images = ["nginx:latest", "redis:7", "python:3.12-alpine", "postgres:15"]
+    containers = (make_containers(half, status="running", image=images, volumes=names)
+                  + make_containers(count - half, status="exited", image=images, volumes=names, start=half))
+    return containers, make_images(images + ["busybox:latest"]), volumes
+
+
+# ================================
+# 🔍 Container info
+# ================================
+def bench_containers_info(sizes=(10, 50), latency=0.002):
+    """get_all_containers_info (list + inspect + image + stats per container)."""
+    from docker_ops import get_all_containers_info
+
+    latencies = {"inspect": latency, "stats": latency, "images": latency}
+    results = {}
+    for count in sizes:
+        containers, images, volumes = _fleet(count)
+        with fake_fleet(containers, latencies, images, volumes) as (daemon, _):
+            seconds, calls = _api_calls(daemon, get_all_containers_info)
+            results[f"containers={count}"] = {"seconds": seconds, "api_calls": calls}
+    return results
+
+
+# ================================
+# 🧠 Intent routing
+# ================================
+QUESTIONS = {
+    "health": "is my container healthy?",
+    "show_stopped": "show exited containers",
+    "exit_code": "what does exit code 137 mean",
+    "dns_help": "dns resolution issues",
+    "show_images": "show images",
+    "mock_ai": "how many containers are there",
+    "fleet_troubleshoot": "troubleshoot all exited",
+}
+
+
+def bench_interpret_question(count=20, latency=0.002):
+    """interpret_docker_question end to end, per intent (median ms and API calls)."""
+    from ai_engine import interpret_docker_question
+    from docker_ops import get_all_containers_info
+
+    latencies = {"inspect": latency, "stats": latency, "logs": latency, "images": latency}
+    containers, images, volumes = _fleet(count)
+    results = {}
+    with fake_fleet(containers, latencies, images, volumes) as (daemon, _):
+        snapshot = get_all_containers_info()
+        for intent, question in QUESTIONS.items():
+            _, calls = _api_calls(daemon, lambda: interpret_docker_question(question, snapshot))
+            results[intent] = {"median_ms": _median_ms(lambda: interpret_docker_question(question, snapshot), 3),
+                               "api_calls": calls}
+    return results
+
+
+# ================================
+# 📄 Log analyzer
+# ================================
+def bench_log_analyzer(sizes_kb=(1, 100, 1000)):
+    """analyze_logs on logs of growing size, for each branch (median ms)."""
+    from log_analyzer import analyze_logs
+
+    filler = "2025-11-11T12:00:00Z INFO request handled in 12ms path=/api/v1/items status=200\n"
+    tails = {
+        "lambda_handler": "ERROR entrypoint requires the handler name to be the first argument\n",
+        "port_conflict": "Error: listen EADDRINUSE: address already in use 0.0.0.0:8080\n",
+        "no_match": "WARN slow query detected\n",
+    }
+    results = {}
+    for size in sizes_kb:
+        body = filler * max(1, (size * 1024) // len(filler))
+        results[f"{size}KB"] = {branch: _median_ms(lambda: analyze_logs(body + tail), 5) for branch, tail in tails.items()}
+    return results
+
+
+# ================================
+# ⚙️ Bulk lifecycle
+# ================================
+def bench_bulk_lifecycle(count=40, latency=0.005):
+    """manage_container bulk actions (all stopped / all running / all)."""
+    from docker_ops import manage_container
+
+    latencies = {"inspect": latency, "action": latency, "images": latency}
+    results = {}
+    with fake_fleet(make_containers(count, status="exited"), latencies) as (daemon, _):
+        for action, target in (("start", "all stopped"), ("stop", "all running"), ("restart", "all"), ("remove", "all")):
+            seconds, calls = _api_calls(daemon, lambda: manage_container(action, target))
+            results[f"{action} {target}"] = {"seconds": seconds, "api_calls": calls}
+    return results
+
+
+# ================================
+# 🗂 Streamlit page loaders
+# ================================
+def bench_page_loaders(count=30, latency=0.002):
+    """Data loaders behind the Dashboard, Containers, Images and Volumes pages."""
+    import ui_data
+
+    latencies = {"list": latency, "inspect": latency, "logs": latency, "stats": latency,
+                 "images": latency, "volumes": latency}
+    containers, images, volumes = _fleet(count)
+    results = {}
+    with fake_fleet(containers, latencies, images, volumes) as (daemon, client):
+        loaders = {
+            "dashboard": ui_data.load_dashboard,
+            "containers": ui_data.load_containers_page,
+            "images": lambda: ui_data.load_images_page(client),
+            "volumes": lambda: ui_data.load_volumes_page(client),
+        }
+        for page, loader in loaders.items():
+            seconds, calls = _api_calls(daemon, loader)
+            results[page] = {"seconds": seconds, "api_calls": calls}
+    return results
+
+
+# ================================
+# 🚑 Fleet troubleshooting
+# ================================
+def bench_fleet_troubleshoot(count=60, latency=0.02):
+    """Serial vs. concurrent diagnosis of `count` exited containers."""
+    from fleet_troubleshoot import troubleshoot_fleet
+
+    latencies = {"inspect": latency, "logs": latency}
+    with FakeDockerDaemon(make_containers(count, status="exited"), latencies=latencies) as daemon:
+        client = docker.DockerClient(base_url=daemon.base_url, max_pool_size=16)
+        results = {}
+        for workers in (1, 8, 16):
+            groups, elapsed = _timed(troubleshoot_fleet, "exited", client=client, max_workers=workers)
+            diagnosed = sum(len(items) for items in groups.values())
+            results[f"workers={workers}"] = {
+                "seconds": round(elapsed, 3),
+                "containers_per_sec": round(diagnosed / elapsed, 1),
+                "causes": {cause: len(items) for cause, items in groups.items()},
+            }
+        client.close()
+    return results
+
+
+# ================================
+# 🌐 Multi-host fan-out
+# ================================
+def bench_multi_host(hosts=8, count=10, latency=0.005, slow_latency=1.5, timeout=1.0):
+    """Several fake daemons (one slow): serial vs. parallel fan-out with per-host timeout."""
+    import fleet_hosts
+
+    daemons = []
+    try:
+        for i in range(hosts):
+            slow = i == hosts - 1
+            latencies = {"inspect": slow_latency if slow else latency, "stats": latency, "images": latency}
+            daemons.append(FakeDockerDaemon(make_containers(count, status="exited"), latencies=latencies).start())
+            fleet_hosts.register_host(f"host-{i}" + ("-slow" if slow else ""), daemons[-1].base_url, timeout=timeout * 5)
+
+        fast = [label for label in fleet_hosts.list_hosts() if not label.endswith("-slow")]
+        start = time.perf_counter()
+        for label in fast:
+            fleet_hosts.docker_ops.get_all_containers_info(fleet_hosts.host_client(label))
+        serial = time.perf_counter() - start
+
+        info = lambda label, client: fleet_hosts.docker_ops.get_all_containers_info(client)
+        coalesce.invalidate()
+        fast_outcome = fleet_hosts.fan_out(info, hosts=fast, timeout=timeout)
+        coalesce.invalidate()
+        outcome = fleet_hosts.fan_out(info, timeout=timeout)
+        coalesce.invalidate()
+        _, first = _timed(fleet_hosts.fleet_containers_info, timeout=timeout)
+        _, again = _timed(fleet_hosts.fleet_containers_info, timeout=timeout)
+        return {
+            "serial_fast_hosts": {"hosts": len(fast), "seconds": round(serial, 3)},
+            "fan_out_fast_hosts": {"hosts": len(fast), "seconds": fast_outcome["seconds"]},
+            "fan_out_all_hosts": {"hosts": hosts, "seconds": outcome["seconds"], "answered": len(outcome["results"]),
+                                  "errors": outcome["errors"]},
+            "fleet_containers_info": {"first_seconds": round(first, 3), "repeat_seconds": round(again, 3)},
+        }
+    finally:
+        for label in fleet_hosts.list_hosts():
+            fleet_hosts.unregister_host(label)
+        for daemon in daemons:
+            daemon.stop()
+
+
+# ================================
+# 🔌 Client pooling
+# ================================
+def bench_client_pool(threads=8, calls=20, count=10, latency=0.002):
+    """Sockets opened by concurrent callers: client per call vs. stock shared client vs. docker_client."""
+    import threading
+    import docker_client
+
+    latencies = {"list": latency, "inspect": latency}
+    results = {}
+    with FakeDockerDaemon(make_containers(count), latencies=latencies) as daemon:
+        stock = docker.DockerClient(base_url=daemon.base_url, max_pool_size=16)
+        managed = docker.DockerClient(base_url=daemon.base_url, max_pool_size=16)
+        previous = docker_client.set_client(managed)
+        strategies = {
+            "client_per_call": lambda: docker.DockerClient(base_url=daemon.base_url),
+            "stock_shared": lambda: stock,
+            "docker_client": docker_client.require_client,
+        }
+        try:
+            for label, get in strategies.items():
+                def worker():
+                    for _ in range(calls):
+                        get().containers.list(all=True)
+
+                daemon.connections = 0
+                workers = [threading.Thread(target=worker) for _ in range(threads)]
+                start = time.perf_counter()
+                for t in workers:
+                    t.start()
+                for t in workers:
+                    t.join()
+                results[label] = {"seconds": round(time.perf_counter() - start, 3), "sockets_opened": daemon.connections}
+        finally:
+            docker_client.set_client(previous)
+            stock.close()
+    return results
+
+
+# ================================
+# 🤝 Request coalescing
+# ================================
+def bench_coalesce(concurrency=10, count=20, latency=0.05):
+    """`concurrency` identical read-only questions at once: Docker list calls with and without coalescing."""
+    import threading
+    from ai_engine import interpret_docker_question
+
+    latencies = {"list": latency, "inspect": 0.002, "stats": 0.002, "images": 0.002}
+    containers, images, volumes = _fleet(count)
+    results = {}
+    with fake_fleet(containers, latencies, images, volumes) as (daemon, _):
+        for intent in ("show_stopped", "health"):
+            for enabled in (False, True):
+                coalesce.COALESCE_ENABLED = enabled
+                coalesce.invalidate()
+                barrier = threading.Barrier(concurrency)
+
+                def worker():
+                    barrier.wait()
+                    interpret_docker_question(QUESTIONS[intent], [])
+
+                before = daemon.request_counts.get("list", 0)
+                workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+                start = time.perf_counter()
+                for t in workers:
+                    t.start()
+                for t in workers:
+                    t.join()
+                results[f"{intent} coalescing={'on' if enabled else 'off'}"] = {
+                    "seconds": round(time.perf_counter() - start, 3),
+                    "docker_list_calls": daemon.request_counts.get("list", 0) - before,
+                }
+    coalesce.COALESCE_ENABLED = True
+    return results
+
+
+# ================================
+# 🩺 Health index
+# ================================
+def bench_health_index(count=500, latency=0.002):
+    """Health summary on `count` containers: bulk-list fallback vs. the in-memory index."""
+    import docker_ops
+    import health_index
+
+    latencies = {"list": latency, "inspect": latency, "stats": latency}
+    containers = make_containers(count, status="running", health=["healthy", "healthy", "unhealthy", None])
+    results = {}
+    with fake_fleet(containers, latencies) as (daemon, _):
+        health_index._ready["at"] = None
+        results["bulk_list"] = dict(zip(("seconds", "api_calls"), _api_calls(daemon, docker_ops.get_container_health_summary)))
+        results["index_build"] = dict(zip(("seconds", "api_calls"),
+                                          _api_calls(daemon, lambda: health_index.rebuild(backfill=False))))
+        results["index_query"] = {"median_ms": _median_ms(docker_ops.get_container_health_summary),
+                                  "api_calls": _api_calls(daemon, docker_ops.get_container_health_summary)[1]}
+        event = {"Type": "container", "Action": "health_status: unhealthy",
+                 "Actor": {"ID": containers[0]["Id"], "Attributes": {"name": containers[0]["Name"]}}}
+        results["health_event"] = dict(zip(("seconds", "api_calls"),
+                                           _api_calls(daemon, lambda: health_index.handle_container_event(event))))
+        results["index"] = health_index.index_stats()
+        health_index._ready["at"] = None
+    return results
+
+
+# ================================
+# 📥 Image pulls
+# ================================
+def bench_image_pulls(tags=6, latency=0.02):
+    """Concurrent pull jobs, each image requested twice under different spellings."""
+    import tempfile
+    import ai_engine  # registers the pull_image job kind
+    import docker_client
+    import image_pulls
+    import jobs
+    from fake_docker_daemon import make_registry
+
+    refs = [f"team/app-{i}:1.{i}" for i in range(tags)]
+    registry = make_registry(refs)
+    requests = [spelling for ref in refs for spelling in (ref, "docker.io/" + ref)]
+    jobs.JOBS_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench-jobs-"), "jobs.sqlite3")
+    jobs.start_job_workers(workers=len(requests))
+    with FakeDockerDaemon(latencies={"pull": latency}, registry=registry) as daemon:
+        client = docker.DockerClient(base_url=daemon.base_url, max_pool_size=16)
+        previous = docker_client.set_client(client)
+        try:
+            start = time.perf_counter()
+            submitted = [jobs.submit("pull_image", {"image": image_pulls.image_reference(r)}) for r in requests]
+            finished = [jobs.wait_for_job(job["id"]) for job, _ in submitted]
+            elapsed = time.perf_counter() - start
+        finally:
+            docker_client.set_client(previous)
+            client.close()
+        layers_needed = sum(len(entry["layers"]) for entry in registry.values())
+        return {
+            "requests": {"pull_requests": len(requests), "jobs_created": sum(1 for _, created in submitted if created),
+                         "daemon_pulls": daemon.request_counts.get("pull", 0)},
+            "concurrency": {"limit": image_pulls.IMAGE_PULL_CONCURRENCY, "max_active_pulls": daemon.max_active_pulls},
+            "layers": {"in_images": layers_needed, "downloaded": daemon.layer_downloads},
+            "seconds": round(elapsed, 3),
+            "succeeded": sum(1 for job in finished if job["status"] == jobs.SUCCEEDED),
+        }
+
+
+# ================================
+# 🖼 Image index
+# ================================
+def bench_image_index(count=3000, latency=0.002):
+    """Image search for the Create Container tab: list-and-filter per keystroke vs. the image index."""
+    import image_index
+    from docker_ops import create_new_container
+
+    tags = [f"team/service-{i}:{i % 7}.{i % 3}" for i in range(count)] + ["nginx:latest", "postgres:15"]
+    queries = {"prefix": "team/service-12", "substring": "service-29", "fuzzy": "postgress"}
+    results = {}
+    with fake_fleet([], {"images": latency}, images=make_images(tags)) as (daemon, client):
+        def list_and_filter(query):
+            # What `docker images | grep` costs: one list call per keystroke
+            return [t for img in client.api.images() for t in (img["RepoTags"] or []) if query in t]
+
+        results["list_and_filter"] = {name: {"median_ms": _median_ms(lambda: list_and_filter(q), 3),
+                                             "matches": len(list_and_filter(q))} for name, q in queries.items()}
+        seconds, calls = _api_calls(daemon, image_index.rebuild)
+        results["index_build"] = {"seconds": seconds, "api_calls": calls}
+        results["index_search"] = {name: {"median_ms": _median_ms(lambda: image_index.search(q, limit=50)),
+                                          "matches": len(image_index.search(q, limit=50)),
+                                          "best": (image_index.search(q, limit=1) or [{"tags": [None]}])[0]["tags"][0]}
+                                   for name, q in queries.items()}
+        _, calls = _api_calls(daemon, lambda: create_new_container("ngnix:latest", "web", None))
+        results["create_with_typo"] = {"api_calls": calls, "answer": create_new_container("ngnix:latest", "web", None).splitlines()[0]}
+        image_index._state["built_at"] = None
+    return results
+
+
+# ================================
+# 🧹 Reclamation planner
+# ================================
+def bench_reclaim_planner(sizes=(500, 5000), target=2 * 1024 ** 3):
+    """Plan a 2 GB reclaim on hosts with many layered images, build cache and volumes."""
+    from fake_docker_daemon import make_build_cache, make_layered_images
+    from reclaim_planner import plan_reclaim
+
+    results = {}
+    for count in sizes:
+        images = make_layered_images(count, bases=max(2, count // 50))
+        containers = make_containers(count // 10, status="running", image=[t for i in images[:count // 5]
+                                                                              for t in i["RepoTags"]])
+        with fake_fleet(containers, images=images, volumes=make_volumes(count // 20, size=1024 ** 3)) as (daemon, client):
+            daemon.build_cache = make_build_cache(count // 5)
+            seconds, calls = _api_calls(daemon, lambda: plan_reclaim(target, client=client))
+            plan = plan_reclaim(target, client=client)
+            results[f"images={count}"] = {
+                "seconds": seconds, "api_calls": calls, "deletions": plan["deletions"],
+                "guaranteed_gb": round(plan["guaranteed"] / 1024 ** 3, 2),
+                "reclaimable_gb": round(plan["reclaimable"] / 1024 ** 3, 2),
+            }
+    return results
+
+
+# ================================
+# 📐 Batch container creation
+# ================================
+def bench_batch_create(replicas=50, latency=0.02):
+    """`replicas` containers from one spec: one-by-one containers.run vs. container_specs.create_batch."""
+    import container_specs
+
+    latencies = {"create": latency, "action": latency, "inspect": latency / 4, "list": latency / 4,
+                 "images": latency / 4, "networks": latency / 4}
+    results = {}
+    with fake_fleet([], latencies, images=make_images(["nginx:latest"])) as (daemon, client):
+        def one_by_one():
+            for i in range(replicas):
+                # What create_new_container did per container: name check, then run with a fixed port
+                client.containers.list(all=True, filters={"name": f"serial-{i}"})
+                client.containers.run("nginx:latest", name=f"serial-{i}", detach=True, ports={"80/tcp": 21000 + i})
+
+        seconds, calls = _api_calls(daemon, one_by_one)
+        results["one_by_one"] = {"seconds": seconds, "api_calls": calls}
+        spec = {"image": "nginx:latest", "name": "batch", "replicas": replicas, "ports": ["auto:80"],
+                "env": {"MODE": "test"}, "limits": {"memory": "128m", "cpus": 0.25}, "network": "testenv"}
+        seconds, calls = _api_calls(daemon, lambda: container_specs.create_batch(spec, client=client))
+        ports = [p["PublicPort"] for c in client.api.containers(all=True, filters={"name": "batch-"}) for p in c["Ports"]]
+        results["create_batch"] = {"seconds": seconds, "api_calls": calls,
+                                   "distinct_host_ports": len(set(ports)), "replicas": len(ports)}
+    return results
+
+
+# ================================
+# 🧩 Compose projects
+# ================================
+COMPOSE_SERVICES = {"db": [], "cache": [], "api": ["db", "cache"], "worker": ["db"], "web": ["api"], "proxy": ["web"]}
+
+
+def bench_compose_restart(replicas=8, latency=0.02):
+    """Restart a stopped compose project: serial loop in list order vs. compose_projects level by level."""
+    import compose_projects
+
+    latencies = {"action": latency, "list": latency / 4, "inspect": latency / 4}
+    serial = make_compose_project("serial", COMPOSE_SERVICES, replicas=replicas)
+    shop = make_compose_project("shop", COMPOSE_SERVICES, replicas=replicas, start=len(serial))
+    results = {}
+    with fake_fleet(serial + shop, latencies) as (daemon, client):
+        def crashed(project):
+            return sum(1 for c in client.api.containers(all=True)
+                       if c["Labels"].get("com.docker.compose.project") == project and c["State"] != "running")
+
+        def serial_loop():
+            # What manage_container("restart", "all") did: one container at a time, newest first as dockerd lists them
+            for c in reversed(client.containers.list(all=True)):
+                if c.labels.get("com.docker.compose.project") == "serial":
+                    c.restart()
+
+        seconds, calls = _api_calls(daemon, serial_loop)
+        results["serial_loop"] = {"seconds": seconds, "api_calls": calls, "not_running_after": crashed("serial")}
+        seconds, calls = _api_calls(daemon, lambda: compose_projects.project_action("shop", "restart", client=client))
+        results["project_action"] = {"seconds": seconds, "api_calls": calls, "not_running_after": crashed("shop")}
+    return results
+
+
+# ================================
+# 🔎 Log search index
+# ================================
+LOG_LINE_SAMPLES = [
+    "GET /api/orders 200 12ms",
+    "worker heartbeat ok",
+    "cache miss for key session:{n}",
+    "request timeout after 30s upstream=payments",
+    "INFO flushed {n} metrics",
+]
+
+
+def bench_log_search(containers=100, lines_per_container=2000, latency=0.005):
+    """"Which containers logged X in the last hour": fetch + grep every container's logs vs. log_index."""
+    import tempfile
+    import log_index
+
+    now = time.time()
+    fleet = make_containers(containers, status="running")
+    records = []
+    for i, c in enumerate(fleet):
+        c["Logs"] = []
+        for n in range(lines_per_container):
+            line = LOG_LINE_SAMPLES[n % len(LOG_LINE_SAMPLES)].format(n=n)
+            if i % 7 == 0 and n % 250 == 0:
+                line = "connect to db:5432 failed: connection refused"
+            c["Logs"].append(line)
+            records.append((c["Name"], line, now - 7200 + n * 7200 / lines_per_container))
+    records.sort(key=lambda r: r[2])
+
+    results = {}
+    with fake_fleet(fleet, {"logs": latency}) as (daemon, client):
+        def fetch_and_grep():
+            return {c["Name"] for c in fleet
+                    if "connection refused" in client.api.logs(c["Name"]).decode("utf-8", errors="ignore")}
+
+        seconds, calls = _api_calls(daemon, fetch_and_grep)
+        results["fetch_and_grep"] = {"seconds": seconds, "api_calls": calls, "containers": len(fetch_and_grep())}
+
+    saved = (log_index.LOG_INDEX_DIR, log_index.LOG_INDEX_SEGMENT_LINES)
+    with tempfile.TemporaryDirectory() as tmp:
+        log_index.LOG_INDEX_DIR, log_index.LOG_INDEX_SEGMENT_LINES = tmp, 20000
+        log_index.load_segments()
+        try:
+            _, elapsed = _timed(lambda: [log_index.add_line(name, line, ts) for name, line, ts in records])
+            log_index.seal()
+            results["ingest"] = {"lines": len(records), "lines_per_second": int(len(records) / elapsed),
+                                 "segments": log_index.index_stats()["segments"]}
+            phrase = lambda: log_index.search('"connection refused"', since=now - 3600)
+            results["phrase_last_hour"] = {"median_ms": _median_ms(phrase), "containers": len(phrase()["by_container"]),
+                                           "matches": phrase()["total"]}
+            results["token_all_time"] = {"median_ms": _median_ms(lambda: log_index.search("timeout", limit=100)),
+                                         "matches": log_index.search("timeout")["total"]}
+            log_index.compact(now + 3 * 3600)
+            results["phrase_after_compaction"] = {"median_ms": _median_ms(phrase),
+                                                  "segments": log_index.index_stats()["segments"]}
+        finally:
+            log_index.LOG_INDEX_DIR, log_index.LOG_INDEX_SEGMENT_LINES = saved
+            log_index.load_segments()
+            log_index._latest.clear()
+    return results
+
+
+# ================================
+# 🧬 Log templates
+# ================================
+def bench_log_templates(lines=20000):
+    """Noisy container logs: raw payload vs. the Drain "top templates" summary."""
+    import log_templates
+
+    entries = []
+    for n in range(lines):
+        stamp = f"2025-11-11T12:{n // 60 % 60:02d}:{n % 60:02d}.{n:06d}Z"
+        if n % 10 < 6:
+            line = f"ERROR connect to db 10.0.{n % 3}.{n % 250}:5432 failed: connection refused (attempt {n})"
+        else:
+            line = LOG_LINE_SAMPLES[n % len(LOG_LINE_SAMPLES)].format(n=n)
+            line += f" request_id={n * 7919:x}-{n:08x}" if n % 3 == 0 else ""
+        entries.append(f"{stamp} {line}")
+    entries.append("2025-11-11T13:00:00.000001Z FATAL: out of memory, exiting")
+    raw = "\n".join(entries)
+
+    miner, elapsed = _timed(lambda: log_templates.mine(entries))
+    summary = log_templates.summarize(entries, miner=miner)
+    return {
+        "mine": {"lines": miner.lines, "templates": len(miner.clusters), "lines_per_second": int(miner.lines / elapsed)},
+        "payload": {"raw_bytes": len(raw), "summary_bytes": len(summary),
+                    "reduction": round(len(raw) / len(summary))},
+    }
+
+
+# ================================
+# 🗃 Diagnosis cache
+# ================================
+def bench_diagnosis_cache(count=20, latency=0.02):
+    """Troubleshoot / fleet diagnosis of unchanged containers: first run vs. answered from the cache."""
+    import tempfile
+    import diagnosis_cache
+    from container_trobleshoot import troubleshoot_container
+    from fleet_troubleshoot import troubleshoot_fleet
+
+    previous_path = diagnosis_cache.DIAGNOSIS_CACHE_PATH
+    latencies = {"list": latency, "inspect": latency, "logs": latency}
+    containers = make_containers(count, status="running") + make_containers(count, status="exited", start=count)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, fake_fleet(containers, latencies) as (daemon, client):
+        diagnosis_cache.DIAGNOSIS_CACHE_PATH = os.path.join(tmp, "diagnoses.sqlite3")
+        try:
+            names = [f"app-{i}" for i in range(count)]
+            for label in ("first", "cached"):
+                seconds, calls = _api_calls(daemon, lambda: [troubleshoot_container(name) for name in names])
+                results.setdefault("troubleshoot_running", {})[label] = {"seconds": seconds, "api_calls": calls}
+            for label in ("first", "cached"):
+                seconds, calls = _api_calls(daemon, lambda: troubleshoot_fleet("exited", client=client))
+                results.setdefault("fleet_exited", {})[label] = {"seconds": seconds, "api_calls": calls}
+            results["cache"] = diagnosis_cache.cache_stats()
+            del results["cache"]["path"]
+        finally:
+            diagnosis_cache.DIAGNOSIS_CACHE_PATH = previous_path
+    return results
+
+
+# ================================
+# 🌐 DNS fix workflow
+# ================================
+def bench_dns_fix(latencies=(0.2, 0.01, None, 0.05), probe_timeout=1.0, downtime=4.0):
+    """Serial vs. parallel resolver probes, and how soon a restarted daemon is used again."""
+    import tempfile
+    import threading
+    import docker_client
+    import dns_resolution_error as dns
+    from fake_docker_daemon import FakeDnsResolver
+
+    resolvers = [FakeDnsResolver("127.0.0.2", latency=latencies[0]).start()]
+    resolvers += [FakeDnsResolver(f"127.0.0.{i + 3}", resolvers[0].port, latency).start()
+                  for i, latency in enumerate(latencies[1:])]
+    servers, port = [r.host for r in resolvers], resolvers[0].port
+    saved = {name: getattr(dns, name) for name in
+             ("DNS_CANDIDATES", "DNS_PROBE_PORT", "DNS_PROBE_TIMEOUT", "DOCKER_DAEMON_JSON", "restart_daemon")}
+    results = {}
+    try:
+        _, serial = _timed(lambda: [dns.probe_resolver(s, timeout=probe_timeout, port=port) for s in servers])
+        ranked, parallel = _timed(dns.rank_resolvers, servers, timeout=probe_timeout, port=port)
+        results["probe"] = {"resolvers": len(servers), "serial_seconds": round(serial, 3),
+                            "parallel_seconds": round(parallel, 3), "fastest": ranked[0]["server"]}
+
+        with tempfile.TemporaryDirectory() as tmp, fake_fleet(make_containers(10, status="running"), {}) as (daemon, _):
+            def restart():
+                daemon.stop()
+                threading.Timer(downtime, daemon.start).start()
+
+            def wait_reconnect_backoff():
+                docker_client.reset_client()
+                return docker_client.wait_for_daemon(timeout=60)
+
+            # How long after the daemon is back each wait strategy notices
+            for label, wait in (("reconnect_backoff", wait_reconnect_backoff),
+                                ("ping_backoff", lambda: docker_client.wait_until_ready(60))):
+                restart()
+                _, elapsed = _timed(wait)
+                results.setdefault("ready_lag_seconds", {})[label] = round(elapsed - downtime, 2)
+
+            path = os.path.join(tmp, "daemon.json")
+            with open(path, "w") as f:
+                json.dump({"log-driver": "json-file", "dns": ["8.8.8.8"]}, f)
+            dns.DNS_CANDIDATES, dns.DNS_PROBE_PORT, dns.DNS_PROBE_TIMEOUT = servers, port, probe_timeout
+            dns.DOCKER_DAEMON_JSON, dns.restart_daemon = path, restart
+            message, elapsed = _timed(dns.fix_dns_issue)
+            with open(path) as f:
+                written = json.load(f)
+            results["workflow"] = {"seconds": round(elapsed, 2), "daemon_down_seconds": downtime,
+                                   "ok": message.startswith("✅"), "daemon_json": written,
+                                   "containers_after": len(docker_client.require_client().api.containers(all=True))}
+    finally:
+        for name, value in saved.items():
+            setattr(dns, name, value)
+        for r in resolvers:
+            r.stop()
+    return results
+
+
+# ================================
+# 🧊 Cold start
+# ================================
+COLD_START_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def bench_cold_start(modules=("app", "ai_engine", "docker_ops"), runs=5):
+    """Import time of the API worker modules in a fresh interpreter, daemon unreachable."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, DOCKER_HOST="unix:///nonexistent/docker.sock")
+    results = {}
+    for module in modules:
+        timings = []
+        for _ in range(runs):
+            proc = subprocess.run([sys.executable, "-c", COLD_START_SNIPPET.format(module=module)],
+                                  capture_output=True, text=True, cwd=here, env=env)
+            if proc.returncode != 0:
+                results[module] = {"error": proc.stderr.strip().splitlines()[-1]}
+                break
+            timings.append(float(proc.stdout.strip().splitlines()[-1]))
+        else:
+            results[module] = {"median_ms": round(statistics.median(timings) * 1000, 1),
+                               "heavy_modules_loaded": _heavy_modules_loaded(module, here, env)}
+    return results
+
+
+def _heavy_modules_loaded(module, cwd, env):
+    code = f"import sys, {module}; print(','.join(m for m in ('openai', 'streamlit', 'tabulate') if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=cwd, env=env)
+    return proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ""
+
+
+BENCHMARKS = {
+    "cold_start": bench_cold_start,
+    "containers_info": bench_containers_info,
+    "interpret": bench_interpret_question,
+    "log_analyzer": bench_log_analyzer,
+    "lifecycle": bench_bulk_lifecycle,
+    "pages": bench_page_loaders,
+    "fleet": bench_fleet_troubleshoot,
+    "client_pool": bench_client_pool,
+    "multi_host": bench_multi_host,
+    "coalesce": bench_coalesce,
+    "health_index": bench_health_index,
+    "image_pulls": bench_image_pulls,
+    "image_index": bench_image_index,
+    "reclaim_planner": bench_reclaim_planner,
+    "batch_create": bench_batch_create,
+    "compose": bench_compose_restart,
+    "log_search": bench_log_search,
+    "log_templates": bench_log_templates,
+    "diagnosis_cache": bench_diagnosis_cache,
+    "dns_fix": bench_dns_fix,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def record_result(name, result, path=None):
+    """Append one benchmark result to the history file."""
+    entry = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(), "benchmark": name, "results": result}
+    with open(path or BENCHMARK_HISTORY, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def main(argv):
+    record = "--no-record" not in argv
+    selected = [a for a in argv if not a.startswith("--")] or list(BENCHMARKS)
+    for name in selected:
+        result = BENCHMARKS[name]()
+        print(f"=== {name} ===")
+        for label, values in result.items():
+            print(f"  {label}: {values}")
+        if record:
+            record_result(name, result)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -3,6 +3,7 @@ import requests
 import pandas as pd
 import subprocess
 import shlex
+import time
 import re
 from tabulate import tabulate
 from docker_ops import list_all_containers
@@ -10,6 +11,8 @@ from docker_ops import analyze_port_conflict
 from troubleshooting import get_troubleshooting_guide
 import urllib.parse
 from docker_environment_check import docker_environment_tab
+import ui_data
+from docker_client import require_client
 from create_container_tab import docker_create_container_tab
 
 # ===============================
@@ -106,6 +109,9 @@ st.markdown("""
 
 
 LOG_SNIPPET_LENGTH = 5
+JOB_POLL_LIMIT = 300  # seconds to follow a background job
+LOG_SEARCH_WINDOWS = {"Last 15 minutes": 900, "Last hour": 3600, "Last 6 hours": 6 * 3600,
+                      "Last 24 hours": 24 * 3600, "Everything indexed": None}
 
 # ===============================
 # Sidebar Navigation
@@ -114,7 +120,7 @@ st.sidebar.title("🐳 Docker Support Panel")
 st.sidebar.markdown("---")
 page = st.sidebar.radio(
     "Navigate to:",
-    ["🤖 AI Chatbot", "📊 Dashboard", "📋 Containers", "🖼 Images", "💾 Volumes", "🛠 Troubleshooting", "Command Refrence","🐳 Docker Environment Check", "📦 Create Container"]
+    ["🤖 AI Chatbot", "📊 Dashboard", "📋 Containers", "🖼 Images", "💾 Volumes", "🔎 Log Search", "🛠 Troubleshooting", "Command Refrence","🐳 Docker Environment Check", "📦 Create Container"]
 )
 st.sidebar.markdown("---")
 
@@ -181,6 +187,22 @@ if page == "🤖 AI Chatbot":
             st.write(data["answer"])
             if data.get("action"):
                 st.success(data["action"])
+            if data.get("job"):
+                # Long actions run as background jobs: follow progress until done
+                progress = st.progress(0.0, text="Queued…")
+                job = {"status": "queued"}
+                for _ in range(JOB_POLL_LIMIT):
+                    job = requests.get(f"http://127.0.0.1:8000/jobs/{data['job']}").json()
+                    progress.progress(job.get("progress") or 0.0, text=job.get("message") or job["status"])
+                    if job["status"] in ("succeeded", "failed"):
+                        break
+                    time.sleep(1)
+                if job["status"] == "succeeded":
+                    st.write(job["result"])
+                elif job["status"] == "failed":
+                    st.error(f"❌ Job failed: {job.get('error')}")
+                else:
+                    st.info(f"⏳ Still running — check `/jobs/{data['job']}` later.")
         except requests.exceptions.RequestException as e:
             st.error(f"❌ Backend request failed: {e}")
             st.info("Ensure FastAPI backend is running on port 8000.")
@@ -193,74 +215,50 @@ if page == "🤖 AI Chatbot":
 # ===============================
 elif page == "📊 Dashboard":
     st.title("🐳 Docker Container Dashboard")
-    containers, _ = list_all_containers()
-    RESTART_THRESHOLD = 2
-
-    def check_frequent_restarts(container):
-        try:
-            return container.attrs.get("RestartCount", 0) > RESTART_THRESHOLD
-        except Exception:
-            return False
-
-    total = len(containers)
-    running = sum(1 for c in containers if c.status == "running")
-    exited = sum(1 for c in containers if c.status == "exited")
-    frequent_restart_containers = [c.name for c in containers if check_frequent_restarts(c)]
+    dashboard = ui_data.load_dashboard()
 
-    st.metric("Total Containers", total)
-    st.metric("Running Containers", running)
-    st.metric("Exited Containers", exited)
+    st.metric("Total Containers", dashboard["total"])
+    st.metric("Running Containers", dashboard["running"])
+    st.metric("Exited Containers", dashboard["exited"])
 
-    if frequent_restart_containers:
-        st.warning(f"⚠️ Frequent restarts (>2): {', '.join(frequent_restart_containers)}")
+    if dashboard["frequent_restarts"]:
+        st.warning(f"⚠️ Frequent restarts (>2): {', '.join(dashboard['frequent_restarts'])}")
 
 # ===============================
 # 📋 Containers Page
 # ===============================
 elif page == "📋 Containers":
     st.title("📋 All Docker Containers")
-    containers, _ = list_all_containers()
-
-    def get_container_logs(container, lines=5):
-        try:
-            return container.logs(tail=lines).decode("utf-8")
-        except Exception:
-            return "Unable to fetch logs."
+    rows = ui_data.load_containers_page(log_lines=LOG_SNIPPET_LENGTH)
 
     def health_emoji(status):
         return {"healthy": "🟢", "unhealthy": "🔴", "starting": "🟠"}.get(status, "⚪")
 
-    if not containers:
+    if not rows:
         st.info("No containers found.")
     else:
-        for c in containers:
-            try:
-                health_status = c.attrs.get('State', {}).get('Health', {}).get('Status', 'unknown')
-            except Exception:
-                health_status = "unknown"
+        for row in rows:
+            c = row["container"]
+            health_status = row["health"]
 
             title = f"{c.name} | Status: {c.status} | Health: {health_emoji(health_status)}"
-            if c.attrs.get("RestartCount", 0) > 2:
+            if row["frequent_restarts"]:
                 title += " ⚠️ Frequent Restarts!"
 
             with st.expander(title):
-                st.write(f"**Container ID:** {c.short_id}")
-                st.write(f"**Image:** {(c.image.tags[0] if c.image.tags else '<none>')}")
-                st.write(f"**Status:** {c.status}")
+                st.write(f"**Container ID:** {row['short_id']}")
+                st.write(f"**Image:** {row['image']}")
+                st.write(f"**Status:** {row['status']}")
                 st.write(f"**Health:** {health_status}")
 
-                try:
-                    stats = c.stats(stream=False)
-                    cpu = stats.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage", "N/A")
-                    mem = stats.get("memory_stats", {}).get("usage", "N/A")
-                    st.write(f"**CPU Usage:** {cpu}")
-                    st.write(f"**Memory Usage:** {mem} bytes")
-                except Exception:
+                if row["cpu"] is not None:
+                    st.write(f"**CPU Usage:** {row['cpu']}")
+                    st.write(f"**Memory Usage:** {row['mem']} bytes")
+                else:
                     st.write("**CPU / Memory Usage:** N/A")
 
-                if c.status.lower() == "exited":
-                    logs = get_container_logs(c, lines=LOG_SNIPPET_LENGTH)
-                    st.code(logs)
+                if row["logs"] is not None:
+                    st.code(row["logs"])
 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -297,24 +295,19 @@ elif page == "📋 Containers":
 # 🖼 Images Page
 # ===============================
 elif page == "🖼 Images":
-    import docker
     st.title("🖼 Docker Images")
-    client = docker.from_env()
     try:
-        images = client.images.list()
+        client = require_client()
+        rows = ui_data.load_images_page(client)
     except Exception as e:
         st.error(f"⚠️ Failed to fetch images: {e}")
-        images = []
+        rows = []
 
-    if not images:
+    if not rows:
         st.info("No Docker images found.")
     else:
-        for img in images:
-            tags = img.tags if img.tags else ["<none>"]
-            used_by = [
-                c.name for c in client.containers.list(all=True)
-                if img.short_id in c.image.id
-            ]
+        for row in rows:
+            img, tags, used_by = row["image"], row["tags"], row["used_by"]
             st.write(f"**ID:** {img.short_id} | **Tags:** {', '.join(tags)}")
             if used_by:
                 st.info(f"📦 Used by: {', '.join(used_by)}")
@@ -332,25 +325,21 @@ elif page == "🖼 Images":
 # 💾 Volumes Page
 # ===============================
 elif page == "💾 Volumes":
-    import docker
     st.title("💾 Docker Volumes")
-    client = docker.from_env()
     try:
-        volumes = client.volumes.list()
+        client = require_client()
+        rows = ui_data.load_volumes_page(client)
     except Exception as e:
         st.error(f"⚠️ Failed to fetch volumes: {e}")
-        volumes = []
+        rows = []
 
-    if not volumes:
+    if not rows:
         st.info("No Docker volumes found.")
     else:
-        for vol in volumes:
+        for row in rows:
+            vol, containers_using = row["volume"], row["used_by"]
             st.write(f"**Name:** {vol.name}")
-            st.write(f"**Mountpoint:** {vol.attrs.get('Mountpoint', 'N/A')}")
-            containers_using = [
-                c.name for c in client.containers.list(all=True)
-                if any(m.get("Name") == vol.name for m in c.attrs.get("Mounts", []))
-            ]
+            st.write(f"**Mountpoint:** {row['mountpoint']}")
             if containers_using:
                 st.info(f"📦 Used by: {', '.join(containers_using)}")
             if st.button(f"🗑️ Delete Volume {vol.name}"):
@@ -363,6 +352,49 @@ elif page == "💾 Volumes":
                     except Exception as e:
                         st.error(f"⚠️ {e}")
 
+# ===============================
+# 🔎 Log Search Page
+# ===============================
+elif page == "🔎 Log Search":
+    st.title("🔎 Search Container Logs")
+    st.caption('Searches every captured log line across containers. Quote phrases: "connection refused" db')
+    query = st.text_input("Search for:", placeholder='e.g. "connection refused"')
+    col1, col2 = st.columns(2)
+    with col1:
+        window = st.selectbox("Time range:", list(LOG_SEARCH_WINDOWS), index=1)
+    with col2:
+        container_filter = st.text_input("Containers (comma-separated, optional):")
+    if st.button("🔎 Search"):
+        params = {"q": query, "limit": 200}
+        if LOG_SEARCH_WINDOWS[window]:
+            params["last_seconds"] = LOG_SEARCH_WINDOWS[window]
+        if container_filter.strip():
+            params["container"] = container_filter
+        try:
+            res = requests.get("http://127.0.0.1:8000/logs/search", params=params)
+            res.raise_for_status()
+            result = res.json()
+        except requests.exceptions.RequestException as e:
+            st.error(f"❌ Backend request failed: {e}")
+            result = None
+        if result is not None:
+            st.caption(f"{result['total']} match(es) in {result['segments_scanned']} segment(s), "
+                       f"{result['seconds'] * 1000:.1f} ms")
+            if result["truncated"]:
+                st.warning("⚠️ Too many candidate lines — narrow the time range or add words.")
+            if result["by_container"]:
+                st.dataframe(pd.DataFrame([
+                    {"Container": name, "Matches": stats["count"],
+                     "First": pd.to_datetime(stats["first"], unit="s"), "Last": pd.to_datetime(stats["last"], unit="s")}
+                    for name, stats in sorted(result["by_container"].items(), key=lambda item: -item[1]["count"])
+                ]), use_container_width=True)
+                st.dataframe(pd.DataFrame([
+                    {"Time": pd.to_datetime(h["timestamp"], unit="s"), "Container": h["container"], "Line": h["line"]}
+                    for h in result["hits"]
+                ]), use_container_width=True)
+            else:
+                st.info("No matching log lines.")
+
 if page == "🐳 Docker Environment Check":
         docker_environment_tab()
 
@@ -0,0 +1,113 @@
+import functools
+import os
+import threading
+import time
+
+from metrics import Counter
+
+# ================================
+# 🤝 Request Coalescing
+# ================================
+# Single-flight for read-only Docker queries: when ten engineers ask "health"
+# at the same moment, the first call scans the daemon and the other nine wait
+# for its result instead of starting their own scan. The result is then
+# served for COALESCE_TTL_SECONDS more. Mutating actions call invalidate()
+# so nobody reads a pre-restart answer. Results are shared, so callers must
+# treat them as read-only.
+
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+COALESCE_TTL_SECONDS = float(os.getenv("COALESCE_TTL_SECONDS", "2"))
+
+COALESCED_CALLS = Counter("chatbot_coalesced_calls_total", "Coalesced calls by function and role (leader/follower/cached).", ["function", "role"])
+
+_inflight = {}  # key -> _Flight
+_results = {}   # key -> (expires_at, value)
+_lock = threading.Lock()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def single_flight(key, fn, ttl=COALESCE_TTL_SECONDS, label="call"):
+    """Run fn() once for all concurrent callers with the same key; cache the result for `ttl` seconds."""
+    if not COALESCE_ENABLED:
+        return fn()
+    with _lock:
+        cached = _results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            COALESCED_CALLS.inc(function=label, role="cached")
+            return cached[1]
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        COALESCED_CALLS.inc(function=label, role="follower")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    COALESCED_CALLS.inc(function=label, role="leader")
+    try:
+        flight.result = fn()
+        if ttl:
+            with _lock:
+                _results[key] = (time.monotonic() + ttl, flight.result)
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def _normalize(value):
+    # Clients and other objects are keyed by identity; plain values by value
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return (type(value).__name__, id(value))
+
+
+def coalesced(ttl=COALESCE_TTL_SECONDS, name=None):
+    """Decorator: coalesce concurrent identical calls of a read-only function."""
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (label, _normalize(args), _normalize(kwargs))
+            return single_flight(key, lambda: fn(*args, **kwargs), ttl=wrapper.ttl, label=label)
+
+        wrapper.ttl = ttl
+        return wrapper
+    return decorator
+
+
+def invalidate(label=None):
+    """Drop cached results (all, or those of one function) after a mutating action."""
+    with _lock:
+        for key in [k for k in _results if label is None or k[0] == label]:
+            del _results[key]
+
+
+def invalidates(fn):
+    """Decorator for mutating actions: drop all cached read results once fn has run."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            invalidate()
+    return wrapper
@@ -0,0 +1,323 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import coalesce
+from docker_client import require_client
+from metrics import instrument
+
+# ================================
+# 🧩 Compose Project Awareness
+# ================================
+# Containers created by `docker compose` carry labels naming their project
+# and service, and (compose v2) the service's `depends_on`:
+#
+#   com.docker.compose.project    = shop
+#   com.docker.compose.service    = api
+#   com.docker.compose.depends_on = db:service_healthy:false,cache:service_started:false
+#
+# From ONE container list call we build a dependency graph: a container
+# depends on every container of the services in its depends_on label, and on
+# the container whose network namespace it joins (network_mode
+# "container:<id>" — what compose makes of "service:<name>"). Lifecycle actions
+# then run level by level (Kahn's topological sort), in parallel within a
+# level: start/unpause go dependencies first, stop/pause/remove go dependents
+# first, restart is a stop pass followed by a start pass, and remove is a stop
+# pass followed by a plain (never forced) remove. A container whose
+# dependency failed is skipped instead of being started into a crash loop.
+
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+DEPENDS_LABEL = "com.docker.compose.depends_on"
+
+COMPOSE_MAX_WORKERS = int(os.getenv("COMPOSE_MAX_WORKERS", "16"))
+COMPOSE_HEALTH_TIMEOUT_SECONDS = float(os.getenv("COMPOSE_HEALTH_TIMEOUT_SECONDS", "60"))
+HEALTH_POLL_SECONDS = 0.5
+
+FORWARD_ACTIONS = ("start", "unpause")         # dependencies first
+REVERSE_ACTIONS = ("stop", "pause", "remove")  # dependents first
+ACTIONS = FORWARD_ACTIONS + REVERSE_ACTIONS + ("restart",)
+
+# Which containers an action applies to (by state)
+_TARGET_STATES = {
+    "start": ("exited", "created", "dead"),
+    "stop": ("running", "paused", "restarting"),
+    "pause": ("running",),
+    "unpause": ("paused",),
+    "remove": None,  # every state
+}
+
+
+# ================================
+# 🕸 Dependency Graph
+# ================================
+def parse_depends_on(value):
+    """'db:service_healthy:false,cache' -> {"db": "service_healthy", "cache": "service_started"}."""
+    deps = {}
+    for entry in (value or "").split(","):
+        service, _, rest = entry.strip().partition(":")
+        if service:
+            deps[service] = rest.split(":")[0] or "service_started"
+    return deps
+
+
+def build_graph(listed):
+    """
+    Graph of a low-level `containers(all=True)` result:
+    {id: {"id", "name", "project", "service", "state", "deps": {dependency id: condition}}}.
+    """
+    graph, by_ref, by_service = {}, {}, {}
+    for c in listed:
+        labels = c.get("Labels") or {}
+        node = {
+            "id": c["Id"],
+            "name": c["Names"][0].lstrip("/"),
+            "project": labels.get(PROJECT_LABEL),
+            "service": labels.get(SERVICE_LABEL),
+            "state": c.get("State", ""),
+            "deps": {},
+            "_depends_on": parse_depends_on(labels.get(DEPENDS_LABEL)),
+            "_network_mode": (c.get("HostConfig") or {}).get("NetworkMode") or "",
+        }
+        graph[node["id"]] = node
+        by_ref[node["id"]] = by_ref[node["id"][:12]] = by_ref[node["name"]] = node["id"]
+        if node["project"] and node["service"]:
+            by_service.setdefault((node["project"], node["service"]), []).append(node["id"])
+
+    for node in graph.values():
+        for service, condition in node.pop("_depends_on").items():
+            for dep in by_service.get((node["project"], service), []):
+                node["deps"][dep] = condition
+        mode = node.pop("_network_mode")
+        if mode.startswith(("container:", "service:")):
+            ref = mode.split(":", 1)[1]
+            dep = by_ref.get(ref) or next(iter(by_service.get((node["project"], ref), [])), None)
+            if dep and dep != node["id"]:
+                node["deps"].setdefault(dep, "service_started")
+    return graph
+
+
+def topological_levels(graph, ids=None):
+    """
+    Kahn's algorithm over the subgraph of `ids` (default: all); dependencies
+    outside it count as satisfied. Returns (levels, cyclic ids) — each level
+    only depends on earlier ones, so it can run in parallel.
+    """
+    ids = set(graph) if ids is None else set(ids)
+    indegree = {i: 0 for i in ids}
+    dependents = {i: [] for i in ids}
+    for i in ids:
+        for dep in graph[i]["deps"]:
+            if dep in ids:
+                indegree[i] += 1
+                dependents[dep].append(i)
+
+    levels = []
+    ready = sorted((i for i, n in indegree.items() if n == 0), key=lambda i: graph[i]["name"])
+    while ready:
+        levels.append(ready)
+        following = []
+        for i in ready:
+            for dependent in dependents[i]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    following.append(dependent)
+        ready = sorted(following, key=lambda i: graph[i]["name"])
+    placed = {i for level in levels for i in level}
+    return levels, sorted((i for i in ids if i not in placed), key=lambda i: graph[i]["name"])
+
+
+def projects(graph):
+    """{project: [ids]} for compose-managed containers."""
+    grouped = {}
+    for node in graph.values():
+        if node["project"]:
+            grouped.setdefault(node["project"], []).append(node["id"])
+    return grouped
+
+
+# ================================
+# ⚙️ Ordered Execution
+# ================================
+def _act(client, container_id, action):
+    if action == "remove":
+        client.api.remove_container(container_id)  # not forced: a container that is still running is kept
+    else:
+        getattr(client.api, action)(container_id)
+
+
+def _wait_healthy(client, ids, deadline):
+    """Ids (among those with a health check) still not healthy at `deadline`."""
+    waiting = set(ids)
+    while waiting:
+        for container_id in list(waiting):
+            try:
+                health = client.api.inspect_container(container_id).get("State", {}).get("Health")
+            except Exception:
+                continue
+            if not health or health.get("Status") == "healthy":
+                waiting.discard(container_id)
+        if not waiting or time.monotonic() >= deadline:
+            break
+        time.sleep(HEALTH_POLL_SECONDS)
+    return waiting
+
+
+def run_levels(client, graph, ids, action, on_progress=None):
+    """
+    Apply a single (non-restart) action to `ids` in dependency order, in
+    parallel within each level. Returns
+    {"done": [names], "errors": {name: message}, "skipped": {name: reason}, "levels": [[names]], "cycle": [names]}.
+    """
+    result = {"done": [], "errors": {}, "skipped": {}, "levels": [], "cycle": []}
+    levels, cyclic = topological_levels(graph, ids)
+    if cyclic:
+        # No valid order exists between these; run them last, together
+        result["cycle"] = [graph[i]["name"] for i in cyclic]
+        levels.append(cyclic)
+    forward = action in FORWARD_ACTIONS
+    if not forward:
+        levels.reverse()
+    result["levels"] = [[graph[i]["name"] for i in level] for level in levels]
+
+    ids = set(ids)
+    dependents = {}
+    for i in ids:
+        for dep in graph[i]["deps"]:
+            dependents.setdefault(dep, []).append(i)
+    failed = set()
+    total, finished = len(ids), 0
+
+    with ThreadPoolExecutor(max_workers=COMPOSE_MAX_WORKERS) as pool:
+        for level in levels:
+            runnable = []
+            for i in level:
+                # Start after a failed dependency would crash-loop; stop before a failed dependent would break it
+                related = graph[i]["deps"] if forward else dependents.get(i, [])
+                blocker = next((r for r in related if r in failed), None)
+                if blocker is not None:
+                    failed.add(i)
+                    verb = "dependency" if forward else "dependent"
+                    result["skipped"][graph[i]["name"]] = f"skipped: {verb} `{graph[blocker]['name']}` did not {action}"
+                else:
+                    runnable.append(i)
+
+            if forward:
+                needs_health = {dep for i in runnable for dep, condition in graph[i]["deps"].items()
+                                if condition == "service_healthy" and dep not in failed}
+                unhealthy = _wait_healthy(client, needs_health, time.monotonic() + COMPOSE_HEALTH_TIMEOUT_SECONDS) if needs_health else set()
+                for i in list(runnable):
+                    blocker = next((d for d in graph[i]["deps"] if d in unhealthy and graph[i]["deps"][d] == "service_healthy"), None)
+                    if blocker is not None:
+                        runnable.remove(i)
+                        failed.add(i)
+                        result["skipped"][graph[i]["name"]] = f"skipped: dependency `{graph[blocker]['name']}` is not healthy"
+
+            futures = {pool.submit(_act, client, i, action): i for i in runnable}
+            for future in as_completed(futures):
+                i = futures[future]
+                name = graph[i]["name"]
+                try:
+                    future.result()
+                    result["done"].append(name)
+                except Exception as e:
+                    failed.add(i)
+                    result["errors"][name] = str(getattr(e, "explanation", None) or e)
+                finished += 1
+                if on_progress:
+                    on_progress(finished, total, name)
+            finished += len(level) - len(runnable)
+    coalesce.invalidate()
+    return result
+
+
+def ordered_action(client, graph, ids, action, on_progress=None):
+    """
+    run_levels for every action. restart and remove first stop the running
+    containers dependents-first, then start dependencies-first / remove.
+    """
+    if action not in ("restart", "remove"):
+        targets = _targets(graph, ids, action)
+        return run_levels(client, graph, targets, action, on_progress)
+    result = run_levels(client, graph, _targets(graph, ids, "stop"), "stop")
+    stop_errors = result["errors"]
+    result = run_levels(client, graph, ids, "start" if action == "restart" else "remove", on_progress)
+    for name, error in stop_errors.items():
+        result["errors"].setdefault(name, f"stop failed: {error}")
+    return result
+
+
+def _targets(graph, ids, action):
+    states = _TARGET_STATES.get(action)
+    return [i for i in ids if states is None or graph[i]["state"] in states]
+
+
+# ================================
+# 🔍 Queries & Chat Answers
+# ================================
+@instrument()
+def project_action(project, action, client=None, on_progress=None):
+    """Run `action` on every container of a compose project in dependency order."""
+    if action == "delete":
+        action = "remove"
+    if action not in ACTIONS:
+        raise ValueError(f"Unsupported project action '{action}' (use one of: {', '.join(ACTIONS)})")
+    client = client or require_client()
+    started_at = time.perf_counter()
+    graph = build_graph(client.api.containers(all=True))
+    grouped = projects(graph)
+    if project not in grouped:
+        known = ", ".join(f"`{p}`" for p in sorted(grouped)) or "none"
+        raise LookupError(f"No compose project named `{project}` (projects: {known})")
+    result = ordered_action(client, graph, grouped[project], action, on_progress)
+    result.update(project=project, action=action, seconds=round(time.perf_counter() - started_at, 3))
+    return result
+
+
+def render_project_action(result):
+    past = {"start": "Started", "stop": "Stopped", "restart": "Restarted", "pause": "Paused",
+            "unpause": "Unpaused", "remove": "Removed"}[result["action"]]
+    lines = [f"### 🧩 {past} project `{result['project']}` — {len(result['done'])} container(s) in {result['seconds']}s", ""]
+    if result["levels"]:
+        lines.append("**Order:** " + " → ".join(", ".join(f"`{n}`" for n in level) for level in result["levels"]))
+    if result["cycle"]:
+        lines.append(f"⚠️ Dependency cycle between {', '.join(f'`{n}`' for n in result['cycle'])} — these ran together last.")
+    for name, error in result["errors"].items():
+        lines.append(f"- ❌ `{name}`: {error}")
+    for name, reason in result["skipped"].items():
+        lines.append(f"- ⏭ `{name}`: {reason}")
+    if not result["levels"]:
+        lines.append(f"ℹ️ Nothing to {result['action']} — every container is already in the right state.")
+    return "\n".join(lines)
+
+
+def project_report(project, action, client=None):
+    """Chat answer for 'restart project shop'."""
+    try:
+        return render_project_action(project_action(project, action, client=client))
+    except ValueError as e:
+        return f"⚠️ {e}"
+    except LookupError as e:
+        return f"❌ {e}"
+
+
+@instrument()
+def projects_overview(client=None):
+    """Chat answer for 'show projects': services, state and start order of every compose project."""
+    graph = build_graph((client or require_client()).api.containers(all=True))
+    grouped = projects(graph)
+    if not grouped:
+        return "ℹ️ No Docker Compose projects found (no containers carry `com.docker.compose.project` labels)."
+    lines = ["### 🧩 Compose projects", ""]
+    for project in sorted(grouped):
+        ids = grouped[project]
+        running = sum(1 for i in ids if graph[i]["state"] == "running")
+        levels, cyclic = topological_levels(graph, ids)
+        services = [sorted({graph[i]["service"] for i in level}) for level in levels]
+        lines.append(f"**{project}** — {running}/{len(ids)} running")
+        if services:
+            lines.append("- Start order: " + " → ".join(", ".join(level) for level in services))
+        if cyclic:
+            lines.append(f"- ⚠️ Dependency cycle: {', '.join(sorted({graph[i]['service'] for i in cyclic}))}")
+    lines.append("\n👉 Ask `restart project <name>` (or start / stop / pause / unpause / remove).")
+    return "\n".join(lines)
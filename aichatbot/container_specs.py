@@ -0,0 +1,231 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+import coalesce
+import image_index
+from docker_client import require_client
+from image_pulls import pull_image
+from metrics import instrument
+from reclaim_planner import parse_size
+
+# ================================
+# 📐 Declarative Container Creation
+# ================================
+# Create containers from a spec instead of parsing chat text:
+#
+#   {"image": "nginx:latest", "name": "web", "replicas": 5,
+#    "ports": ["auto:80", "9000:9000"], "env": {"MODE": "test"},
+#    "volumes": ["web-data:/data", "/srv/conf:/etc/nginx/conf.d:ro"],
+#    "limits": {"memory": "256m", "cpus": 0.5}, "command": null,
+#    "network": "testenv", "labels": {}, "restart": "unless-stopped"}
+#
+# A batch does its shared work once: one container list (name conflicts and
+# host ports in use), one image resolution (index lookup, or a single pull),
+# one network lookup/creation. Then the replicas are created and started
+# concurrently with the low-level API (create + start, no per-container
+# inspect). "auto:80" gives every replica a free host port from
+# CONTAINER_PORT_RANGE; a fixed "9000:9000" gives replica i host port 9000+i.
+
+CREATE_MAX_WORKERS = int(os.getenv("CREATE_MAX_WORKERS", "16"))
+CONTAINER_PORT_RANGE = tuple(int(p) for p in os.getenv("CONTAINER_PORT_RANGE", "20000-29999").split("-"))
+MAX_REPLICAS = 200
+BUILTIN_NETWORKS = ("bridge", "host", "none", "default")
+BATCH_LABEL = "aichatbot.batch"
+
+
+# ================================
+# 🧾 Spec parsing
+# ================================
+def parse_port(entry):
+    """'8080:80' / '80' / 'auto:80' / '53:53/udp' / 80 -> (host port or None, 'container/proto')."""
+    text = str(entry).strip()
+    text, _, proto = text.partition("/")
+    host, _, container = text.rpartition(":")
+    if not container.isdigit() or (host and host != "auto" and not host.isdigit()):
+        raise ValueError(f"Invalid port mapping '{entry}' (use 'host:container', 'auto:container' or 'container')")
+    return (int(host) if host.isdigit() else None), f"{container}/{proto or 'tcp'}"
+
+
+def parse_volume(entry):
+    """'name:/path[:ro]' -> (source, {"bind": path, "mode": mode})."""
+    parts = str(entry).split(":")
+    if len(parts) not in (2, 3) or not parts[1].startswith("/"):
+        raise ValueError(f"Invalid volume '{entry}' (use 'source:/container/path[:ro]')")
+    return parts[0], {"bind": parts[1], "mode": parts[2] if len(parts) == 3 else "rw"}
+
+
+def parse_memory(value):
+    """512 (bytes) / '512m' / '1g' -> bytes; a plain number means bytes, as in docker's mem_limit."""
+    if str(value).strip().isdigit():
+        return int(str(value).strip())
+    size = parse_size(str(value))
+    if size is None:
+        raise ValueError(f"Invalid memory limit '{value}' (use e.g. '512m' or '1g')")
+    return size
+
+
+def normalize_spec(spec):
+    """Validate a spec dict and fill in defaults."""
+    if not spec.get("image"):
+        raise ValueError("A spec needs an `image`")
+    replicas = int(spec.get("replicas") or 1)
+    if not 1 <= replicas <= MAX_REPLICAS:
+        raise ValueError(f"`replicas` must be between 1 and {MAX_REPLICAS}")
+    env = spec.get("env") or {}
+    if isinstance(env, (list, tuple)):
+        env = dict(item.split("=", 1) for item in env)
+    limits = spec.get("limits") or {}
+    memory = limits.get("memory")
+    return {
+        "image": spec["image"].strip(),
+        "name": (spec.get("name") or "").strip() or None,
+        "replicas": replicas,
+        "ports": [parse_port(p) for p in spec.get("ports") or []],
+        "env": {str(k): str(v) for k, v in env.items()},
+        "volumes": dict(parse_volume(v) for v in spec.get("volumes") or []),
+        "memory": parse_memory(memory) if memory else None,
+        "nano_cpus": int(float(limits["cpus"]) * 1e9) if limits.get("cpus") else None,
+        "command": spec.get("command"),
+        "network": spec.get("network"),
+        "labels": dict(spec.get("labels") or {}),
+        "restart": spec.get("restart"),
+        "pull": bool(spec.get("pull")),
+    }
+
+
+def replica_names(spec):
+    if not spec["name"]:
+        return [None] * spec["replicas"]
+    if spec["replicas"] == 1:
+        return [spec["name"]]
+    return [f"{spec['name']}-{i}" for i in range(1, spec["replicas"] + 1)]
+
+
+# ================================
+# 🔌 Port allocation
+# ================================
+def used_host_ports(listed):
+    """Host ports published by any container in a low-level `containers(all=True)` result."""
+    return {p["PublicPort"] for c in listed for p in c.get("Ports") or [] if p.get("PublicPort")}
+
+
+def allocate_ports(ports, replicas, used, port_range=CONTAINER_PORT_RANGE):
+    """Per replica {"80/tcp": host port}; auto ports come from `port_range`, skipping `used`."""
+    used = set(used)
+    candidates = iter(range(port_range[0], port_range[1] + 1))
+    allocations = [{} for _ in range(replicas)]
+    for host, container in ports:
+        for i in range(replicas):
+            if host is not None:
+                port = host + i
+                if port in used:
+                    raise ValueError(f"Host port {port} is already in use")
+            else:
+                port = next((p for p in candidates if p not in used), None)
+                if port is None:
+                    raise ValueError(f"No free host port left in {port_range[0]}-{port_range[1]}")
+            used.add(port)
+            allocations[i][container] = port
+    return allocations
+
+
+# ================================
+# 🏗 Batch creation
+# ================================
+def _resolve_image(client, image, pull):
+    """Local tag/id for the batch's image; pulls it once when allowed."""
+    if image_index.ensure_fresh(client) and image_index.resolve(image) is not None:
+        return image
+    try:
+        client.api.inspect_image(image)
+        return image
+    except docker.errors.ImageNotFound:
+        pass
+    if not pull:
+        suggestions = image_index.suggest(image)
+        hint = f" Did you mean: {', '.join(f'`{t}`' for t in suggestions)}?" if suggestions else ""
+        raise LookupError(f"Image `{image}` is not available locally.{hint}")
+    pull_image(image, client=client)
+    return image
+
+
+def _ensure_network(client, network):
+    if not network or network in BUILTIN_NETWORKS:
+        return False
+    if any(n["Name"] == network for n in client.api.networks(names=[network])):
+        return False
+    client.api.create_network(network, driver="bridge", labels={BATCH_LABEL: "true"})
+    return True
+
+
+@instrument()
+def create_batch(spec, client=None, start=True):
+    """
+    Create (and start) spec["replicas"] containers concurrently.
+    Returns {"created": [{"name", "id", "ports"}], "errors": {name or "replica <n>": message}, "network_created", "seconds"}.
+    Raises ValueError / LookupError before creating anything if the spec cannot be satisfied.
+    """
+    spec = normalize_spec(spec)
+    client = client or require_client()
+    started_at = time.perf_counter()
+
+    listed = client.api.containers(all=True)
+    existing = {n.lstrip("/") for c in listed for n in c.get("Names") or []}
+    names = replica_names(spec)
+    taken = [n for n in names if n in existing]
+    if taken:
+        raise ValueError(f"Container name(s) already in use: {', '.join(taken)}")
+    allocations = allocate_ports(spec["ports"], spec["replicas"], used_host_ports(listed))
+
+    image = _resolve_image(client, spec["image"], spec["pull"])
+    network_created = _ensure_network(client, spec["network"])
+    labels = dict(spec["labels"], **{BATCH_LABEL: spec["name"] or spec["image"]})
+
+    def create_one(i):
+        host_config = client.api.create_host_config(
+            port_bindings={port: host for port, host in allocations[i].items()} or None,
+            binds=spec["volumes"] or None,
+            mem_limit=spec["memory"],
+            nano_cpus=spec["nano_cpus"],
+            network_mode=spec["network"],
+            restart_policy={"Name": spec["restart"]} if spec["restart"] else None,
+        )
+        container = client.api.create_container(
+            image,
+            name=names[i],
+            command=spec["command"],
+            environment=spec["env"] or None,
+            ports=[tuple(port.split("/")) for port in allocations[i]] or None,
+            labels=labels,
+            host_config=host_config,
+        )
+        if start:
+            client.api.start(container["Id"])
+        return {"name": names[i] or container["Id"][:12], "id": container["Id"][:12], "ports": allocations[i]}
+
+    created, errors = [], {}
+    with ThreadPoolExecutor(max_workers=min(CREATE_MAX_WORKERS, spec["replicas"])) as pool:
+        futures = [(names[i] or f"replica {i + 1}", pool.submit(create_one, i)) for i in range(spec["replicas"])]
+        for key, future in futures:
+            try:
+                created.append(future.result())
+            except Exception as e:
+                errors[key] = str(getattr(e, "explanation", None) or e)
+    coalesce.invalidate()
+    return {"created": created, "errors": errors, "network_created": network_created,
+            "seconds": round(time.perf_counter() - started_at, 3)}
+
+
+def render_batch(result, spec):
+    lines = [f"### 🚀 Created {len(result['created'])} container(s) from `{spec['image']}` in {result['seconds']}s", ""]
+    for c in result["created"]:
+        ports = ", ".join(f"{host}→{port}" for port, host in c["ports"].items())
+        lines.append(f"- `{c['name']}` ({c['id']})" + (f" — ports {ports}" if ports else ""))
+    for name, error in result["errors"].items():
+        lines.append(f"- ❌ `{name}`: {error}")
+    if result["network_created"]:
+        lines.append(f"\n🌐 Created network `{spec['network']}`.")
+    return "\n".join(lines)
@@ -1,7 +1,19 @@
 import docker
 import time
 import re
-
+import diagnosis_cache
+from log_buffer import get_recent_entries
+from log_templates import summarize
+from resource_diagnostics import diagnose_resources
+from exit_codes import summarize_exit_code
+from docker_client import require_client
+from metrics import instrument
+from tracing import span, traced
+
+LOG_SUMMARY_LINES = 500  # lines mined into the "top templates" summary
+
+@instrument()
+@traced()
 def troubleshoot_container(container_name: str) -> str:
     """
     Automatically troubleshoots a Docker container:
@@ -10,17 +22,33 @@ def troubleshoot_container(container_name: str) -> str:
     - Fetches and analyzes logs
     - Maps exit codes to explanations
     - Returns detailed troubleshooting report
+    The report is cached until the container's state changes (see diagnosis_cache.py).
     """
 
-    client = docker.from_env()
+    client = require_client()
 
-    # Find the container
-    containers = client.containers.list(all=True)
-    container = next((c for c in containers if container_name.lower() in c.name.lower()), None)
+    # Find the container — one list call, then one inspect for its state fingerprint
+    listed = client.api.containers(all=True)
+    match = next((c for c in listed if container_name.lower() in c["Names"][0].lstrip("/").lower()), None)
 
-    if not container:
+    if not match:
         return f"❌ No container found with name similar to '{container_name}'."
 
+    attrs = client.api.inspect_container(match["Id"])
+    cached = diagnosis_cache.lookup("troubleshoot", attrs)
+    if cached is not None:
+        return cached + "\n\n♻️ _Cached report — the container has not started, stopped or restarted since._"
+
+    container = client.containers.prepare_model(attrs)
+    report, cacheable = _troubleshoot(container)
+    if cacheable:
+        # Keyed by the state *after* any restart attempt, so a re-run does not restart it again
+        diagnosis_cache.store("troubleshoot", container.attrs, report)
+    return report
+
+
+def _troubleshoot(container):
+    """The troubleshooting report, and whether it may be cached (not when a restart fixed the container)."""
     name = container.name
     status = container.status.lower()
     report = [f"🧠 **Troubleshooting Report for `{name}`**", ""]
@@ -33,14 +61,15 @@ def troubleshoot_container(container_name: str) -> str:
         try:
             report.append("🔄 Attempting to restart container...")
             container.restart()
-            time.sleep(5)
+            with span("troubleshoot.wait_after_restart", seconds=5):
+                time.sleep(5)
             container.reload()
             new_status = container.status.lower()
             report.append(f"⚙️ New Status after restart: `{new_status}`")
 
             if new_status == "running":
                 report.append("✅ Container restarted successfully and is now running.")
-                return "\n".join(report)
+                return "\n".join(report), False
             else:
                 report.append("⚠️ Container failed to start after restart attempt. Fetching logs...")
 
@@ -49,10 +78,15 @@ def troubleshoot_container(container_name: str) -> str:
     else:
         report.append("✅ Container is already running normally.")
 
-    # Step 3: Gather logs (last 30 lines)
+    # Step 3: Gather logs — prefer lines captured before the crash — and summarize them as templates
     try:
-        logs = container.logs(tail=30).decode("utf-8", errors="ignore").strip()
-        report.append("\n🪵 **Recent Logs (last 30 lines):**\n```\n" + (logs or "No logs found.") + "\n```")
+        entries = get_recent_entries(name, tail=LOG_SUMMARY_LINES)
+        source = "captured at crash time" if entries else f"last {LOG_SUMMARY_LINES} lines"
+        if not entries:
+            with span("logs.fetch", container=name, tail=LOG_SUMMARY_LINES):
+                entries = container.logs(tail=LOG_SUMMARY_LINES, timestamps=True).decode("utf-8", errors="ignore").splitlines()
+        logs = "\n".join(e[1] if isinstance(e, tuple) else e for e in entries)
+        report.append(f"\n🪵 **Log Summary ({source}):**\n```\n" + summarize(entries) + "\n```")
     except Exception as e:
         logs = ""
         report.append(f"❗ Unable to fetch logs: {e}")
@@ -65,6 +99,9 @@ def troubleshoot_container(container_name: str) -> str:
             report.append(f"\n💀 **Exit Code:** `{exit_code}`")
             explanation = get_exit_code_explanation(exit_code)
             report.append(f"📘 **Meaning:** {explanation}")
+        if exit_code == 137 or state.get("OOMKilled"):
+            report.append("\n📈 **Memory / Resource Diagnosis:**")
+            report.extend(f"- {line}" for line in diagnose_resources(container))
     except Exception as e:
         report.append(f"❗ Unable to get exit code: {e}")
 
@@ -93,27 +130,11 @@ def troubleshoot_container(container_name: str) -> str:
     report.append("- Ensure proper file permissions and volume mounts.")
     report.append("- If issue persists, try `docker rm -f " + name + "` and redeploy a fresh instance.")
 
-    return "\n".join(report)
+    return "\n".join(report), True
 
 
 def get_exit_code_explanation(code: int) -> str:
     """
-    Returns human-readable meaning for common Docker container exit codes.
+    Returns human-readable meaning for a Docker container exit code (0–255).
     """
-
-    explanations = {
-        0: "✅ **Normal exit** — container completed successfully with no errors.",
-        1: "⚠️ **Generic error** — typically an application crash, missing file, or misconfiguration.",
-        2: "🧩 **Incorrect usage or missing arguments** — check your command or entrypoint script.",
-        126: "🚫 **Permission problem** — the entrypoint or command isn’t executable.",
-        127: "❓ **Command not found** — likely missing binary or wrong ENTRYPOINT/CMD in Dockerfile.",
-        128: "🔁 **Invalid exit argument** — usually due to a script exiting incorrectly.",
-        129: "🛑 **SIGTERM received** — process terminated manually or by Docker stop.",
-        130: "🧨 **SIGINT (Ctrl+C)** — container was interrupted manually.",
-        137: "💀 **Killed (SIGKILL)** — usually out-of-memory (OOM) or manually killed.",
-        139: "🐛 **Segmentation fault (SIGSEGV)** — memory access violation inside container process.",
-        143: "🧯 **Graceful stop (SIGTERM)** — container stopped gracefully via `docker stop`.",
-        255: "🚨 **Exit status out of range** — application exited unexpectedly with unknown error code."
-    }
-
-    return explanations.get(code, f"❔ Unknown exit code `{code}` — check container logs and entrypoint script.")
+    return summarize_exit_code(code)
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+
+import docker_ops
+import docker_events
+import log_buffer
+
+# ================================
+# 💥 Crash & Restart-Loop Detector
+# ================================
+# Keeps sliding-window counters of `die`, `oom` and `restart` events per
+# container (fed by docker_events) so "what is crashing" is answered from
+# memory instead of scanning the fleet.
+#
+# Only crashes count as deaths: a `die` with a non-zero exit code that no
+# `docker stop` / `kill` / `restart` asked for. Those emit `kill` first (and a
+# clean exit is 0, or 143 for SIGTERM), so a die inside STOP_GRACE_SECONDS of
+# a kill — or with a clean exit code — is ignored. `restart` events are shown
+# but not added to the deaths, since every restart cycle also has its die.
+
+CRASH_WINDOW_SECONDS = 300   # sliding window length
+CRASH_THRESHOLD = 3          # crashes (see below) inside the window that flag a restart loop
+OOM_THRESHOLD = 1            # oom events inside the window that flag a container
+LOG_EXCERPT_LINES = 20       # log lines captured at the moment of death
+STOP_GRACE_SECONDS = 15      # a die this soon after a kill was asked for (docker stop waits 10s)
+CLEAN_EXIT_CODES = (0, 143)  # normal exit, SIGTERM
+
+TRACKED_ACTIONS = ("die", "oom", "restart")
+STOP_ACTIONS = ("kill", "stop")
+
+_windows = {}      # container name -> {"die": deque, "oom": deque, "restart": deque}
+_last_death = {}   # container name -> {"exit_code", "logs", "time", "image"}
+_stop_requested = {}  # container name -> time of the last kill/stop event
+_lock = threading.Lock()
+_started = {"value": False}
+
+
+def _prune(window, now):
+    cutoff = now - CRASH_WINDOW_SECONDS
+    for timestamps in window.values():
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+
+
+def _capture_log_excerpt(container_id):
+    """Read the last few log lines from the daemon (used when the container was not watched)."""
+    try:
+        container = docker_ops.client.containers.get(container_id)
+        return container.logs(tail=LOG_EXCERPT_LINES).decode("utf-8", errors="ignore").strip()
+    except Exception as e:
+        return f"Could not capture logs: {e}"
+
+
+def _fill_log_excerpt(name, container_id, death):
+    logs = _capture_log_excerpt(container_id)
+    with _lock:
+        death["logs"] = logs
+
+
+def handle_container_event(event):
+    """docker_events subscriber: update the counters for one container event."""
+    action = (event.get("Action") or event.get("status") or "").split(":")[0]
+    if action not in TRACKED_ACTIONS and action not in STOP_ACTIONS:
+        return
+
+    actor = event.get("Actor", {})
+    attributes = actor.get("Attributes", {})
+    name = attributes.get("name") or actor.get("ID", "unknown")[:12]
+    timestamp = event.get("timeNano", 0) / 1e9 or event.get("time") or time.time()
+
+    if action in STOP_ACTIONS:
+        with _lock:
+            _stop_requested[name] = timestamp
+        return
+
+    death = None
+    if action == "die":
+        exit_code = attributes.get("exitCode")
+        exit_code = int(exit_code) if exit_code is not None and str(exit_code).isdigit() else None
+        with _lock:
+            stopped_at = _stop_requested.pop(name, None)
+        if exit_code in CLEAN_EXIT_CODES or (stopped_at is not None and timestamp - stopped_at <= STOP_GRACE_SECONDS):
+            return  # stopped on purpose, not a crash
+        death = {
+            "exit_code": exit_code,
+            # Pre-captured if the container was watched; otherwise fetched below
+            "logs": log_buffer.get_recent_logs(name, LOG_EXCERPT_LINES) or "",
+            "time": timestamp,
+            "image": attributes.get("image", "unknown"),
+        }
+        if not death["logs"]:
+            # Off the shared events thread: a daemon round-trip here would stall every other subscriber
+            threading.Thread(target=_fill_log_excerpt, args=(name, actor.get("ID", name), death),
+                             name=f"crash-logs-{name}", daemon=True).start()
+
+    with _lock:
+        window = _windows.setdefault(name, {a: deque() for a in TRACKED_ACTIONS})
+        window[action].append(timestamp)
+        _prune(window, time.time())
+        if death:
+            _last_death[name] = death
+
+
+def _is_flagged(counts):
+    return (
+        counts["die"] >= CRASH_THRESHOLD
+        or counts["oom"] >= OOM_THRESHOLD
+    )
+
+
+def get_crashing_containers():
+    """Return the currently flagged containers, worst offenders first."""
+    now = time.time()
+    flagged = []
+    with _lock:
+        for name, window in list(_windows.items()):
+            _prune(window, now)
+            counts = {a: len(ts) for a, ts in window.items()}
+            if not any(counts.values()):
+                # Quiet for a whole window — forget it
+                del _windows[name]
+                _last_death.pop(name, None)
+                _stop_requested.pop(name, None)
+                continue
+            if _is_flagged(counts):
+                death = _last_death.get(name, {})
+                flagged.append({
+                    "name": name,
+                    "counts": counts,
+                    "exit_code": death.get("exit_code"),
+                    "logs": death.get("logs", ""),
+                    "last_death": death.get("time"),
+                    "image": death.get("image", "unknown"),
+                })
+    flagged.sort(key=lambda c: (c["counts"]["oom"], c["counts"]["die"]), reverse=True)
+    return flagged
+
+
+def crash_report():
+    """Markdown answer for "what is crashing" queries — a pure in-memory read."""
+    if not _started["value"]:
+        return "⚠️ Crash detector is not running, so no crash history is available yet."
+
+    flagged = get_crashing_containers()
+    minutes = CRASH_WINDOW_SECONDS // 60
+    if not flagged:
+        return f"✅ No containers are crash-looping (no container crossed the threshold in the last {minutes} min)."
+
+    output = f"### 💥 Crashing Containers (last {minutes} min)\n\n"
+    for c in flagged:
+        counts = c["counts"]
+        when = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(c["last_death"])) if c["last_death"] else "unknown"
+        output += (
+            f"- **{c['name']}** → deaths: `{counts['die']}`, restarts: `{counts['restart']}`, "
+            f"OOM: `{counts['oom']}`, last exit code: `{c['exit_code'] if c['exit_code'] is not None else 'N/A'}`, "
+            f"last death at: `{when}`\n"
+        )
+        if c["logs"]:
+            output += f"\n  🪵 Logs at time of death:\n```\n{c['logs']}\n```\n"
+    output += "\n💡 Try `troubleshoot <container>` for a detailed report."
+    return output
+
+
+def start_crash_detector():
+    """Subscribe to container events and make sure the events follower is running."""
+    docker_events.subscribe(handle_container_event, "container")
+    docker_events.start_event_follower()
+    _started["value"] = True
@@ -1,39 +1,55 @@
 import streamlit as st
 import subprocess
+from datetime import datetime
+
+import container_specs
+import image_index
+
+SORT_OPTIONS = {"Best match": None, "Name": "name", "Size": "size", "Newest": "created"}
 
 # --- Helper Functions ---
-def list_local_images():
-    """Return a list of local Docker images."""
+def list_local_images(query="", sort=None, limit=50):
+    """Return local images ("repository:tag") from the image index, filtered by `query`."""
     try:
-        result = subprocess.run(
-            ["docker", "images", "--format", "{{.Repository}}:{{.Tag}}"],
-            capture_output=True, text=True
-        )
-        images = result.stdout.strip().split("\n")
-        return images if images[0] else []
-    except FileNotFoundError:
+        image_index.ensure_fresh()
+    except Exception:
         return []
+    return [tag for entry in image_index.search(query, sort=sort, limit=limit) for tag in entry["tags"][:1]]
+
+
+def _image_caption(tag):
+    entry = image_index.resolve(tag)
+    if entry is None:
+        return ""
+    created = datetime.fromtimestamp(entry["created"]).strftime("%Y-%m-%d") if entry["created"] else "?"
+    return f"{entry['size'] / 1024 / 1024:.0f} MB · created {created} · {entry['short_id']}"
 
-def create_container(image_name):
-    """Create a container from a given image in detached mode with a default command."""
+def create_container(image_name, replicas=1, ports=None, env=None, keep_alive=True):
+    """Create `replicas` detached containers from an image (see container_specs.create_batch)."""
+    spec = {
+        "image": image_name,
+        "replicas": replicas,
+        "ports": ports or [],
+        "env": env or {},
+        "pull": True,  # like `docker run`: pull a missing image once for the whole batch
+        # Images without a long-running default command exit at once; keep them alive if asked
+        "command": ["tail", "-f", "/dev/null"] if keep_alive else None,
+    }
     try:
-        cmd = ["docker", "run", "-d"]
-        
-        # Add container name if provided
-        
-        # Use image name
-        cmd.append(image_name)
-        
-        # Add a default command to keep container alive if none is provided
-        cmd += ["tail", "-f", "/dev/null"]
+        result = container_specs.create_batch(spec)
+    except (ValueError, LookupError) as e:
+        return f"❌ Failed to create container: {e}"
+    except Exception as e:
+        return f"❌ Docker not available: {e}"
+    if not result["created"]:
+        return f"❌ Failed to create container: {'; '.join(result['errors'].values())}"
+    return container_specs.render_batch(result, spec)
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            return f"✅ Container created from {image_name} (ID: {result.stdout.strip()})"
-        else:
-            return f"❌ Failed to create container: {result.stderr.strip()}"
-    except FileNotFoundError:
-        return "❌ Docker not installed"
+
+def _parse_options(ports_text, env_text):
+    ports = [p.strip() for p in ports_text.split(",") if p.strip()]
+    env = dict(line.split("=", 1) for line in env_text.splitlines() if "=" in line)
+    return ports, env
 
 # --- Streamlit UI ---
 def docker_create_container_tab():
@@ -43,20 +59,35 @@ def docker_create_container_tab():
 
     with col_left:
         st.subheader("📦 Local Docker Images")
-        images = list_local_images()
+        col_search, col_sort = st.columns([3, 1])
+        with col_search:
+            query = st.text_input("🔍 Search images", placeholder="e.g. nginx, postgres:15, ngix")
+        with col_sort:
+            sort = SORT_OPTIONS[st.selectbox("Sort by", list(SORT_OPTIONS))]
+        images = list_local_images(query, sort)
+
+        with st.expander("⚙️ Options"):
+            replicas = st.number_input("Replicas", min_value=1, max_value=container_specs.MAX_REPLICAS, value=1)
+            ports_text = st.text_input("Ports", placeholder="auto:80, 9000:9000")
+            env_text = st.text_area("Environment (KEY=value per line)", height=80)
+            keep_alive = st.checkbox("Keep alive (tail -f /dev/null)", value=True)
 
         if images:
             for idx, img in enumerate(images):
               col_img, col_btn = st.columns([3,1])
               with col_img:
                st.text(img)
+               st.caption(_image_caption(img))
               with col_btn:
         # Replace ":" with "_" to avoid key issues and add index to make it unique
                safe_key = f"create_{img.replace(':', '_')}_{idx}"
                if st.button("Create Container", key=safe_key):
                 with st.spinner(f"Creating container from {img}..."):
-                 output = create_container(img)
-                 st.success(output)
+                 ports, env = _parse_options(ports_text, env_text)
+                 output = create_container(img, int(replicas), ports, env, keep_alive)
+                 st.markdown(output)
+        elif query:
+            st.info(f"No local image matches '{query}'. Ask the ChatBot to `pull image {query}` and return here.")
         else:
             st.info("No local images found. Please ask the ChatBot to pull an image first and return here.")
 
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import record_cache
+
+# ================================
+# 🗃 Persistent Diagnosis Cache
+# ================================
+# Troubleshooting reports and log diagnoses are pure functions of a
+# container's state: until it is started, stops, exits or restarts again,
+# the logs that matter and the exit code are the same. Results are cached
+# in SQLite (DIAGNOSIS_CACHE_PATH) under a fingerprint of
+#
+#   container id, State.Status, State.StartedAt, State.FinishedAt,
+#   State.ExitCode, RestartCount
+#
+# so "troubleshoot api" on an unchanged container answers from one inspect
+# call, across API restarts too. A running container keeps logging, so its
+# entries also expire after DIAGNOSIS_CACHE_RUNNING_SECONDS. The file holds at
+# most DIAGNOSIS_CACHE_MAX_ENTRIES entries; the least recently used go first.
+
+DIAGNOSIS_CACHE_ENABLED = os.getenv("DIAGNOSIS_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DIAGNOSIS_CACHE_PATH = os.getenv("DIAGNOSIS_CACHE_PATH", "/tmp/aichatbot-diagnosis-cache.sqlite3")
+DIAGNOSIS_CACHE_MAX_ENTRIES = int(os.getenv("DIAGNOSIS_CACHE_MAX_ENTRIES", "500"))
+DIAGNOSIS_CACHE_RUNNING_SECONDS = int(os.getenv("DIAGNOSIS_CACHE_RUNNING_SECONDS", "60"))
+FINGERPRINT_VERSION = 1  # bump when report formats change, so old entries stop matching
+
+_db = {"conn": None, "path": None}
+_db_lock = threading.RLock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diagnoses (
+    kind TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    container TEXT,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS diagnoses_lru ON diagnoses (last_used);
+"""
+
+
+def _conn():
+    if _db["conn"] is None or _db["path"] != DIAGNOSIS_CACHE_PATH:
+        conn = sqlite3.connect(DIAGNOSIS_CACHE_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _db.update(conn=conn, path=DIAGNOSIS_CACHE_PATH)
+    return _db["conn"]
+
+
+def fingerprint(attrs):
+    """Hash of the container state a diagnosis depends on (an inspect result)."""
+    state = attrs.get("State") or {}
+    parts = [FINGERPRINT_VERSION, attrs.get("Id"), state.get("Status"), state.get("StartedAt"),
+             state.get("FinishedAt"), state.get("ExitCode"), attrs.get("RestartCount")]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:32]
+
+
+# ================================
+# 🔑 Get / Put
+# ================================
+def get(kind, key, max_age=None):
+    """Cached value for (kind, key), or None; a hit refreshes its LRU position."""
+    if not DIAGNOSIS_CACHE_ENABLED:
+        return None
+    now = time.time()
+    with _db_lock:
+        row = _conn().execute("SELECT value, created_at FROM diagnoses WHERE kind = ? AND fingerprint = ?",
+                              (kind, key)).fetchone()
+        if row is not None and max_age is not None and now - row[1] > max_age:
+            row = None
+        if row is not None:
+            _conn().execute("UPDATE diagnoses SET last_used = ?, hits = hits + 1 WHERE kind = ? AND fingerprint = ?",
+                            (now, kind, key))
+    record_cache(f"diagnosis_{kind}", row is not None)
+    return json.loads(row[0]) if row is not None else None
+
+
+def put(kind, key, value, container=None):
+    """Store a JSON-serializable value, then evict least recently used entries over the cap."""
+    if not DIAGNOSIS_CACHE_ENABLED:
+        return
+    now = time.time()
+    with _db_lock:
+        conn = _conn()
+        conn.execute("INSERT OR REPLACE INTO diagnoses (kind, fingerprint, container, value, created_at, last_used, hits) "
+                     "VALUES (?, ?, ?, ?, ?, ?, 0)", (kind, key, container, json.dumps(value), now, now))
+        conn.execute("DELETE FROM diagnoses WHERE rowid IN "
+                     "(SELECT rowid FROM diagnoses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                     (DIAGNOSIS_CACHE_MAX_ENTRIES,))
+
+
+def lookup(kind, attrs):
+    """Cached diagnosis of a container in the state `attrs` (an inspect result) describes."""
+    running = (attrs.get("State") or {}).get("Running")
+    return get(kind, fingerprint(attrs), max_age=DIAGNOSIS_CACHE_RUNNING_SECONDS if running else None)
+
+
+def store(kind, attrs, value):
+    put(kind, fingerprint(attrs), value, container=(attrs.get("Name") or "").lstrip("/") or None)
+
+
+def invalidate(container=None):
+    """Forget the diagnoses of one container (by name), or all of them."""
+    with _db_lock:
+        if container is None:
+            _conn().execute("DELETE FROM diagnoses")
+        else:
+            _conn().execute("DELETE FROM diagnoses WHERE container = ?", (container,))
+
+
+def cache_stats():
+    with _db_lock:
+        entries, hits = _conn().execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM diagnoses").fetchone()
+    return {"enabled": DIAGNOSIS_CACHE_ENABLED, "path": DIAGNOSIS_CACHE_PATH, "entries": entries,
+            "hits": hits, "max_entries": DIAGNOSIS_CACHE_MAX_ENTRIES}
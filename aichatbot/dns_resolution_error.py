@@ -6,43 +6,213 @@
 
 import json
 import os
+import random
+import shlex
+import shutil
+import socket
+import struct
 import subprocess
-
-def fix_dns_issue():
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import coalesce
+import health_index
+import image_index
+import knowledge_base
+import docker_client
+
+# ================================
+# 🌐 DNS Fix Workflow
+# ================================
+# "fix dns" runs as a background job (see ai_engine._fix_dns_job):
+#
+#   1. every candidate resolver is asked for DNS_PROBE_NAME in parallel, and
+#      the DNS_SERVERS_KEEP fastest that answered are chosen;
+#   2. daemon.json gets that "dns" list via a temp file + rename, so dockerd
+#      never reads a half-written file (the previous file is kept as .bak);
+#   3. only if the list changed, the daemon is restarted;
+#   4. /_ping is polled with backoff until it answers, then the client pool
+#      is rebuilt and the cached reads and indexes are refreshed.
+
+DNS_CANDIDATES = [s.strip() for s in os.getenv("DNS_CANDIDATES", "1.1.1.1,8.8.8.8,8.8.4.4,9.9.9.9").split(",") if s.strip()]
+DNS_PROBE_NAME = os.getenv("DNS_PROBE_NAME", "registry-1.docker.io")
+DNS_PROBE_PORT = int(os.getenv("DNS_PROBE_PORT", "53"))
+DNS_PROBE_TIMEOUT = float(os.getenv("DNS_PROBE_TIMEOUT", "2"))
+DNS_SERVERS_KEEP = 2
+DOCKER_DAEMON_JSON = os.getenv("DOCKER_DAEMON_JSON", "/etc/docker/daemon.json")
+DOCKER_RESTART_COMMAND = shlex.split(os.getenv("DOCKER_RESTART_COMMAND", "sudo systemctl restart docker"))
+DOCKER_RESTART_TIMEOUT = 120
+DOCKER_READY_TIMEOUT = int(os.getenv("DOCKER_READY_TIMEOUT", "60"))
+
+
+# ================================
+# 🔬 Resolver Probes
+# ================================
+def _dns_query(name, query_id):
+    """A minimal recursive DNS query for the A record of `name`."""
+    header = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    labels = b"".join(bytes([len(part)]) + part.encode("ascii") for part in name.strip(".").split("."))
+    return header + labels + b"\x00" + struct.pack(">HH", 1, 1)
+
+
+def probe_resolver(server, name=None, timeout=None, port=None):
+    """Ask one resolver for `name`: {"server", "ok", "ms", "error"}."""
+    query_id = random.randrange(1 << 16)
+    start = time.perf_counter()
+    try:
+        with socket.socket(socket.AF_INET6 if ":" in server else socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout or DNS_PROBE_TIMEOUT)
+            sock.sendto(_dns_query(name or DNS_PROBE_NAME, query_id), (server, port or DNS_PROBE_PORT))
+            while True:
+                reply = sock.recv(512)
+                if len(reply) >= 12 and struct.unpack(">H", reply[:2])[0] == query_id:
+                    break  # ignore stray datagrams
+        ms = round((time.perf_counter() - start) * 1000, 1)
+        _, flags, _, answers, _, _ = struct.unpack(">HHHHHH", reply[:12])
+        if flags & 0x000F:
+            return {"server": server, "ok": False, "ms": ms, "error": f"rcode {flags & 0x000F}"}
+        if not answers:
+            return {"server": server, "ok": False, "ms": ms, "error": "no answer"}
+        return {"server": server, "ok": True, "ms": ms, "error": None}
+    except socket.timeout:
+        return {"server": server, "ok": False, "ms": None, "error": "timeout"}
+    except OSError as e:
+        return {"server": server, "ok": False, "ms": None, "error": str(e)}
+
+
+def rank_resolvers(candidates=None, name=None, timeout=None, port=None):
+    """Probe all candidates concurrently; answering resolvers first, fastest first."""
+    candidates = candidates or DNS_CANDIDATES
+    if not candidates:
+        return []
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        results = list(pool.map(lambda server: probe_resolver(server, name, timeout, port), candidates))
+    return sorted(results, key=lambda r: (not r["ok"], r["ms"] if r["ms"] is not None else float("inf")))
+
+
+# ================================
+# 📝 daemon.json
+# ================================
+def _load_daemon_config(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+
+def _install(tmp_path, path):
+    """Rename tmp_path over path; through sudo when /etc/docker is not writable by us."""
+    if os.access(os.path.dirname(path) or ".", os.W_OK):
+        os.replace(tmp_path, path)
+        return
+    # Copy next to the target first so the final mv is a same-filesystem (atomic) rename
+    staged = path + ".tmp"
+    subprocess.run(["sudo", "install", "-m", "644", tmp_path, staged], check=True)
+    subprocess.run(["sudo", "mv", "-f", staged, path], check=True)
+    os.unlink(tmp_path)
+
+
+def write_daemon_dns(servers, path=None):
     """
-    Automatically fixes DNS resolution issues in Docker by updating /etc/docker/daemon.json
-    and restarting the Docker service.
+    Set "dns" in daemon.json atomically, keeping every other setting.
+    Returns the previous "dns" list, or False when nothing had to change.
     """
-    daemon_path = "/etc/docker/daemon.json"
-    dns_config = {"dns": ["8.8.8.8", "8.8.4.4"]}
-
+    path = path or DOCKER_DAEMON_JSON
+    config = _load_daemon_config(path)
+    previous = config.get("dns")
+    if previous == servers:
+        return False
+    config["dns"] = servers
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".daemon.json.", dir=directory if os.access(directory, os.W_OK) else None)
     try:
-        # Step 1: Backup existing file
-        if os.path.exists(daemon_path):
-            os.system(f"sudo cp {daemon_path} {daemon_path}.bak")
-
-        # Step 2: Load or create config
-        if os.path.exists(daemon_path):
-            with open(daemon_path, "r") as f:
-                try:
-                    config = json.load(f)
-                except json.JSONDecodeError:
-                    config = {}
-        else:
-            config = {}
-
-        # Step 3: Update DNS section
-        config["dns"] = dns_config["dns"]
-
-        # Step 4: Write new file
-        with open("/tmp/daemon.json", "w") as f:
+        with os.fdopen(fd, "w") as f:
             json.dump(config, f, indent=2)
-        os.system(f"sudo mv /tmp/daemon.json {daemon_path}")
-        os.system(f"sudo chmod 644 {daemon_path}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        if os.path.exists(path):
+            if os.access(directory, os.W_OK):
+                shutil.copy2(path, path + ".bak")
+            else:
+                subprocess.run(["sudo", "cp", path, path + ".bak"], check=True)
+        _install(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return previous or []
+
+
+# ================================
+# 🔁 Daemon Restart
+# ================================
+def restart_daemon():
+    subprocess.run(DOCKER_RESTART_COMMAND, check=True, timeout=DOCKER_RESTART_TIMEOUT)
+
+
+def refresh_after_restart():
+    """Drop cached reads and reload the indexes that were built from the old daemon."""
+    coalesce.invalidate()
+    for index in (health_index, image_index):
+        if index.is_ready():
+            try:
+                index.rebuild()
+            except Exception as e:
+                print(f"⚠️ Could not rebuild {index.__name__} after the restart: {e}")
+
+
+def _resolver_table(ranked):
+    lines = ["| Resolver | Result |", "|---|---|"]
+    for r in ranked:
+        result = f"{r['ms']} ms" if r["ok"] else f"❌ {r['error']}"
+        lines.append(f"| `{r['server']}` | {result} |")
+    return "\n".join(lines)
+
+
+def fix_dns_issue(report=None):
+    """
+    Fixes DNS resolution issues in Docker: points daemon.json at the fastest
+    answering resolvers and restarts the Docker service (see the module comment).
+    report(progress, message) receives job progress.
+    """
+    report = report or (lambda progress, message=None: None)
 
-        # Step 5: Restart Docker
-        subprocess.run(["sudo", "systemctl", "restart", "docker"], check=True)
-        return "✅ DNS configuration updated successfully and Docker restarted."
+    try:
+        if not DNS_CANDIDATES:
+            return "⚠️ No candidate resolvers configured — set DNS_CANDIDATES (e.g. `1.1.1.1,8.8.8.8`)."
+        report(0.1, f"Testing {len(DNS_CANDIDATES)} DNS resolvers")
+        ranked = rank_resolvers()
+        servers = [r["server"] for r in ranked if r["ok"]][:DNS_SERVERS_KEEP]
+        table = _resolver_table(ranked)
+        if not servers:
+            return (f"❌ None of the candidate resolvers answered for `{DNS_PROBE_NAME}` — "
+                    f"daemon.json was left unchanged. Check the host's network.\n\n{table}")
+
+        report(0.3, f"Writing {DOCKER_DAEMON_JSON}")
+        previous = write_daemon_dns(servers)
+        if previous is False:
+            return f"✅ Docker already uses the fastest resolvers ({', '.join(servers)}); no restart needed.\n\n{table}"
+
+        report(0.5, "Restarting Docker")
+        restart_daemon()
+
+        report(0.7, "Waiting for the Docker daemon")
+        started = time.monotonic()
+        if docker_client.wait_until_ready(DOCKER_READY_TIMEOUT) is None:
+            return (f"⚠️ DNS configuration updated ({', '.join(servers)}), but Docker did not come back "
+                    f"within {DOCKER_READY_TIMEOUT}s. Check `systemctl status docker`.")
+        ready_after = time.monotonic() - started
+
+        report(0.9, "Reconnecting and refreshing caches")
+        refresh_after_restart()
+        return (f"✅ DNS configuration updated to {', '.join(servers)} "
+                f"(was {', '.join(previous) or 'unset'}); Docker restarted and answered after {ready_after:.1f}s.\n\n{table}")
 
     except Exception as e:
         return f"❌ Failed to update Docker DNS configuration: {e}"
@@ -52,48 +222,4 @@ def Dnsissue():
     """
     Handles DNS resolution issues like 'Temporary failure resolving' during Docker builds or pulls.
     """
-
-    return """
- 🌐 **Fix for 'Temporary failure resolving' in Docker**
-
-  This issue usually occurs when Docker cannot resolve domain names (DNS failure)
-    while building images, pulling images, or installing packages inside containers.
-
-Follow these steps to fix it:
-
----
-
- 🧰 Step 1: Edit Docker Daemon Configuration
-Open Docker’s daemon configuration file (create it if it does not exist):
-
-#```bash
-sudo vi /etc/docker/daemon.json
-paste the below code
-
-{
-  "dns": ["8.8.8.8", "4.4.4.4"]
-}
-or 
-
-{"dns": ["8.8.8.8", "8.8.4.4"]}
-
-sudo systemctl restart docker
-
-**Alternatively, connecting to a different network (such as another Wi-Fi or mobile hotspot) can also resolve this issue.
-
-📚 For more details, refer to this helpful discussion:
-
-(https://askubuntu.com/questions/769227/ubuntu-16-04-server-updates-temporary-failure-resolving-ro-archive-ubuntu-com?noredirect=1&lq=1
-)
-
-(https://askubuntu.com/questions/884604/temporary-failure-resolving-us-archive-ubuntu-com-live-usb-rescue?noredirect=1&lq=1
-)
-
-(https://askubuntu.com/questions/91543/apt-get-update-fails-to-fetch-files-temporary-failure-resolving-error
-)
-
-(https://askubuntu.com/questions/1385005/errors-while-updating-temporary-faliure-resolving-archive-ubuntu-com?noredirect=1&lq=1
-)
-
-If you want I can fix it say: fix dns issue
-"""
+    return knowledge_base.get_markdown("dns_issue")
@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+
+import docker
+from docker.transport.unixconn import UnixHTTPAdapter
+
+from metrics import instrument_docker_client
+from tracing import trace_docker_client
+
+# ================================
+# 🔌 Shared Docker Client
+# ================================
+# One client (and one HTTP connection pool) for the whole process — the API,
+# troubleshooting and the Streamlit pages all go through get_client(). It is
+# created on first use instead of at import time, so importing docker_ops
+# never blocks on, or fails because of, the daemon.
+#
+# - Pool: DOCKER_POOL_SIZE keep-alive connections to the socket, shared by
+#   concurrent requests instead of each caller opening its own client.
+# - Timeouts: every API call gives up after DOCKER_TIMEOUT seconds.
+# - Health: every successful response marks the client healthy; a client idle
+#   for longer than DOCKER_HEALTHCHECK_INTERVAL is pinged before reuse.
+# - Reconnect: when the daemon is gone (e.g. restarted by fix_dns_issue)
+#   connection attempts back off exponentially up to DOCKER_RECONNECT_MAX_DELAY.
+#   After a restart we triggered ourselves, wait_until_ready() drops the dead
+#   pool and polls /_ping with a much shorter backoff instead.
+#
+# fleet_hosts.py keeps one ClientManager per remote host on top of this.
+
+DOCKER_POOL_SIZE = int(os.getenv("DOCKER_POOL_SIZE", "16"))
+DOCKER_TIMEOUT = int(os.getenv("DOCKER_TIMEOUT", "30"))
+DOCKER_HEALTHCHECK_INTERVAL = 15
+DOCKER_RECONNECT_BASE_DELAY = 0.5
+DOCKER_RECONNECT_MAX_DELAY = 30
+DOCKER_READY_BASE_DELAY = 0.1   # /_ping polling after a daemon restart (see wait_until_ready)
+DOCKER_READY_MAX_DELAY = 2
+
+class _SocketPoolAdapter(UnixHTTPAdapter):
+    """
+    docker-py keys unix-socket connection pools by the full request URL, so
+    every endpoint and container id gets its own pool, and the least recently
+    used of them are closed once there are more than 25. Share a single pool
+    per socket so keep-alive connections are actually reused.
+    """
+
+    def get_connection(self, url, proxies=None):
+        return super().get_connection("http+docker://localhost", proxies)
+
+
+def _share_socket_pool(client):
+    adapter = getattr(client.api, "_custom_adapter", None)
+    if type(adapter) is UnixHTTPAdapter:
+        shared = _SocketPoolAdapter(
+            "http+unix://" + adapter.socket_path, adapter.timeout, max_pool_size=adapter.max_pool_size
+        )
+        client.api.mount("http+docker://", shared)
+        client.api._custom_adapter = shared
+        adapter.close()
+    return client
+
+
+def _close(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def _is_healthy(client):
+    try:
+        return client.ping()
+    except Exception:
+        return False
+
+
+# ================================
+# 🔁 Client Manager
+# ================================
+class ClientManager:
+    """Lazily connected, health-checked client for one daemon (base_url None = DOCKER_HOST / local socket)."""
+
+    def __init__(self, base_url=None, timeout=None, pool_size=None):
+        self.base_url = base_url
+        self.timeout = timeout or DOCKER_TIMEOUT
+        self.pool_size = pool_size or DOCKER_POOL_SIZE
+        self._state = {"client": None, "error": None, "failures": 0, "next_attempt": 0.0, "last_ok": 0.0, "connects": 0}
+        self._lock = threading.Lock()
+
+    def _mark_healthy(self, response, *args, **kwargs):
+        if response.status_code < 500:
+            self._state["last_ok"] = time.monotonic()
+
+    def _prepare(self, client):
+        client = trace_docker_client(instrument_docker_client(_share_socket_pool(client)))
+        hooks = client.api.hooks.setdefault("response", [])
+        if self._mark_healthy not in hooks:
+            hooks.append(self._mark_healthy)
+        return client
+
+    def _connect(self):
+        if self.base_url:
+            client = docker.DockerClient(base_url=self.base_url, max_pool_size=self.pool_size, timeout=self.timeout)
+        else:
+            client = docker.from_env(max_pool_size=self.pool_size, timeout=self.timeout)
+        return self._prepare(client)
+
+    def get_client(self):
+        """Return the client, (re)connecting as needed; None while the daemon is unreachable."""
+        state = self._state
+        client = state["client"]
+        if client is not None and time.monotonic() - state["last_ok"] < DOCKER_HEALTHCHECK_INTERVAL:
+            return client
+        with self._lock:
+            client = state["client"]
+            if client is not None:
+                if time.monotonic() - state["last_ok"] < DOCKER_HEALTHCHECK_INTERVAL or _is_healthy(client):
+                    return client
+                state["client"] = None
+                _close(client)
+
+            now = time.monotonic()
+            if now < state["next_attempt"]:
+                return None
+            try:
+                state["client"] = self._connect()
+                state.update(error=None, failures=0, next_attempt=0.0, last_ok=time.monotonic())
+                state["connects"] += 1
+            except Exception as e:
+                if state["failures"] == 0:
+                    print(f"⚠️ Docker not available or not running{f' at {self.base_url}' if self.base_url else ''}: {e}")
+                delay = min(DOCKER_RECONNECT_MAX_DELAY, DOCKER_RECONNECT_BASE_DELAY * 2 ** state["failures"])
+                state.update(error=e, failures=state["failures"] + 1, next_attempt=now + delay)
+            return state["client"]
+
+    def require_client(self):
+        """Like get_client(), but raise DockerException when the daemon is unreachable."""
+        client = self.get_client()
+        if client is None:
+            raise docker.errors.DockerException(f"Docker daemon not available: {self._state['error']}")
+        return client
+
+    def wait_for_daemon(self, timeout=60):
+        """Block until the daemon answers again (after a restart); returns the client or None."""
+        deadline = time.monotonic() + timeout
+        while True:
+            client = self.get_client()
+            if client is not None:
+                return client
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(remaining, max(0.05, self._state["next_attempt"] - time.monotonic())))
+
+    def wait_until_ready(self, timeout=60):
+        """
+        After a daemon restart: drop the pooled connections and poll /_ping,
+        backing off from DOCKER_READY_BASE_DELAY to DOCKER_READY_MAX_DELAY,
+        until the daemon answers. Returns the fresh client or None.
+        """
+        deadline = time.monotonic() + timeout
+        delay = DOCKER_READY_BASE_DELAY
+        self.reset()
+        while True:
+            self._state["next_attempt"] = 0.0  # this loop paces the attempts, not the reconnect backoff
+            client = self.get_client()
+            if client is not None and _is_healthy(client):
+                return client
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(remaining, delay))
+            delay = min(delay * 2, DOCKER_READY_MAX_DELAY)
+
+    def set_client(self, client):
+        """Install an already-built client; returns the previous one."""
+        with self._lock:
+            previous = self._state["client"]
+            self._state["client"] = self._prepare(client) if client is not None else None
+            self._state.update(error=None, failures=0, next_attempt=0.0, last_ok=time.monotonic())
+        return previous
+
+    def reset(self):
+        """Drop the current client; the next get_client() reconnects immediately."""
+        with self._lock:
+            client = self._state["client"]
+            self._state.update(client=None, failures=0, next_attempt=0.0)
+        if client is not None:
+            _close(client)
+
+    def status(self):
+        state = self._state
+        return {
+            "connected": state["client"] is not None,
+            "connects": state["connects"],
+            "failures": state["failures"],
+            "last_error": str(state["error"]) if state["error"] else None,
+            "pool_size": self.pool_size,
+            "timeout_seconds": self.timeout,
+        }
+
+
+# The process-wide client for the local daemon
+_default = ClientManager()
+
+
+def get_client():
+    """Return the shared docker.DockerClient, (re)connecting as needed; None while the daemon is unreachable."""
+    return _default.get_client()
+
+
+def require_client():
+    """Like get_client(), but raise DockerException when the daemon is unreachable."""
+    return _default.require_client()
+
+
+def wait_for_daemon(timeout=60):
+    return _default.wait_for_daemon(timeout)
+
+
+def wait_until_ready(timeout=60):
+    return _default.wait_until_ready(timeout)
+
+
+def set_client(client):
+    """Install an already-built client (benchmarks point this at the fake daemon); returns the previous one."""
+    return _default.set_client(client)
+
+
+def reset_client():
+    return _default.reset()
+
+
+def client_status():
+    return _default.status()
+
+
+def last_error():
+    return _default._state["error"]
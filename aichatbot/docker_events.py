@@ -0,0 +1,101 @@
+import threading
+import time
+
+import docker_ops
+
+# ================================
+# 📡 Docker Events Follower
+# ================================
+# One background thread follows the daemon's `events` stream and fans each
+# event out to the subscribed handlers (crash detector, caches, indexes...).
+
+EVENT_RECONNECT_MAX_DELAY = 30  # seconds between reconnect attempts (upper bound)
+
+_subscribers = []  # (callback, event_type) pairs
+_follower = {"thread": None, "stream": None, "stop": threading.Event(), "last_seen": None, "last_nano": 0}
+_lock = threading.Lock()
+
+
+def subscribe(callback, event_type="container"):
+    """Register `callback(event)` for events of the given type (None = all types)."""
+    with _lock:
+        if (callback, event_type) not in _subscribers:
+            _subscribers.append((callback, event_type))
+
+
+def unsubscribe(callback, event_type="container"):
+    with _lock:
+        if (callback, event_type) in _subscribers:
+            _subscribers.remove((callback, event_type))
+
+
+def dispatch_event(event):
+    """Deliver one decoded Docker event to every matching subscriber."""
+    event_type = event.get("Type")
+    with _lock:
+        targets = [cb for cb, t in _subscribers if t is None or t == event_type]
+    for callback in targets:
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"⚠️ Event handler {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+def start_event_follower():
+    """Start the background events thread (no-op if it is already running)."""
+    thread = _follower["thread"]
+    if thread and thread.is_alive():
+        return thread
+    _follower["stop"].clear()
+    thread = threading.Thread(target=_follow_events, name="docker-events", daemon=True)
+    _follower["thread"] = thread
+    thread.start()
+    return thread
+
+
+def stop_event_follower():
+    _follower["stop"].set()
+    stream = _follower["stream"]
+    if stream is not None:
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+
+def _follow_events():
+    """Follow the events stream, reconnecting with backoff if the daemon goes away."""
+    delay = 1
+    stop = _follower["stop"]
+    while not stop.is_set():
+        client = docker_ops.client
+        if client is None:
+            stop.wait(delay)
+            delay = min(delay * 2, EVENT_RECONNECT_MAX_DELAY)
+            continue
+        try:
+            # Resume from the last event we saw so nothing is lost across reconnects
+            since = _follower["last_seen"] or int(time.time())
+            stream = client.events(decode=True, since=since)
+            _follower["stream"] = stream
+            delay = 1
+            for event in stream:
+                # `since` has one-second resolution, so skip events replayed after a reconnect
+                time_nano = event.get("timeNano", 0)
+                if time_nano and time_nano <= _follower["last_nano"]:
+                    continue
+                _follower["last_nano"] = time_nano
+                _follower["last_seen"] = event.get("time", _follower["last_seen"])
+                dispatch_event(event)
+                if stop.is_set():
+                    break
+            else:
+                # Stream ended cleanly (daemon shutting down) — pause before reconnecting
+                stop.wait(delay)
+        except Exception as e:
+            if not stop.is_set():
+                print(f"⚠️ Docker events stream lost: {e} (retrying in {delay}s)")
+                stop.wait(delay)
+                delay = min(delay * 2, EVENT_RECONNECT_MAX_DELAY)
+        finally:
+            _follower["stream"] = None
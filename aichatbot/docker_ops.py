@@ -2,25 +2,34 @@ import docker
 import subprocess
 import sys
 import time
-import streamlit as st
 from datetime import datetime
-from docker import from_env
-from tabulate import tabulate  # ✅ for clean table display
-
-# Initialize Docker client safely
-try:
-    client = docker.from_env()
-except Exception as e:
-    client = None
-    print(f"⚠️ Docker not available or not running: {e}")
+import knowledge_base
+import health_index
+import compose_projects
+import container_specs
+from coalesce import coalesced, invalidates
+from docker_client import get_client, require_client
+from metrics import instrument
+from tracing import traced
+
+
+# Docker client is created lazily on first use (see docker_client.py);
+# `docker_ops.client` keeps working for existing callers.
+def __getattr__(name):
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ================================
 # 🔍 Container Info and Health
 # ================================
-def get_all_containers_info():
+@instrument()
+@traced()
+@coalesced()
+def get_all_containers_info(client=None):
     """Return info including name, image, status, and health (if available)."""
     containers_info = []
-    for c in client.containers.list(all=True):
+    for c in (client or require_client()).containers.list(all=True):
         container_data = {
             "name": c.name,
             "id": c.short_id,
@@ -39,25 +48,20 @@ def get_all_containers_info():
     return containers_info
 
 
-def get_container_health_summary():
+@instrument()
+@traced()
+@coalesced()
+def get_container_health_summary(client=None):
   """Summarize container health status with distinct icons."""
-  containers = get_all_containers_info()  # Your existing function
+  # Local daemon: pure in-memory read from the health index (see health_index.py).
+  # Other daemons, or before the index is built: one bulk list call, no stats.
+  rows = health_index.health_rows() if client is None else None
+  if rows is None:
+      rows = health_index.rows_from_list((client or require_client()).api.containers(all=True))
   health_summary = []
 
-  for c in containers:
-        name = c.get("name", "unknown")
-        status = c.get("status", "").lower()
-        health = c.get("health")
-
-        # If health is None, try fetching from Docker directly
-        if health is None:
-            try:
-                container_obj = client.containers.get(name)
-                health = container_obj.attrs.get("State", {}).get("Health", {}).get("Status")
-            except docker.errors.NotFound:
-                health = "unknown"
-            except Exception:
-                health = "unknown"
+  for name, status, health in rows:
+        status = (status or "").lower()
 
         # Determine icon and health text
         if status == "paused":
@@ -75,6 +79,9 @@ def get_container_health_summary():
         elif health.lower() == "unhealthy":
             icon = "🔴"
             health_text = "unhealthy"
+            last_checks = health_index.health_log(name) if client is None else []
+            if last_checks and last_checks[-1]["output"]:
+                health_text += f" — `{last_checks[-1]['output'].splitlines()[-1][:120]}`"
         else:
             icon = "🟠"
             health_text = health or "unknown"
@@ -98,9 +105,10 @@ def health_emoji(status):
         "unknown": "⚪"
     }.get(status, "⚪")
 
+@instrument()
 def list_all_containers():
     """Return list of containers and formatted table"""
-    containers = client.containers.list(all=True)
+    containers = require_client().containers.list(all=True)
     if not containers:
         return [], "No containers found."
     
@@ -119,6 +127,7 @@ def list_all_containers():
             health_emoji(health_status)
         ])
     
+    from tabulate import tabulate  # ✅ for clean table display (imported on first use)
     table = tabulate(table_data, headers=["Name", "Status", "Image", "ID", "Health"], tablefmt="fancy_grid")
     return containers, table
 
@@ -126,41 +135,46 @@ def list_all_containers():
 # ================================
 # ⚙️ Lifecycle Management
 # ================================
+@instrument()
+@invalidates
 def manage_container(action, name=None):
     """
     Perform start/stop/restart/pause/resume/remove actions.
     If no name provided, list containers for user selection.
     """
     try:
-        containers, table = list_all_containers()
-
         if not name:
+            containers, table = list_all_containers()
             return (
                 f"🧩 Available containers:\n\n{table}\n\n"
                 "👉 Please specify the container name or choose one of:\n"
                 "`start all stopped`, `stop all running`, `restart all`, `remove all stopped`."
             )
 
-        # Bulk actions
-        if name.lower() == "all stopped" and action == "start":
-            stopped = [c for c in containers if c.status != "running"]
-            for c in stopped:
-                c.start()
-            return f"🚀 Started {len(stopped)} stopped containers."
-
-        if name.lower() == "all running" and action == "stop":
-            running = [c for c in containers if c.status == "running"]
-            for c in running:
-                c.stop()
-            return f"🛑 Stopped {len(running)} running containers."
-
-        if name.lower() == "all" and action in ["restart", "pause", "unpause", "remove"]:
-            for c in containers:
-                getattr(c, action)()
-            return f"🔁 {action.capitalize()}ed all containers."
+        # Bulk actions and compose projects run in dependency order, in parallel per level
+        action = "remove" if action == "delete" else action
+        bulk = {"all stopped": ("start", "remove"), "all running": ("stop",), "all": ("restart", "pause", "unpause", "remove")}
+        if action in bulk.get(name.lower(), ()):
+            client = require_client()
+            graph = compose_projects.build_graph(client.api.containers(all=True))
+            if action == "remove":
+                # Bulk remove only ever removes stopped containers, never forced
+                stopped = [i for i, node in graph.items() if node["state"] in ("exited", "created", "dead")]
+                result = compose_projects.run_levels(client, graph, stopped, "remove")
+            else:
+                result = compose_projects.ordered_action(client, graph, list(graph), action)
+            failures = len(result["errors"]) + len(result["skipped"])
+            suffix = f" ({failures} failed or skipped)" if failures else ""
+            if action == "start":
+                return f"🚀 Started {len(result['done'])} stopped containers.{suffix}"
+            if action == "stop":
+                return f"🛑 Stopped {len(result['done'])} running containers.{suffix}"
+            if action == "remove":
+                return f"🗑 Removed {len(result['done'])} stopped containers; running ones were kept.{suffix}"
+            return f"🔁 {action.capitalize()}ed all containers.{suffix}"
 
         # Single container action
-        c = client.containers.get(name)
+        c = require_client().containers.get(name)
         if action == "start":
             c.start()
         elif action == "stop":
@@ -179,91 +193,47 @@ def manage_container(action, name=None):
         return f"✅ Successfully {action}ed '{name}'."
 
     except docker.errors.NotFound:
+        # Projects are only acted on through "<action> project <name>" (which asks to confirm)
+        if name in _project_names():
+            return (f"❌ No container found with name '{name}', but there is a compose project `{name}` — "
+                    f"say `{action} project {name}` to {action} all of its containers.")
         return f"❌ No container found with name '{name}'."
     except Exception as e:
         return f"⚠️ Error managing container: {str(e)}"
 
 
+def _project_names():
+    try:
+        return compose_projects.projects(compose_projects.build_graph(require_client().api.containers(all=True)))
+    except Exception:
+        return {}
+
+
 # ================================
 # 🚀 Container Creation
 # ================================
-def create_new_container(image=None, name=None, port=None):
-    """Create a new container from a public image."""
+@instrument()
+@invalidates
+def create_new_container(image=None, name=None, port=None, replicas=1):
+    """Create a new container (or `replicas` of them) from a public image."""
     try:
         if not image or not name:
-            return (
-                "🧩 To create a new container, specify:\n"
-                "`create container <name> from <image> [on port <port>]`\n\n"
-            "🧩To create a new container, you can use several methods. Here are the options with examples and explanations:\n\n"
-
-            "**1️⃣ Using an existing image (`docker run`)**\n"
-            "`create container myweb from nginx on port 8080`\n"
-            "_Example with port: `docker run -d -p 8080:80 nginx`_\n"
-            "_Example without port: `docker run -d nginx`_\n"
-            "⚠️ Without port mapping, the container runs internally and cannot be accessed from your host. Useful for internal tasks only.\n\n"
-
-            "**2️⃣ Using `docker create` / `docker container create` (create without starting)**\n"
-            "`create container myweb from nginx`\n"
-            "_Example: `docker create --name myweb -p 8080:80 nginx && docker start myweb`_\n"
-            "_Using explicit container command: `docker container create --name myweb -p 8080:80 nginx && docker start myweb`_\n"
-            "✅ Allows creating a container first and starting it later. Useful for pre-configured setups.\n\n"
-
-            "**3️⃣ From a custom Dockerfile**\n"
-            "`build image mypythonapp from Dockerfile and create container myapp`\n"
-            "_Dockerfile Example:_\n"
-            "```\nFROM python:3.12\nWORKDIR /app\nCOPY . .\nRUN pip install -r requirements.txt\nCMD [\"python\", \"app.py\"]\n```\n"
-            "_Build & run: `docker build -t mypythonapp:1.0 . && docker run -d mypythonapp:1.0`_\n"
-            "✅ Great for custom applications; ensures consistent environment.\n\n"
-
-            "**4️⃣ Using Docker Compose**\n"
-            "`create container stack myapp`\n"
-            "_docker-compose.yml Example:_\n"
-            "```\nversion: '3.9'\nservices:\n  web:\n    image: nginx\n    ports:\n      - \"8080:80\"\n  db:\n    image: postgres\n    environment:\n      POSTGRES_PASSWORD: example\n```\n"
-            "_Run: `docker compose up -d`_\n"
-            "✅ Manages multi-container applications easily.\n\n"
-
-            "**5️⃣ Using Kubernetes (for clusters)**\n"
-            "`create container pod myapp`\n"
-            "_pod.yaml Example:_\n"
-            "```\napiVersion: v1\nkind: Pod\nmetadata:\n  name: myapp\nspec:\n  containers:\n  - name: web\n    image: nginx\n```\n"
-            "_Run: `kubectl apply -f pod.yaml`_\n"
-            "✅ Ideal for scalable applications on a cluster.\n\n"
-
-            "**6️⃣ Import from tarball**\n"
-            "`create container myapp from tarball myapp.tar`\n"
-            "_Example: `docker import myapp.tar myappimage && docker run -it myappimage bash`_\n"
-            "✅ Useful to restore or migrate containers from backups.\n\n"
-
-            "**7️⃣ Using `docker commit` (create image from container)**\n"
-            "`create image mycustomimage from running container myapp`\n"
-            "_Example: `docker commit myapp mycustomimage && docker run -d --name newapp mycustomimage`_\n"
-            "✅ Saves the current state of a container as a reusable image.\n\n"
-
-            "**8️⃣ Save and load images (`docker save` / `docker load`)**\n"
-            "`save/load image for transport or backup`\n"
-            "_Example: `docker save myimage -o myimage.tar && docker load -i myimage.tar && docker run -d --name myapp myimage`_\n"
-            "✅ Useful to move images between hosts without a registry.\n\n"
-
-            "**9️⃣ Pull from remote/private registries**\n"
-            "`create container from remote image`\n"
-            "_Example: `docker run -d --name myapp myrepo/myimage:latest`_\n"
-            "✅ Ensures you can use images stored in private or remote registries.\n\n"
-
-            "**⚠️ Notes on running without port mapping**\n"
-            "- `docker run -d alpine` will start the container but you cannot access services from the host.\n"
-            "- Suitable for background tasks or isolated jobs.\n"
-            "- For web apps or APIs, always use `-p hostPort:containerPort`.\n\n"
-
-                + show_popular_images()
-            )
+            return knowledge_base.get_markdown("create_container_help")
 
-        existing = client.containers.list(all=True, filters={"name": name})
-        if existing:
-            return f"⚠️ A container named '{name}' already exists."
-
-        ports = {f"{port}/tcp": port} if port else {}
-        client.containers.run(image, name=name, detach=True, ports=ports)
-        return f"🚀 New container '{name}' started from image '{image}' on port {port or 'default'}."
+        # "pull": a missing image is pulled once, as `docker run` (and the old containers.run) did
+        spec = {"image": image, "name": name, "replicas": replicas, "pull": True,
+                "ports": [f"{port}:{port}" if replicas == 1 else f"auto:{port}"] if port else []}
+        # Name conflicts, image resolution and port allocation happen once, before anything is created
+        try:
+            result = container_specs.create_batch(spec)
+        except ValueError as e:
+            return f"⚠️ {e}"
+
+        if replicas == 1 and result["created"]:
+            return f"🚀 New container '{name}' started from image '{image}' on port {port or 'default'}."
+        if replicas == 1:
+            return f"❌ Failed to create container: {result['errors'].get(name, 'unknown error')}"
+        return container_specs.render_batch(result, spec)
     except Exception as e:
         return f"❌ Failed to create container: {str(e)}"
 
@@ -284,14 +254,7 @@ reference_images = {
 
 def show_popular_images():
     """Display commonly used public Docker images."""
-    return (
-        "🧱 **Popular Public Docker Images** from [Docker Hub](https://hub.docker.com/):\n\n"
-        "**🐍 Python:** `python:3.12-alpine`, `python:3.10-slim`\n"
-        "**🗄 Databases:** `mysql:8.0`, `postgres:15`, `mongo:7`\n"
-        "**🌐 Web Servers:** `nginx:latest`, `httpd:latest`\n"
-        "**⚙️ Utilities:** `alpine`, `ubuntu:22.04`\n\n"
-        "👉 Visit https://hub.docker.com/ to explore more."
-    )
+    return knowledge_base.get_markdown("popular_images")
 
 
 # ================================
@@ -309,7 +272,7 @@ def analyze_port_conflict(port):
         return f"Port {port} might be in use, but could not detect the process automatically."
 
 def restart_stopped_containers():
-    containers = client.containers.list(all=True)
+    containers = require_client().containers.list(all=True)
     restarted_names = []
     troubleshooting_info = {}
 
@@ -332,18 +295,23 @@ def restart_stopped_containers():
                 troubleshooting_info[c.name] = str(e)
     return restarted_names, troubleshooting_info
 
+@instrument()
+@traced("logs.fetch")
 def get_container_logs(container_name, tail=20):
     """Fetch the last few lines of logs for a given container."""
     try:
-        container = client.containers.get(container_name)
+        container = require_client().containers.get(container_name)
         logs = container.logs(tail=tail).decode("utf-8", errors="ignore")
         return logs if logs else f"No logs found for container '{container_name}'."
     except Exception as e:
         return f"Could not fetch logs for {container_name}: {str(e)}"
 
-def show_stopped_containers():
+@instrument()
+@traced()
+@coalesced()
+def show_stopped_containers(client=None):
     try:
-        stopped = client.containers.list(all=True, filters={"status": "exited"})
+        stopped = (client or require_client()).containers.list(all=True, filters={"status": "exited"})
         if not stopped:
             return "✅ No stopped containers found."
         
@@ -358,9 +326,11 @@ def show_stopped_containers():
     except Exception as e:
         return f"⚠️ Error fetching stopped containers: {e}"
 
+@instrument()
+@invalidates
 def smart_start_container(container_name):
     try:
-        container = client.containers.get(container_name)
+        container = require_client().containers.get(container_name)
         state = container.attrs["State"]
 
         if state.get("Paused"):
@@ -378,9 +348,12 @@ def smart_start_container(container_name):
     except Exception as e:
         return f"⚠️ Unexpected error: {e}"
     
-def restart_stopped_containers():
+@instrument()
+@invalidates
+def restart_stopped_containers(client=None, on_progress=None):
     """
     Restarts all containers in 'exited' state.
+    on_progress(done, total, name) is called after each container.
     Returns:
         restarted (list): names of containers successfully restarted
         troubleshooting (dict): container_name -> error message if any
@@ -389,14 +362,12 @@ def restart_stopped_containers():
     troubleshooting = {}
 
     try:
-        stopped_containers = client.containers.list(all=True, filters={"status": "exited"})
-        for c in stopped_containers:
-            try:
-                c.start()
-                restarted.append(c.name)
-            except Exception as e:
-                troubleshooting[c.name] = str(e)
-
+        # Compose dependencies start first; independent containers start in parallel
+        client = client or require_client()
+        graph = compose_projects.build_graph(client.api.containers(all=True, filters={"status": "exited"}))
+        result = compose_projects.run_levels(client, graph, list(graph), "start", on_progress)
+        restarted = result["done"]
+        troubleshooting = dict(result["errors"], **result["skipped"])
     except Exception as e:
         # Global error
         troubleshooting["__global__"] = str(e)
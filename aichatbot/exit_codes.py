@@ -3,6 +3,10 @@
 # Author: Rajani Sharma
 # ===============================================
 
+import re
+
+import knowledge_base
+
 exit_code_details = {
     0: {
         "title": "Purposely Stopped",
@@ -175,44 +179,233 @@ exit_code_details = {
 }
 
 
-def explain_exit_code(code: int) -> str:
+# ===============================================
+# 📡 Linux Signal Table (exit code 128 + N)
+# ===============================================
+SIGNALS = {
+    1: ("SIGHUP", "Hangup — controlling terminal closed or a reload was requested"),
+    2: ("SIGINT", "Interrupt — Ctrl+C or an interactive stop"),
+    3: ("SIGQUIT", "Quit — user requested a core dump"),
+    4: ("SIGILL", "Illegal instruction — binary built for another CPU or corrupted"),
+    5: ("SIGTRAP", "Trace/breakpoint trap — debugger or assertion trap"),
+    6: ("SIGABRT", "Abort — assert failure or abort() called"),
+    7: ("SIGBUS", "Bus error — bad memory access, often a truncated mmap'd file"),
+    8: ("SIGFPE", "Floating-point exception — e.g. integer division by zero"),
+    9: ("SIGKILL", "Killed — OOM killer, `docker kill`, or stop timeout expired"),
+    10: ("SIGUSR1", "User-defined signal 1 not handled by the application"),
+    11: ("SIGSEGV", "Segmentation fault — invalid memory access"),
+    12: ("SIGUSR2", "User-defined signal 2 not handled by the application"),
+    13: ("SIGPIPE", "Broken pipe — wrote to a closed pipe or socket"),
+    14: ("SIGALRM", "Alarm clock — timer expired"),
+    15: ("SIGTERM", "Terminated — graceful stop via `docker stop` or an orchestrator"),
+    16: ("SIGSTKFLT", "Stack fault on coprocessor"),
+    17: ("SIGCHLD", "Child status changed"),
+    18: ("SIGCONT", "Continue a stopped process"),
+    19: ("SIGSTOP", "Stopped (cannot be caught)"),
+    20: ("SIGTSTP", "Terminal stop — Ctrl+Z"),
+    21: ("SIGTTIN", "Background read from terminal"),
+    22: ("SIGTTOU", "Background write to terminal"),
+    23: ("SIGURG", "Urgent condition on socket"),
+    24: ("SIGXCPU", "CPU time limit exceeded (ulimit -t)"),
+    25: ("SIGXFSZ", "File size limit exceeded (ulimit -f)"),
+    26: ("SIGVTALRM", "Virtual timer expired"),
+    27: ("SIGPROF", "Profiling timer expired"),
+    28: ("SIGWINCH", "Window resize"),
+    29: ("SIGIO", "I/O now possible"),
+    30: ("SIGPWR", "Power failure"),
+    31: ("SIGSYS", "Bad system call — often blocked by a seccomp profile"),
+}
+for _n in range(34, 65):
+    _name = "SIGRTMIN" if _n == 34 else "SIGRTMAX" if _n == 64 else f"SIGRTMIN+{_n - 34}" if _n < 50 else f"SIGRTMAX-{64 - _n}"
+    SIGNALS[_n] = (_name, "Real-time signal — sent by the application or its supervisor")
+
+SIGNAL_NUMBERS = {name: number for number, (name, _) in SIGNALS.items()}
+MAX_SIGNAL = 64  # SIGRTMAX: codes 129–192 are signals, 193–254 are the application's own
+
+# Non-signal codes with a fixed meaning: code -> (category, title, one-line summary)
+STANDARD_CODES = {
+    0: ("success", "Normal exit", "container completed successfully with no errors."),
+    1: ("application", "Generic error", "typically an application crash, missing file, or misconfiguration."),
+    2: ("shell", "Incorrect usage or missing arguments", "check your command or entrypoint script."),
+    125: ("docker", "Container failed to run", "Docker itself could not run the container (not the app inside)."),
+    126: ("shell", "Permission problem", "the entrypoint or command isn’t executable."),
+    127: ("shell", "Command not found", "likely missing binary or wrong ENTRYPOINT/CMD in Dockerfile."),
+    128: ("shell", "Invalid exit argument", "usually due to a script exiting incorrectly."),
+    255: ("out_of_range", "Exit status out of range", "application exited with exit(-1) or an unknown error code."),
+}
+
+CATEGORY_ICONS = {
+    "success": "✅",
+    "application": "⚠️",
+    "shell": "🧩",
+    "docker": "🐳",
+    "signal": "📡",
+    "out_of_range": "🚨",
+}
+SIGNAL_ICONS = {"SIGKILL": "💀", "SIGSEGV": "🐛", "SIGTERM": "🧯", "SIGINT": "🧨", "SIGABRT": "💥", "SIGHUP": "🛑"}
+
+# App-specific codes plugged in with register_exit_code(); they win over the defaults
+_app_registry = {}
+
+
+def _decode_uncached(code):
+    entry = {
+        "code": code,
+        "signal": None,
+        "signal_number": None,
+        "actions": [],
+        "commands": [],
+    }
+    if code in STANDARD_CODES:
+        category, title, summary = STANDARD_CODES[code]
+    elif 128 < code <= 128 + MAX_SIGNAL and (code - 128) in SIGNALS:
+        number = code - 128
+        name, meaning = SIGNALS[number]
+        category, title, summary = "signal", f"Terminated by {name}", f"signal {number}: {meaning}."
+        entry.update(signal=name, signal_number=number)
+    elif 128 < code <= 128 + MAX_SIGNAL:
+        category, title, summary = "signal", f"Terminated by signal {code - 128}", f"unassigned signal {code - 128}."
+        entry["signal_number"] = code - 128
+    else:
+        category, title = "application", "Application-specific error"
+        summary = f"exit code {code} is defined by the application; check its documentation and logs."
+
+    details = exit_code_details.get(code)
+    if details:
+        title = details["title"]
+        entry.update(description=details["description"], actions=list(details["actions"]), commands=list(details["commands"]))
+    else:
+        entry["description"] = f"Exit Code {code} — {title}: {summary}"
+
+    registered = _app_registry.get(code)
+    if registered:
+        title = registered["title"]
+        summary = registered["description"]
+        entry.update({k: v for k, v in registered.items() if k != "title"})
+
+    entry.update(category=category, title=title, summary=summary)
+    return entry
+
+
+def _build_decode_table():
+    return [_decode_uncached(code) for code in range(256)]
+
+
+_DECODE_TABLE = _build_decode_table()
+
+
+def register_exit_code(code, title, description, actions=(), commands=()):
+    """Plug in an app-specific meaning for an exit code (overrides the default entry)."""
+    if not 0 <= code <= 255:
+        raise ValueError(f"Exit codes range from 0 to 255, got {code}")
+    _app_registry[code] = {
+        "title": title,
+        "description": description,
+        "actions": list(actions),
+        "commands": list(commands),
+    }
+    _DECODE_TABLE[code] = _decode_uncached(code)
+    knowledge_base.reload()
+
+
+def decode_exit_code(code):
+    """O(1) lookup of everything known about an exit code; None outside 0–255."""
+    if isinstance(code, int) and 0 <= code <= 255:
+        return _DECODE_TABLE[code]
+    return None
+
+
+def summarize_exit_code(code) -> str:
+    """One-line markdown meaning, shared by the troubleshooting report."""
+    info = decode_exit_code(code)
+    if info is None:
+        return f"❔ Unknown exit code `{code}` — check container logs and entrypoint script."
+    icon = SIGNAL_ICONS.get(info["signal"]) or CATEGORY_ICONS[info["category"]]
+    return f"{icon} **{info['title']}** — {info['summary']}"
+
+
+# ===============================================
+# 🔎 Exit Code Parser
+# ===============================================
+_EXIT_CODE_PATTERNS = [
+    re.compile(r"\bexited\s*\((\d{1,3})\)", re.I),                                    # docker ps: "Exited (137) 3 minutes ago"
+    re.compile(r"\bexit(?:ed)?\s+(?:with\s+)?(?:code|status)\s*[:=]?\s*(\d{1,3})\b", re.I),  # "exit code 1", "exited with code 137"
+    re.compile(r"\b(?:exitcode|exit_code)\s*[:=]?\s*(\d{1,3})\b", re.I),              # "ExitCode: 0"
+    re.compile(r"\bcode\s+(\d{1,3})\b", re.I),                                          # "code 143"
+]
+_SIGNAL_NAME_PATTERN = re.compile(r"\b(SIG[A-Z0-9]+)\b", re.I)
+
+
+def parse_exit_codes(text):
     """
-    Returns detailed explanation, actions, and troubleshooting commands
-    for a given Docker container exit code.
+    Pull exit codes out of free text and Docker status strings, in order of appearance.
+    Signal names (e.g. "SIGKILL") map to 128 + N.
     """
-    details = exit_code_details.get(code)
-    if not details:
+    found = []
+    for pattern in _EXIT_CODE_PATTERNS:
+        found.extend((m.start(), int(m.group(1))) for m in pattern.finditer(text))
+    for m in _SIGNAL_NAME_PATTERN.finditer(text):
+        number = SIGNAL_NUMBERS.get(m.group(1).upper())
+        if number:
+            found.append((m.start(), 128 + number))
+
+    codes = []
+    for _, code in sorted(found):
+        if 0 <= code <= 255 and code not in codes:
+            codes.append(code)
+    if not codes:
+        # Fall back to any bare number in range ("what does 137 mean")
+        codes = [int(n) for n in re.findall(r"\b(\d{1,3})\b", text) if int(n) <= 255][:1]
+    return codes
+
+
+def render_exit_code(code: int) -> str:
+    """
+    Builds the markdown answer for an exit code. Used by knowledge_base to
+    pre-render every code once at startup.
+    """
+    info = decode_exit_code(code)
+    if not info:
         return (
             f"Exit Code {code} is not recognized.\n\n"
             "Typical patterns:\n"
-            "- 0–128 → Application-related errors\n"
-            "- 129–255 → OS or signal-based termination (e.g., SIGKILL, SIGTERM)\n\n"
+            "- 0–128 and 193–254 → Application-related errors\n"
+            "- 129–192 → OS or signal-based termination (e.g., SIGKILL, SIGTERM)\n\n"
             "🧩 Use: docker ps -a --no-trunc | grep Exited"
         )
 
-    response = f"### Exit Code {code}: {details['title']}\n\n"
-    response += f"**🧩 Description:** {details['description']}\n\n"
-    response += "#### 🧭 Recommended Actions:\n"
-    for step in details["actions"]:
-        response += f"- {step}\n"
-    response += "\n#### 💻 Troubleshooting Commands:\n"
-    for cmd in details["commands"]:
-        response += f"`{cmd}`\n\n"
-    return response
+    parts = [
+        f"### Exit Code {code}: {info['title']}\n\n",
+        f"**🧩 Description:** {info['description']}\n\n",
+    ]
+    if info["signal_number"]:
+        signal_name = info["signal"] or "unassigned"
+        parts.append(f"**📡 Signal:** `{signal_name}` ({info['signal_number']}) — 128 + {info['signal_number']} = {code}\n\n")
+    if info["actions"]:
+        parts.append("#### 🧭 Recommended Actions:\n")
+        parts.extend(f"- {step}\n" for step in info["actions"])
+    if info["commands"]:
+        parts.append("\n#### 💻 Troubleshooting Commands:\n")
+        parts.extend(f"`{cmd}`\n\n" for cmd in info["commands"])
+    if not info["actions"] and not info["commands"]:
+        parts.append("🧩 Use: `docker logs <container_name> | tail -30` and `docker inspect <container_name> --format '{{.State}}'`\n")
+    return "".join(parts)
 
-def handle_exit_code_query(q_lower: str) -> str:
+
+def explain_exit_code(code: int) -> str:
     """
-    Extracts an exit code number from the user query and explains it.
+    Returns detailed explanation, actions, and troubleshooting commands
+    for a given Docker container exit code.
     """
-    parts = q_lower.split()
-    code = None
-
-    for p in parts:
-        if p.isdigit():
-            code = int(p)
-            break
+    document = knowledge_base.get_document(f"exit_code/{code}")
+    return document.markdown if document else render_exit_code(code)
 
-    if code is not None:
-        return explain_exit_code(code)
+def handle_exit_code_query(q_lower: str) -> str:
+    """
+    Extracts exit codes from the user query (free text or `docker ps` status) and explains them.
+    """
+    codes = parse_exit_codes(q_lower)
+    if codes:
+        return "\n---\n\n".join(explain_exit_code(code) for code in codes)
     else:
-        return "⚠️ Please provide a valid exit code number, e.g., 'exit code 137'."
\ No newline at end of file
+        return "⚠️ Please provide a valid exit code number, e.g., 'exit code 137'."
@@ -0,0 +1,739 @@
+import hashlib
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# ================================
+# 🧪 Fake Docker Engine API Daemon
+# ================================
+# A small stand-in for dockerd that listens on a unix socket and serves a
+# simulated fleet (containers, images, volumes), so benchmarks run
+# reproducibly without a real daemon:
+#
+#   daemon = FakeDockerDaemon(containers=make_containers(50, status="exited"))
+#   daemon.start()
+#   client = docker.DockerClient(base_url=daemon.base_url)
+#
+# Images referenced by containers are created automatically; pass `images=`
+# / `volumes=` (see make_images / make_volumes) for extra ones.
+
+DEFAULT_LATENCIES = {
+    "list": 0.0,
+    "inspect": 0.0,
+    "logs": 0.0,
+    "stats": 0.0,
+    "action": 0.0,
+    "images": 0.0,
+    "volumes": 0.0,
+    "pull": 0.0,  # per downloaded layer chunk
+    "df": 0.0,
+    "create": 0.0,
+    "networks": 0.0,
+}
+
+# Sample failure scenarios: (exit code, OOMKilled, log lines)
+SCENARIOS = [
+    (137, True, ["allocating buffers", "java.lang.OutOfMemoryError: Java heap space"]),
+    (1, False, ["Starting server", "Error: listen EADDRINUSE: address already in use 0.0.0.0:8080"]),
+    (127, False, ["/docker-entrypoint.sh: exec: gunicorn: not found"]),
+    (1, False, ["Connecting to db", "could not translate host name \"db\": Temporary failure in name resolution"]),
+    (0, False, ["job finished", "exiting"]),
+    (1, False, ["Traceback (most recent call last):", "KeyError: 'DATABASE_URL'"]),
+]
+
+
+def make_containers(count, status="exited", image="nginx:latest", volumes=None, start=0, health=None):
+    """
+    Build `count` simulated containers cycling through the failure SCENARIOS.
+    `image` may be a list to cycle through; `volumes` names are mounted round-robin;
+    `health` (a status or list of statuses) gives the containers a health check.
+    """
+    images = image if isinstance(image, (list, tuple)) else [image]
+    healths = health if isinstance(health, (list, tuple)) else [health]
+    containers = []
+    for i in range(start, start + count):
+        exit_code, oom, logs = SCENARIOS[i % len(SCENARIOS)] if status == "exited" else (0, False, ["ready"])
+        mounts = [{"Type": "volume", "Name": volumes[i % len(volumes)], "Destination": "/data"}] if volumes else []
+        containers.append({
+            "Id": f"{i:064x}",
+            "Name": f"app-{i}",
+            "Image": images[i % len(images)],
+            "Status": status,
+            "ExitCode": exit_code,
+            "OOMKilled": oom,
+            "RestartCount": 0,
+            "Labels": {},
+            "Logs": [f"line {n}: {line}" for n, line in enumerate(logs)],
+            "Mounts": mounts,
+            "Health": _health(healths[i % len(healths)]),
+        })
+    return containers
+
+
+def make_compose_project(project, services, replicas=1, status="exited", start=0):
+    """
+    Containers of a compose project: `services` maps service -> depends_on
+    services (e.g. {"db": [], "api": ["db"], "web": ["api"]}). A container
+    started while a dependency is not running exits with code 1, like an app
+    that cannot reach its database.
+    """
+    containers = []
+    for service, deps in services.items():
+        for n in range(1, replicas + 1):
+            i = start + len(containers)
+            containers.append({
+                "Id": f"{i:064x}",
+                "Name": f"{project}-{service}-{n}",
+                "Image": f"{project}-{service}:latest",
+                "Status": status,
+                "ExitCode": 0,
+                "OOMKilled": False,
+                "RestartCount": 0,
+                "Labels": {
+                    "com.docker.compose.project": project,
+                    "com.docker.compose.service": service,
+                    "com.docker.compose.container-number": str(n),
+                    "com.docker.compose.depends_on": ",".join(f"{d}:service_started:false" for d in deps),
+                },
+                "Logs": ["ready"],
+                "Mounts": [],
+                "Health": None,
+            })
+    return containers
+
+
+def _health(status):
+    if status is None:
+        return None
+    output = "OK" if status == "healthy" else "curl: (7) Failed to connect to localhost port 80"
+    return {
+        "Status": status,
+        "FailingStreak": 0 if status == "healthy" else 3,
+        "Log": [{"Start": "2025-11-11T12:00:00Z", "End": "2025-11-11T12:00:01Z",
+                 "ExitCode": 0 if status == "healthy" else 1, "Output": output}],
+    }
+
+
+def _image_id(tag):
+    return "sha256:" + hashlib.sha256(tag.encode()).hexdigest()
+
+
+def make_images(tags, size=50 * 1024 * 1024):
+    """Build simulated images, one per tag."""
+    return [{
+        "Id": _image_id(tag),
+        "RepoTags": [tag],
+        "RepoDigests": [tag.rsplit(":", 1)[0] + "@" + _image_id(tag + "@registry")],
+        "ParentId": "",
+        "Created": 1700000000,
+        "Size": size,
+        "Labels": {},
+    } for tag in tags]
+
+
+def make_layered_images(count, bases=10, layer_size=10 * 1024 * 1024):
+    """
+    `bases` base images plus app images on top of them, each adding one own layer.
+    Even-numbered apps were built locally (ParentId set), odd ones pulled (layers shared, no ParentId).
+    Tags cycle through a few versions; every 5th app is untagged (dangling).
+    """
+    images = []
+    for b in range(bases):
+        layers = [(f"base{b}-{n}", layer_size * 4) for n in range(2)]
+        images.append({"Id": _image_id(f"base-{b}"), "RepoTags": [f"base-{b}:latest"], "RepoDigests": [],
+                       "ParentId": "", "Created": 1700000000 + b, "Labels": {}, "Layers": layers,
+                       "Size": sum(size for _, size in layers)})
+    for i in range(count):
+        base = images[i % bases]
+        layers = base["Layers"] + [(f"app{i}", layer_size * (1 + i % 5))]
+        images.append({"Id": _image_id(f"app-{i}"),
+                       "RepoTags": [] if i % 5 == 4 else [f"team/app-{i // 3}:v{i % 3}"], "RepoDigests": [],
+                       "ParentId": base["Id"] if i % 2 == 0 else "", "Created": 1700001000 + i, "Labels": {},
+                       "Layers": layers, "Size": sum(size for _, size in layers)})
+    return images
+
+
+def make_build_cache(count, size=50 * 1024 * 1024):
+    return [{"ID": f"cache{i:08x}", "Type": "regular", "Size": size * (1 + i % 3), "InUse": i % 4 == 0,
+             "Shared": i % 4 == 1, "LastUsedAt": "2025-11-01T00:00:00Z", "UsageCount": 1} for i in range(count)]
+
+
+def make_volumes(count, prefix="data", size=0):
+    """Build `count` simulated local volumes (`size` bytes of data each)."""
+    return [{
+        "Name": f"{prefix}-{i}",
+        "Size": size,
+        "Driver": "local",
+        "Mountpoint": f"/var/lib/docker/volumes/{prefix}-{i}/_data",
+        "Labels": {},
+        "Scope": "local",
+    } for i in range(count)]
+
+
+def make_registry(tags, layers=3, layer_size=20 * 1024 * 1024):
+    """
+    Simulated registry content for image pulls: tag -> {"digest", "layers": [(id, size)]}.
+    Every image shares its first (base) layer, like images built FROM the same base.
+    """
+    registry = {}
+    for tag in tags:
+        own = [hashlib.sha256(f"{tag}/{n}".encode()).hexdigest()[:12] for n in range(1, layers)]
+        registry[tag] = {
+            "digest": _image_id(tag + "@registry"),
+            "layers": [(hashlib.sha256(b"base").hexdigest()[:12], layer_size)] + [(layer, layer_size) for layer in own],
+        }
+    return registry
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+    on_connect = None
+
+    def process_request(self, request, client_address):
+        if self.on_connect:
+            self.on_connect()
+        super().process_request(request, client_address)
+
+
+class FakeDockerDaemon:
+    """Serve a simulated Docker Engine API on a unix socket."""
+
+    def __init__(self, containers=None, latencies=None, socket_path=None, images=None, volumes=None, registry=None,
+                 build_cache=None):
+        self.containers = {c["Id"]: c for c in (containers or [])}
+        self.registry = dict(registry or {})  # tag -> make_registry() entry, served by POST /images/create
+        self.layers = set()                   # layer ids already downloaded
+        self.build_cache = list(build_cache or [])
+        self.networks = {n: {"Name": n, "Id": hashlib.sha256(n.encode()).hexdigest(), "Driver": "bridge", "Labels": {}}
+                         for n in ("bridge", "host", "none")}
+        self.downloading = {}                 # layer id -> Event, while one pull downloads it
+        self.layer_downloads = 0
+        self.active_pulls = 0
+        self.max_active_pulls = 0
+        self.images = {i["Id"]: i for i in (images or [])}
+        self.volumes = {v["Name"]: v for v in (volumes or [])}
+        known_tags = {tag for i in self.images.values() for tag in i["RepoTags"]}
+        for image in make_images(sorted({c["Image"] for c in self.containers.values()} - known_tags)):
+            self.images[image["Id"]] = image
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.socket_path = socket_path or os.path.join(tempfile.mkdtemp(prefix="fake-docker-"), "docker.sock")
+        self.request_counts = {}
+        self.connections = 0  # sockets accepted, to check connection reuse
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"unix://{self.socket_path}"
+
+    def start(self):
+        daemon = self
+
+        class Handler(_EngineAPIHandler):
+            fake = daemon
+
+        self._server = _UnixHTTPServer(self.socket_path, Handler)
+        self._server.on_connect = self._count_connection
+        threading.Thread(target=self._server.serve_forever, name="fake-dockerd", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def pull_started(self):
+        with self._lock:
+            self.active_pulls += 1
+            self.max_active_pulls = max(self.max_active_pulls, self.active_pulls)
+
+    def pull_finished(self):
+        with self._lock:
+            self.active_pulls -= 1
+
+    def count(self, kind):
+        with self._lock:
+            self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    def find(self, ref):
+        ref = ref.lstrip("/")
+        for c in self.containers.values():
+            if c["Id"].startswith(ref) or c["Name"] == ref:
+                return c
+        return None
+
+    def dependencies_running(self, c):
+        """Whether every container of the compose services `c` depends on is running."""
+        labels = c["Labels"]
+        deps = {d.split(":")[0] for d in (labels.get("com.docker.compose.depends_on") or "").split(",") if d}
+        if not deps:
+            return True
+        project = labels.get("com.docker.compose.project")
+        return all(other["Status"] == "running" for other in self.containers.values()
+                   if other["Labels"].get("com.docker.compose.project") == project
+                   and other["Labels"].get("com.docker.compose.service") in deps)
+
+    def find_image(self, ref):
+        bare = ref[len("sha256:"):] if ref.startswith("sha256:") else ref
+        tag = ref if ":" in ref.rsplit("/", 1)[-1] else f"{ref}:latest"
+        for image in self.images.values():
+            if image["Id"][len("sha256:"):].startswith(bare) or tag in image["RepoTags"]:
+                return image
+        return None
+
+    def image_id_for(self, container):
+        image = self.find_image(container["Image"])
+        return image["Id"] if image else _image_id(container["Image"])
+
+
+class _EngineAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None  # set per daemon
+
+    def log_message(self, *args):
+        pass
+
+    # --- helpers ---
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_raw(self, body, content_type="application/vnd.docker.raw-stream", status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self, what, kind="container"):
+        self._send_json({"message": f"No such {kind}: {what}"}, status=404)
+
+    def _start_stream(self, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _send_chunk(self, payload):
+        body = json.dumps(payload).encode() + b"\r\n"
+        self.wfile.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _no_content(self):
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _simulate(self, kind):
+        self.fake.count(kind)
+        delay = self.fake.latencies.get(kind, 0)
+        if delay:
+            time.sleep(delay)
+
+    # --- routing ---
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = re.sub(r"^/v[\d.]+", "", url.path)
+        query = parse_qs(url.query)
+
+        if path == "/_ping":
+            return self._send_raw(b"OK", content_type="text/plain")
+        if path == "/version":
+            return self._send_json({"ApiVersion": "1.43", "Version": "24.0.0-fake", "MinAPIVersion": "1.12"})
+        if path == "/containers/json":
+            self._simulate("list")
+            return self._send_json(self._list_containers(query))
+
+        if path == "/networks":
+            self._simulate("networks")
+            return self._send_json(list(self.fake.networks.values()))
+        if path == "/system/df":
+            self._simulate("df")
+            return self._send_json(self._system_df())
+        if path == "/images/json":
+            self._simulate("images")
+            return self._send_json([dict({k: v for k, v in i.items() if k != "Layers"}, Containers=-1, SharedSize=-1)
+                                    for i in self.fake.images.values()])
+        match = re.match(r"^/images/(.+)/json$", path)
+        if match:
+            self._simulate("images")
+            image = self.fake.find_image(match.group(1))
+            if image is None:
+                return self._not_found(match.group(1), kind="image")
+            return self._send_json(self._inspect_image(image))
+        if path == "/volumes":
+            self._simulate("volumes")
+            return self._send_json({"Volumes": list(self.fake.volumes.values()), "Warnings": None})
+        match = re.match(r"^/volumes/([^/]+)$", path)
+        if match:
+            self._simulate("volumes")
+            volume = self.fake.volumes.get(match.group(1))
+            if volume is None:
+                return self._not_found(match.group(1), kind="volume")
+            return self._send_json(volume)
+
+        match = re.match(r"^/containers/([^/]+)/(json|logs|stats)$", path)
+        if match:
+            ref, what = match.groups()
+            c = self.fake.find(ref)
+            if c is None:
+                return self._not_found(ref)
+            if what == "json":
+                self._simulate("inspect")
+                return self._send_json(self._inspect(c))
+            if what == "logs":
+                self._simulate("logs")
+                return self._send_raw(self._logs(c, query))
+            self._simulate("stats")
+            return self._send_json(self._stats(c))
+
+        self._send_json({"message": f"page not found: {path}"}, status=404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        path = re.sub(r"^/v[\d.]+", "", url.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        if path == "/images/create":
+            return self._pull(parse_qs(url.query))
+        if path == "/containers/create":
+            return self._create_container(body, parse_qs(url.query))
+        if path == "/networks/create":
+            return self._create_network(body)
+        match = re.match(r"^/containers/([^/]+)/(start|stop|restart|kill|pause|unpause)$", path)
+        if not match:
+            return self._send_json({"message": f"page not found: {path}"}, status=404)
+        c = self.fake.find(match.group(1))
+        if c is None:
+            return self._not_found(match.group(1))
+        self._simulate("action")
+        action = match.group(2)
+        if action in ("start", "restart", "unpause"):
+            c["Status"] = "running"
+            if action != "unpause" and not self.fake.dependencies_running(c):
+                c["Status"], c["ExitCode"] = "exited", 1
+        elif action in ("stop", "kill"):
+            c["Status"] = "exited"
+        elif action == "pause":
+            c["Status"] = "paused"
+        self._no_content()
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        path = re.sub(r"^/v[\d.]+", "", url.path)
+        match = re.match(r"^/(containers|images|volumes)/(.+)$", path)
+        if not match:
+            return self._send_json({"message": f"page not found: {path}"}, status=404)
+        kind, ref = match.groups()
+        if kind == "containers":
+            c = self.fake.find(ref)
+            if c is None:
+                return self._not_found(ref)
+            self._simulate("action")
+            if c["Status"] in ("running", "paused", "restarting") and parse_qs(url.query).get("force") not in (["1"], ["true"], ["True"]):
+                # Like dockerd: a running container is only removed with force
+                return self._send_json({"message": f"cannot remove container \"/{c['Name']}\": container is {c['Status']}: "
+                                                   "stop the container before removing or force remove"}, status=409)
+            del self.fake.containers[c["Id"]]
+            return self._no_content()
+        self._simulate(kind)
+        if kind == "images":
+            image = self.fake.find_image(ref)
+            if image is None:
+                return self._not_found(ref, kind="image")
+            del self.fake.images[image["Id"]]
+            return self._send_json([{"Deleted": image["Id"]}])
+        if self.fake.volumes.pop(ref, None) is None:
+            return self._not_found(ref, kind="volume")
+        self._no_content()
+
+    def _pull(self, query, chunks=4):
+        """Stream `docker pull` progress events, skipping layers that are already present."""
+        repository = query.get("fromImage", [""])[0]
+        tag = query.get("tag", ["latest"])[0] or "latest"
+        ref = f"{repository}:{tag}"
+        self.fake.count("pull")
+        entry = self.fake.registry.get(ref)
+        if entry is None:
+            return self._send_json({"message": f"manifest for {ref} not found: manifest unknown"}, status=404)
+        self.fake.pull_started()
+        try:
+            self._start_stream()
+            self._send_chunk({"status": f"Pulling from {repository}", "id": tag})
+            for layer, size in entry["layers"]:
+                # Like dockerd, a layer another pull is already downloading is waited for, not fetched twice
+                with self.fake._lock:
+                    present = layer in self.fake.layers
+                    in_flight = self.fake.downloading.get(layer)
+                    if not present and in_flight is None:
+                        self.fake.downloading[layer] = threading.Event()
+                        self.fake.layer_downloads += 1
+                if present:
+                    self._send_chunk({"status": "Already exists", "progressDetail": {}, "id": layer})
+                    continue
+                if in_flight is not None:
+                    self._send_chunk({"status": "Waiting", "progressDetail": {}, "id": layer})
+                    in_flight.wait()
+                    self._send_chunk({"status": "Pull complete", "progressDetail": {}, "id": layer})
+                    continue
+                self._send_chunk({"status": "Pulling fs layer", "progressDetail": {}, "id": layer})
+                for n in range(1, chunks + 1):
+                    time.sleep(self.fake.latencies.get("pull", 0))
+                    self._send_chunk({"status": "Downloading", "id": layer,
+                                      "progressDetail": {"current": size * n // chunks, "total": size}})
+                self._send_chunk({"status": "Download complete", "progressDetail": {}, "id": layer})
+                self._send_chunk({"status": "Pull complete", "progressDetail": {}, "id": layer})
+                with self.fake._lock:
+                    self.fake.layers.add(layer)
+                    self.fake.downloading.pop(layer).set()
+            self._send_chunk({"status": f"Digest: {entry['digest']}"})
+            self._send_chunk({"status": f"Status: Downloaded newer image for {ref}"})
+            self._end_stream()
+            if self.fake.find_image(ref) is None:
+                image = make_images([ref], size=sum(size for _, size in entry["layers"]))[0]
+                self.fake.images[image["Id"]] = image
+        finally:
+            self.fake.pull_finished()
+
+    # --- payloads ---
+    def _list_containers(self, query):
+        show_all = query.get("all", ["0"])[0] in ("1", "true", "True")
+        filters = json.loads(query.get("filters", ["{}"])[0] or "{}")
+        wanted_status = filters.get("status")
+        result = []
+        for c in self.fake.containers.values():
+            if not show_all and c["Status"] != "running":
+                continue
+            if wanted_status and c["Status"] not in wanted_status:
+                continue
+            if filters.get("name") and not any(re.search(n.lstrip("/"), c["Name"]) for n in filters["name"]):
+                continue
+            status_text = "Up 1 minute" if c["Status"] == "running" else f"Exited ({c['ExitCode']}) 1 minute ago"
+            health = c.get("Health")
+            if health and c["Status"] == "running":
+                status_text += " (health: starting)" if health["Status"] == "starting" else f" ({health['Status']})"
+            result.append({
+                "Id": c["Id"],
+                "Names": [f"/{c['Name']}"],
+                "Image": c["Image"],
+                "ImageID": self.fake.image_id_for(c),
+                "State": c["Status"],
+                "Status": status_text,
+                "Labels": c["Labels"],
+                "Ports": c.get("Ports", []),
+                "HostConfig": {"NetworkMode": (c.get("HostConfig") or {}).get("NetworkMode") or "default"},
+            })
+        return result
+
+    def _inspect(self, c):
+        state = {
+            "Status": c["Status"],
+            "Running": c["Status"] == "running",
+            "Paused": c["Status"] == "paused",
+            "OOMKilled": c["OOMKilled"],
+            "ExitCode": c["ExitCode"],
+            "Error": "",
+            "StartedAt": "2025-11-11T12:00:00.000000000Z",
+            "FinishedAt": "2025-11-11T12:05:23.000000000Z",
+        }
+        if c.get("Health"):
+            state["Health"] = c["Health"]
+        return {
+            "Id": c["Id"],
+            "Name": f"/{c['Name']}",
+            "Image": self.fake.image_id_for(c),
+            "RestartCount": c["RestartCount"],
+            "State": state,
+            "Config": {"Image": c["Image"], "Labels": c["Labels"], "Tty": False},
+            "HostConfig": {"Memory": 0},
+            "Mounts": c.get("Mounts", []),
+        }
+
+    def _create_container(self, body, query):
+        self._simulate("create")
+        name = query.get("name", [None])[0]
+        if self.fake.find_image(body.get("Image", "")) is None:
+            return self._send_json({"message": f"No such image: {body.get('Image')}"}, status=404)
+        with self.fake._lock:
+            if name and any(c["Name"] == name for c in self.fake.containers.values()):
+                return self._send_json({"message": f'Conflict. The container name "/{name}" is already in use'},
+                                       status=409)
+            container_id = hashlib.sha256(f"{name}-{len(self.fake.containers)}-{time.time()}".encode()).hexdigest()
+            bindings = (body.get("HostConfig") or {}).get("PortBindings") or {}
+            self.fake.containers[container_id] = {
+                "Id": container_id,
+                "Name": name or container_id[:12],
+                "Image": body["Image"],
+                "Status": "created",
+                "ExitCode": 0,
+                "OOMKilled": False,
+                "RestartCount": 0,
+                "Labels": body.get("Labels") or {},
+                "Logs": ["ready"],
+                "Mounts": [],
+                "Health": None,
+                "Env": body.get("Env") or [],
+                "Ports": [{"PrivatePort": int(port.split("/")[0]), "PublicPort": int(b[0]["HostPort"]),
+                           "Type": port.split("/")[-1] if "/" in port else "tcp", "IP": "0.0.0.0"}
+                          for port, b in bindings.items() if b and b[0].get("HostPort")],
+                "HostConfig": body.get("HostConfig") or {},
+            }
+        self._send_json({"Id": container_id, "Warnings": []}, status=201)
+
+    def _create_network(self, body):
+        self._simulate("networks")
+        name = body.get("Name")
+        if name in self.fake.networks:
+            return self._send_json({"message": f"network with name {name} already exists"}, status=409)
+        network_id = hashlib.sha256(name.encode()).hexdigest()
+        self.fake.networks[name] = {"Name": name, "Id": network_id, "Driver": body.get("Driver") or "bridge",
+                                    "Labels": body.get("Labels") or {}}
+        self._send_json({"Id": network_id, "Warning": ""}, status=201)
+
+    def _system_df(self):
+        """Like dockerd: SharedSize counts an image's bytes in layers that other images use too."""
+        users = {}
+        for image in self.fake.images.values():
+            for layer, _ in image.get("Layers", []):
+                users[layer] = users.get(layer, 0) + 1
+        running_images = {}
+        for c in self.fake.containers.values():
+            image_id = self.fake.image_id_for(c)
+            running_images[image_id] = running_images.get(image_id, 0) + 1
+        images = [dict(
+            {k: v for k, v in image.items() if k != "Layers"},
+            SharedSize=sum(size for layer, size in image.get("Layers", []) if users[layer] > 1),
+            Containers=running_images.get(image["Id"], 0),
+        ) for image in self.fake.images.values()]
+        volume_refs = {}
+        for c in self.fake.containers.values():
+            for m in c.get("Mounts", []):
+                volume_refs[m.get("Name")] = volume_refs.get(m.get("Name"), 0) + 1
+        volumes = [dict(v, UsageData={"Size": v.get("Size", 0), "RefCount": volume_refs.get(v["Name"], 0)})
+                   for v in self.fake.volumes.values()]
+        layer_sizes = {layer: size for image in self.fake.images.values() for layer, size in image.get("Layers", [])}
+        return {
+            "LayersSize": sum(layer_sizes.values()) or sum(i["Size"] for i in self.fake.images.values()),
+            "Images": images,
+            "Containers": [{"Id": c["Id"], "Names": [f"/{c['Name']}"], "Image": c["Image"],
+                            "ImageID": self.fake.image_id_for(c), "State": c["Status"], "SizeRw": 0}
+                           for c in self.fake.containers.values()],
+            "Volumes": volumes,
+            "BuildCache": self.fake.build_cache,
+        }
+
+    def _inspect_image(self, image):
+        return {
+            "Id": image["Id"],
+            "RepoTags": image["RepoTags"],
+            "RepoDigests": image.get("RepoDigests", []),
+            "Parent": image["ParentId"],
+            "Created": "2023-11-14T22:13:20Z",
+            "Size": image["Size"],
+            "Config": {"Labels": image["Labels"]},
+        }
+
+    def _logs(self, c, query):
+        lines = c["Logs"]
+        tail = query.get("tail", ["all"])[0]
+        if tail != "all":
+            lines = lines[-int(tail):] if int(tail) else []
+        body = b""
+        for line in lines:
+            payload = (line + "\n").encode()
+            # Multiplexed stream frame: [stream=1 (stdout), 0, 0, 0, size (uint32 BE)]
+            body += struct.pack(">BxxxL", 1, len(payload)) + payload
+        return body
+
+    def _stats(self, c):
+        return {
+            "cpu_stats": {"cpu_usage": {"total_usage": 1000000}},
+            "memory_stats": {"usage": 32 * 1024 * 1024},
+        }
+
+
+# ================================
+# 🌐 Fake DNS Resolver
+# ================================
+class FakeDnsResolver:
+    """
+    A local resolver stand-in for the DNS fix workflow: answers every A query
+    with 127.0.0.1 after `latency` seconds (never, if `latency` is None), or
+    with the error `rcode` (5 = REFUSED). Bind several on 127.0.0.x with one
+    shared port to rank them.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rcode=0):
+        self.latency = latency
+        self.rcode = rcode
+        self.queries = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self.host, self.port = self._sock.getsockname()
+        self._stop = threading.Event()
+
+    def start(self):
+        self._sock.settimeout(0.1)
+        threading.Thread(target=self._serve, name=f"fake-dns-{self.host}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                query, address = self._sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.queries += 1
+            if self.latency is None or len(query) < 12:
+                continue
+            threading.Timer(self.latency, self._answer, args=(query, address)).start()
+
+    def _answer(self, query, address):
+        question = query[12:]
+        header = query[:2] + struct.pack(">HHHHH", 0x8180 | self.rcode, 1, 0 if self.rcode else 1, 0, 0)
+        answer = b"" if self.rcode else struct.pack(">HHHIH", 0xC00C, 1, 1, 60, 4) + bytes([127, 0, 0, 1])
+        try:
+            self._sock.sendto(header + question + answer, address)
+        except OSError:
+            pass
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import docker_ops
+import health_index
+from docker_client import ClientManager
+from metrics import instrument, record_cache
+
+# ================================
+# 🌐 Multi-host Docker Fleet
+# ================================
+# Registry of remote Docker hosts, each with its own ClientManager (pool,
+# reconnect backoff) and a short-lived container cache. Bulk actions go
+# through a second manager whose HTTP timeout is HOST_ACTION_TIMEOUT_SECONDS,
+# so a slow restart is not cut off at the read timeout. Fleet-wide queries fan
+# out to every host in parallel; a host that does not answer within
+# HOST_TIMEOUT_SECONDS is reported as timed out and the other hosts' results
+# are returned anyway. A host whose previous call is still running (timed
+# out, but its thread cannot be cancelled) is not sent another one, so slow
+# hosts cannot pile up threads in the shared pool.
+#
+#   DOCKER_HOSTS="web-1=tcp://10.0.0.11:2375,web-2=ssh://ops@10.0.0.12"
+#
+# Entries without a label are labelled by their host name.
+
+HOST_TIMEOUT_SECONDS = float(os.getenv("DOCKER_HOST_TIMEOUT", "5"))
+HOST_ACTION_TIMEOUT_SECONDS = 60  # bulk actions take longer than reads
+HOST_CACHE_TTL_SECONDS = 10
+FANOUT_MAX_WORKERS = 64
+
+_hosts = {}  # label -> {"base_url", "manager", "action_manager", "cache": {"at", "containers"}, "inflight": future}
+_registry_lock = threading.Lock()
+_pool = {"executor": None}
+
+
+# ================================
+# 📇 Registry
+# ================================
+def _label_for(base_url):
+    host = base_url.split("://", 1)[-1].split("@")[-1]
+    return host.split(":")[0].strip("/") or base_url
+
+
+def parse_hosts(spec):
+    """'label=url,url2' -> [(label, url), ...]"""
+    hosts = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        label, sep, base_url = entry.partition("=")
+        if not sep:
+            label, base_url = _label_for(entry), entry
+        hosts.append((label.strip(), base_url.strip()))
+    return hosts
+
+
+def register_host(label, base_url, timeout=None):
+    """Add (or replace) a host; the client connects lazily on first use."""
+    timeout = timeout or HOST_TIMEOUT_SECONDS
+    manager = ClientManager(base_url=base_url, timeout=timeout)
+    action_manager = ClientManager(base_url=base_url, timeout=max(timeout, HOST_ACTION_TIMEOUT_SECONDS))
+    with _registry_lock:
+        previous = _hosts.get(label)
+        _hosts[label] = {"base_url": base_url, "manager": manager, "action_manager": action_manager,
+                         "cache": {"at": 0.0, "containers": None}, "inflight": None}
+    if previous:
+        previous["manager"].reset()
+        previous["action_manager"].reset()
+
+
+def unregister_host(label):
+    with _registry_lock:
+        host = _hosts.pop(label, None)
+    if host:
+        host["manager"].reset()
+        host["action_manager"].reset()
+
+
+def load_hosts_from_env():
+    for label, base_url in parse_hosts(os.getenv("DOCKER_HOSTS", "")):
+        register_host(label, base_url)
+    return list_hosts()
+
+
+def list_hosts():
+    return sorted(_hosts)
+
+
+def has_hosts():
+    return bool(_hosts)
+
+
+def host_client(label, action=False):
+    """The host's client; action=True gives the one with the longer HTTP timeout."""
+    return _hosts[label]["action_manager" if action else "manager"].require_client()
+
+
+# ================================
+# 📡 Fan-out
+# ================================
+def _executor():
+    if _pool["executor"] is None:
+        with _registry_lock:
+            if _pool["executor"] is None:
+                _pool["executor"] = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fleet-host")
+    return _pool["executor"]
+
+
+def fan_out(fn, hosts=None, timeout=None, action=False):
+    """
+    Run fn(label, client) on every host in parallel (action=True: with the action clients).
+    Returns {"results": {label: value}, "errors": {label: message}, "seconds": elapsed}.
+    """
+    labels = hosts or list_hosts()
+    timeout = timeout or HOST_TIMEOUT_SECONDS
+    start = time.perf_counter()
+
+    futures, errors = {}, {}
+    for label in labels:
+        host = _hosts[label]
+        previous = host["inflight"]
+        if previous is not None and not previous.done():
+            errors[label] = "still busy with a previous call that timed out"
+            continue
+        future = host["inflight"] = _executor().submit(lambda l=label: fn(l, host_client(l, action)))
+        futures[future] = label
+    done, pending = wait(futures, timeout=timeout)
+
+    results = {}
+    for future in done:
+        label = futures[future]
+        try:
+            results[label] = future.result()
+        except Exception as e:
+            errors[label] = str(e)
+    for future in pending:
+        future.cancel()  # only helps while still queued; a running call keeps the host marked busy
+        errors[futures[future]] = f"timed out after {timeout:g}s"
+    return {"results": results, "errors": errors, "seconds": round(time.perf_counter() - start, 3)}
+
+
+# ================================
+# 🔍 Fleet queries
+# ================================
+def _host_containers(label, client, max_age=HOST_CACHE_TTL_SECONDS):
+    cache = _hosts[label]["cache"]
+    fresh = cache["containers"] is not None and time.monotonic() - cache["at"] < max_age
+    record_cache("fleet_hosts", fresh)
+    if not fresh:
+        # One bulk list call — get_all_containers_info() would also fetch stats per container (seconds each)
+        listed = client.api.containers(all=True)
+        containers = [{"name": name, "id": c["Id"][:12], "image": [c.get("Image") or "<none>"], "status": state,
+                       "health": health or "unknown"}
+                      for c, (name, state, health) in zip(listed, health_index.rows_from_list(listed))]
+        cache.update(at=time.monotonic(), containers=containers)
+    return [dict(c, host=label) for c in cache["containers"]]
+
+
+def invalidate_cache(label=None):
+    for host_label in ([label] if label else list(_hosts)):
+        if host_label in _hosts:
+            _hosts[host_label]["cache"].update(at=0.0, containers=None)
+
+
+@instrument()
+def fleet_containers_info(use_cache=True, timeout=None):
+    """Name, id, image, status and health of every container on every host, each with its `host` label."""
+    max_age = HOST_CACHE_TTL_SECONDS if use_cache else 0
+    outcome = fan_out(lambda label, client: _host_containers(label, client, max_age), timeout=timeout)
+    containers = [c for label in sorted(outcome["results"]) for c in outcome["results"][label]]
+    return containers, outcome["errors"]
+
+
+@instrument()
+def fleet_health_summary():
+    outcome = fan_out(lambda label, client: docker_ops.get_container_health_summary(client))
+    return _render_by_host("🩺 Fleet Health", outcome)
+
+
+@instrument()
+def fleet_stopped_containers():
+    outcome = fan_out(lambda label, client: docker_ops.show_stopped_containers(client))
+    return _render_by_host("🔴 Stopped Containers Across Hosts", outcome)
+
+
+@instrument()
+def fleet_restart_stopped():
+    """Restart exited containers on every host; returns ({label: restarted}, {label: errors}, host errors)."""
+    outcome = fan_out(lambda label, client: docker_ops.restart_stopped_containers(client),
+                      timeout=HOST_ACTION_TIMEOUT_SECONDS, action=True)
+    restarted = {label: result[0] for label, result in outcome["results"].items()}
+    troubleshooting = {label: result[1] for label, result in outcome["results"].items() if result[1]}
+    invalidate_cache()
+    return restarted, troubleshooting, outcome["errors"]
+
+
+def _render_by_host(title, outcome):
+    lines = [f"### {title} ({len(outcome['results'])}/{len(outcome['results']) + len(outcome['errors'])} hosts, {outcome['seconds']}s)", ""]
+    for label in sorted(outcome["results"]):
+        lines.append(f"#### 🖥 {label}")
+        lines.append(outcome["results"][label] or "_no containers_")
+        lines.append("")
+    for label in sorted(outcome["errors"]):
+        lines.append(f"#### ⚠️ {label}: {outcome['errors'][label]}")
+    return "\n".join(lines).strip()
+
+
+def fleet_restart_report():
+    restarted, troubleshooting, host_errors = fleet_restart_stopped()
+    lines = ["### 🔁 Restarted stopped containers across hosts", ""]
+    for label in sorted(restarted):
+        names = restarted[label]
+        lines.append(f"- **{label}**: " + (", ".join(names) if names else "nothing to restart"))
+        for name, error in troubleshooting.get(label, {}).items():
+            lines.append(f"  - ⚠️ {name}: {error}")
+    for label in sorted(host_errors):
+        lines.append(f"- ⚠️ **{label}**: {host_errors[label]}")
+    return "\n".join(lines)
+
+
+def fleet_overview():
+    containers, errors = fleet_containers_info()
+    lines = [f"### 🌐 Containers across {len(list_hosts())} hosts", ""]
+    for c in containers:
+        lines.append(f"- **{c['host']}** / `{c['name']}` → {c['status']} ({c['health']})")
+    for label in sorted(errors):
+        lines.append(f"- ⚠️ **{label}**: {errors[label]}")
+    return "\n".join(lines)
@@ -0,0 +1,135 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import diagnosis_cache
+import docker_ops
+from log_buffer import get_recent_logs
+from metrics import instrument
+from tracing import span, propagate
+from profiler import follow_request
+
+# ================================
+# 🚑 Fleet Troubleshooting
+# ================================
+# "troubleshoot all exited" — diagnose every matching container concurrently
+# (bounded by FLEET_MAX_WORKERS), group them by root cause and return one
+# consolidated report instead of one "troubleshoot X" per container.
+
+FLEET_MAX_WORKERS = 8
+FLEET_LOG_LINES = 30
+
+# Root cause -> (heading, suggested fix); order is the report order
+ROOT_CAUSES = {
+    "oom": ("💀 Out of memory (OOMKilled)", "Raise the memory limit (`--memory`) or fix the leak, then restart."),
+    "sigkill": ("🔪 Killed by SIGKILL (137, not OOM)", "Check who ran `docker kill` or hit the stop timeout."),
+    "port_conflict": ("🚪 Port conflict", "Free the host port (`check port <port>`) or remap it, then restart."),
+    "missing_command": ("❓ Command not found (127)", "Fix ENTRYPOINT/CMD or install the missing binary in the image."),
+    "permission": ("🔒 Permission problem (126)", "Make the entrypoint executable and check the container user."),
+    "dns": ("🌐 DNS / name resolution", "Check dependent service names and Docker DNS (`fix dns`)."),
+    "app_error": ("⚠️ Application error", "Usually missing config or an uncaught exception — see `troubleshoot <container>`."),
+    "clean_exit": ("✅ Clean exit (0)", "Container finished its work; restart only if it should be long-running."),
+    "unknown": ("❔ Unknown", "Run `troubleshoot <container>` for a detailed report."),
+}
+
+PORT_CONFLICT_RE = re.compile(r"address already in use|port is already allocated|failed to bind|eaddrinuse", re.I)
+DNS_RE = re.compile(r"temporary failure in name resolution|temporary failure resolving|could not resolve|name or service not known|no such host", re.I)
+APP_ERROR_RE = re.compile(r"error|exception|traceback|fatal|panic", re.I)
+
+
+def classify_root_cause(state, logs):
+    """Map a container's State dict and recent logs to one ROOT_CAUSES key."""
+    exit_code = state.get("ExitCode")
+    error = state.get("Error") or ""
+
+    if state.get("OOMKilled"):
+        return "oom"
+    if exit_code == 137:
+        return "sigkill"
+    if PORT_CONFLICT_RE.search(error) or PORT_CONFLICT_RE.search(logs):
+        return "port_conflict"
+    if exit_code == 127:
+        return "missing_command"
+    if exit_code == 126:
+        return "permission"
+    if DNS_RE.search(error) or DNS_RE.search(logs):
+        return "dns"
+    if exit_code == 0:
+        return "clean_exit"
+    if exit_code or APP_ERROR_RE.search(error) or APP_ERROR_RE.search(logs):
+        return "app_error"
+    return "unknown"
+
+
+def diagnose_container(client, name):
+    """Inspect one container and classify it. Never raises — errors become 'unknown'."""
+    try:
+        container = client.containers.get(name)
+        cached = diagnosis_cache.lookup("fleet", container.attrs)
+        if cached is not None:
+            return cached
+        state = container.attrs.get("State", {})
+        logs = get_recent_logs(name, tail=FLEET_LOG_LINES)
+        if not logs:
+            with span("logs.fetch", container=name, tail=FLEET_LOG_LINES):
+                logs = container.logs(tail=FLEET_LOG_LINES).decode("utf-8", errors="ignore").strip()
+        cause = classify_root_cause(state, logs)
+        last_line = logs.splitlines()[-1] if logs else ""
+        diagnosis = {"name": name, "cause": cause, "exit_code": state.get("ExitCode"), "evidence": last_line}
+        diagnosis_cache.store("fleet", container.attrs, diagnosis)
+        return diagnosis
+    except Exception as e:
+        return {"name": name, "cause": "unknown", "exit_code": None, "evidence": f"diagnosis failed: {e}"}
+
+
+@instrument()
+def troubleshoot_fleet(status="exited", client=None, max_workers=FLEET_MAX_WORKERS):
+    """
+    Diagnose every container with the given status concurrently.
+    Returns {root cause: [diagnosis, ...]}.
+    """
+    client = client or docker_ops.client
+    # One list call — containers.list() would inspect each container serially
+    names = [c["Names"][0].lstrip("/") for c in client.api.containers(all=True, filters={"status": status})]
+    if not names:
+        return {}
+
+    groups = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        diagnose = propagate(follow_request(lambda n: diagnose_container(client, n)))
+        for diagnosis in pool.map(diagnose, names):
+            groups.setdefault(diagnosis["cause"], []).append(diagnosis)
+    return groups
+
+
+def fleet_troubleshooting_report(status="exited"):
+    """Consolidated markdown report for "troubleshoot all exited"."""
+    try:
+        groups = troubleshoot_fleet(status)
+    except Exception as e:
+        return f"⚠️ Error while troubleshooting the fleet: {e}"
+
+    if not groups:
+        return f"✅ No `{status}` containers found."
+
+    total = sum(len(items) for items in groups.values())
+    output = f"### 🚑 Fleet Troubleshooting — {total} `{status}` containers\n\n"
+    for cause, (heading, fix) in ROOT_CAUSES.items():
+        items = groups.get(cause)
+        if not items:
+            continue
+        output += f"#### {heading} — {len(items)}\n"
+        for d in sorted(items, key=lambda d: d["name"]):
+            evidence = f" — `{d['evidence'][:120]}`" if d["evidence"] else ""
+            output += f"- **{d['name']}** (exit `{d['exit_code']}`){evidence}\n"
+        output += f"\n💡 {fix}\n\n"
+    return output
+
+
+def extract_fleet_status(q_lower):
+    """'troubleshoot all exited' -> 'exited'; None if this is not a fleet request."""
+    # (?![\w-]): "troubleshoot allocator" / "troubleshoot fleet-mgr" name a container
+    match = re.search(r"\btroubleshoot (?:all|every|fleet)(?![\w-])(?:\s+(exited|stopped|dead|restarting|created)\b)?", q_lower)
+    if not match:
+        return None
+    status = match.group(1) or "exited"
+    return "exited" if status == "stopped" else status
@@ -0,0 +1,186 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import docker_events
+from docker_client import get_client
+from metrics import record_cache
+
+# ================================
+# 🩺 Container Health Index
+# ================================
+# In-memory health status of every container, so the "health" query never
+# inspects or stats anything. Built from ONE bulk list call at startup
+# (health is parsed from the status text, e.g. "Up 2 hours (unhealthy)")
+# and then kept current from `health_status` and lifecycle events. The
+# recent health-check outputs (State.Health.Log) are fetched with a single
+# inspect the first time they are asked for after a container's health
+# changed, never on the events thread; at startup the containers that are
+# already failing are backfilled by a background thread.
+
+HEALTH_LOG_ENTRIES = int(os.getenv("HEALTH_LOG_ENTRIES", "5"))  # per container
+
+_HEALTH_IN_STATUS = re.compile(r"\((?:health: )?(healthy|unhealthy|starting)\)")
+
+_index = {}  # container name -> {"id", "state", "health", "log": deque, "log_stale", "updated"}
+_ready = {"at": None}
+_lock = threading.Lock()
+
+
+def parse_health(status_text):
+    """'Up 5 minutes (health: starting)' -> 'starting'; None when there is no health check."""
+    match = _HEALTH_IN_STATUS.search(status_text or "")
+    return match.group(1) if match else None
+
+
+def rows_from_list(containers):
+    """(name, state, health) from the low-level `containers(all=True)` list result."""
+    return [
+        (c["Names"][0].lstrip("/"), c.get("State", ""), parse_health(c.get("Status")))
+        for c in containers
+    ]
+
+
+def _entry(container_id, state, health):
+    return {"id": container_id, "state": state, "health": health,
+            "log": deque(maxlen=HEALTH_LOG_ENTRIES), "log_stale": False, "updated": time.time()}
+
+
+def _load_health_log(name, client=None):
+    """Copy State.Health.Log of one container into the index (one inspect call)."""
+    client = client or get_client()
+    if client is None:
+        return
+    try:
+        health = client.api.inspect_container(name).get("State", {}).get("Health") or {}
+    except Exception:
+        return
+    with _lock:
+        entry = _index.get(name)
+        if entry is None:
+            return
+        entry["log"].clear()
+        for check in (health.get("Log") or [])[-HEALTH_LOG_ENTRIES:]:
+            entry["log"].append({
+                "end": check.get("End"),
+                "exit_code": check.get("ExitCode"),
+                "output": (check.get("Output") or "").strip(),
+            })
+        if health.get("Status"):
+            entry["health"] = health["Status"]
+
+
+# ================================
+# 🏗 Bootstrap
+# ================================
+def rebuild(client=None, backfill=True):
+    """Reload the whole index from one bulk list call; returns the number of containers."""
+    client = client or get_client()
+    if client is None:
+        return 0
+    listed = client.api.containers(all=True)
+    entries = {}
+    for c, (name, state, health) in zip(listed, rows_from_list(listed)):
+        entries[name] = _entry(c["Id"][:12], state, health)
+    with _lock:
+        _index.clear()
+        _index.update(entries)
+        _ready["at"] = time.time()
+    unhealthy = [name for name, entry in entries.items() if entry["health"] == "unhealthy"]
+    if backfill and unhealthy:
+        threading.Thread(target=_backfill_logs, args=(unhealthy, client), name="health-log-backfill", daemon=True).start()
+    return len(entries)
+
+
+def _backfill_logs(names, client):
+    for name in names:
+        _load_health_log(name, client)
+
+
+def is_ready():
+    return _ready["at"] is not None
+
+
+# ================================
+# 📡 Event Wiring
+# ================================
+def handle_container_event(event):
+    """docker_events subscriber: keep state and health current."""
+    action, _, detail = (event.get("Action") or event.get("status") or "").partition(":")
+    attributes = event.get("Actor", {}).get("Attributes", {})
+    name = attributes.get("name")
+    if not name:
+        return
+    container_id = (event.get("Actor", {}).get("ID") or event.get("id") or "")[:12]
+
+    with _lock:
+        entry = _index.get(name)
+        if entry is None and action != "destroy":
+            entry = _index[name] = _entry(container_id, "created", None)
+        if action == "health_status":
+            entry["health"] = detail.strip()
+            entry["log_stale"] = True  # reloaded by health_log() when asked for
+        elif action in ("start", "restart", "unpause"):
+            entry["state"] = "running"
+            if entry["health"] is not None:
+                entry["health"] = "starting"  # the first check has not run yet
+        elif action == "die":
+            entry["state"] = "exited"
+        elif action == "pause":
+            entry["state"] = "paused"
+        elif action == "rename":
+            old_name = attributes.get("oldName", "").lstrip("/")
+            previous = _index.pop(old_name, None)
+            if previous is not None:
+                _index[name] = previous
+                entry = previous
+        elif action == "destroy":
+            _index.pop(name, None)
+            return
+        entry["updated"] = time.time()
+
+
+def start_health_index():
+    """Build the index once and keep it current from Docker events."""
+    docker_events.subscribe(handle_container_event, "container")
+    docker_events.start_event_follower()
+    try:
+        count = rebuild()
+        print(f"🩺 Health index ready: {count} containers")
+    except Exception as e:
+        print(f"⚠️ Could not build health index: {e}")
+
+
+# ================================
+# 🔍 Queries
+# ================================
+def health_rows():
+    """[(name, state, health)] for every container, or None until the index is built."""
+    if not is_ready():
+        record_cache("health_index", False)
+        return None
+    record_cache("health_index", True)
+    with _lock:
+        return [(name, e["state"], e["health"]) for name, e in sorted(_index.items())]
+
+
+def health_log(name):
+    """Recent health-check results of one container, oldest first."""
+    with _lock:
+        entry = _index.get(name)
+        stale = entry is not None and entry["log_stale"]
+        if stale:
+            entry["log_stale"] = False
+    if stale:
+        _load_health_log(name)
+    with _lock:
+        entry = _index.get(name)
+        return list(entry["log"]) if entry else []
+
+
+def index_stats():
+    with _lock:
+        return {"containers": len(_index), "ready_at": _ready["at"],
+                "unhealthy": sum(1 for e in _index.values() if e["health"] == "unhealthy")}
@@ -0,0 +1,241 @@
+import bisect
+import difflib
+import os
+import threading
+import time
+from datetime import datetime
+
+import docker_events
+from docker_client import get_client
+from image_pulls import image_reference
+from metrics import record_cache
+
+# ================================
+# 🖼 Local Image Index
+# ================================
+# In-memory metadata of every local image (repository, tag, digest, size,
+# creation time, labels) for the Create Container tab and for validating
+# image references before `run`. Built from ONE images list call, then kept
+# current from image events: pull/tag/load/import re-inspect just that
+# image, untag/delete drop it. Search is a bisect over the sorted tags
+# (prefix), then substring, then fuzzy (difflib) matches.
+#
+# Processes that do not follow events (the Streamlit UI) rebuild the index
+# when it is older than IMAGE_INDEX_MAX_AGE_SECONDS.
+
+IMAGE_INDEX_MAX_AGE_SECONDS = int(os.getenv("IMAGE_INDEX_MAX_AGE_SECONDS", "30"))
+FUZZY_CUTOFF = 0.6
+
+_images = {}  # image id -> entry (see _entry)
+_tags = []    # "repository:tag" strings sorted case-insensitively, for prefix search
+_lowered = [] # _tags lower-cased, same order
+_by_tag = {}  # "repository:tag" -> image id
+_state = {"built_at": None, "live": False}
+_lock = threading.RLock()
+
+SORT_KEYS = {
+    "name": lambda e: e["tags"][0] if e["tags"] else "~" + e["id"],
+    "size": lambda e: -e["size"],
+    "created": lambda e: -e["created"],
+}
+
+
+def _created_epoch(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")[:32]).timestamp())
+    except ValueError:
+        return 0
+
+
+def _entry(raw):
+    tags = sorted(t for t in (raw.get("RepoTags") or []) if t and t != "<none>:<none>")
+    labels = raw.get("Labels")
+    if labels is None:
+        labels = (raw.get("Config") or {}).get("Labels")
+    return {
+        "id": raw["Id"],
+        "short_id": raw["Id"].split(":")[-1][:12],
+        "tags": tags,
+        "repositories": sorted({t.rsplit(":", 1)[0] for t in tags}),
+        "digests": list(raw.get("RepoDigests") or []),
+        "size": raw.get("Size") or 0,
+        "created": _created_epoch(raw.get("Created")),
+        "labels": labels or {},
+    }
+
+
+def _reindex_tags_locked():
+    _by_tag.clear()
+    for image_id, entry in _images.items():
+        for tag in entry["tags"]:
+            _by_tag[tag] = image_id
+    _tags[:] = sorted(_by_tag, key=str.lower)
+    _lowered[:] = [t.lower() for t in _tags]
+
+
+def _upsert(raw):
+    entry = _entry(raw)
+    with _lock:
+        _images[entry["id"]] = entry
+        # A tag moves to the newest image that carries it
+        for other in _images.values():
+            if other is not entry:
+                other["tags"] = [t for t in other["tags"] if t not in entry["tags"]]
+        _reindex_tags_locked()
+    return entry
+
+
+def _remove(image_id):
+    with _lock:
+        if _images.pop(image_id, None) is not None:
+            _reindex_tags_locked()
+
+
+# ================================
+# 🏗 Bootstrap & Events
+# ================================
+def rebuild(client=None):
+    """Reload the index from one images list call; returns the number of images."""
+    client = client or get_client()
+    if client is None:
+        return 0
+    entries = [_entry(raw) for raw in client.api.images()]
+    with _lock:
+        _images.clear()
+        _images.update({e["id"]: e for e in entries})
+        _reindex_tags_locked()
+        _state["built_at"] = time.monotonic()
+    return len(entries)
+
+
+def _refresh_image(ref, client=None):
+    client = client or get_client()
+    if client is None:
+        return
+    try:
+        _upsert(client.api.inspect_image(ref))
+    except Exception:
+        # Gone (untagged dangling image deleted meanwhile) — drop it if we had it by id
+        _remove(ref)
+
+
+def handle_image_event(event):
+    """docker_events subscriber for image events."""
+    action = event.get("Action") or event.get("status") or ""
+    ref = event.get("Actor", {}).get("ID") or event.get("id")
+    if not ref or not is_ready():
+        return
+    if action == "delete":
+        _remove(ref)
+    elif action in ("pull", "tag", "untag", "load", "import", "save", "build"):
+        _refresh_image(ref)
+
+
+def start_image_index():
+    """Build the index once and keep it current from image events."""
+    docker_events.subscribe(handle_image_event, "image")
+    docker_events.start_event_follower()
+    _state["live"] = True
+    try:
+        print(f"🖼 Image index ready: {rebuild()} images")
+    except Exception as e:
+        print(f"⚠️ Could not build image index: {e}")
+
+
+def is_ready():
+    return _state["built_at"] is not None
+
+
+def ensure_fresh(client=None):
+    """Build the index if needed; without an events feed, rebuild once it is too old."""
+    built_at = _state["built_at"]
+    stale = built_at is None or (not _state["live"] and time.monotonic() - built_at > IMAGE_INDEX_MAX_AGE_SECONDS)
+    record_cache("image_index", not stale)
+    if stale:
+        rebuild(client)
+    return is_ready()
+
+
+# ================================
+# 🔍 Search & Validation
+# ================================
+def _matches(query, limit):
+    """Image ids matching `query`: prefix, then substring, then fuzzy; best first."""
+    query = query.strip().lower()
+    if not query:
+        return list(_images)
+    found = {}  # image id -> None, in match order
+
+    def add(tag):
+        found.setdefault(_by_tag[tag])
+
+    # Exact repository first ("redis" -> "redis:*" before "redis-exporter:*"), then other prefixes
+    for prefix in (query if ":" in query else query + ":", query):
+        for i in range(bisect.bisect_left(_lowered, prefix), len(_lowered)):
+            if not _lowered[i].startswith(prefix):
+                break
+            add(_tags[i])
+    if len(found) >= limit:
+        return list(found)
+    for tag, low in zip(_tags, _lowered):
+        # "nginx" also matches "myregistry:5000/nginx:1.25"
+        if query in low:
+            add(tag)
+    for image_id, entry in _images.items():
+        if image_id.split(":")[-1].startswith(query) or any(query in d.lower() for d in entry["digests"]):
+            found.setdefault(image_id)
+    if len(found) < limit:
+        names = {t.rsplit(":", 1)[0].lower(): t for t in _tags}
+        for close in difflib.get_close_matches(query.rsplit(":", 1)[0], list(names), n=limit, cutoff=FUZZY_CUTOFF):
+            add(names[close])
+    return list(found)
+
+
+def search(query="", sort=None, limit=50):
+    """Images matching `query` (best match first, or sorted by name/size/created)."""
+    with _lock:
+        entries = [_images[i] for i in _matches(query or "", limit)]
+    if sort:
+        entries = sorted(entries, key=SORT_KEYS[sort])
+    return entries[:limit]
+
+
+def resolve(reference):
+    """The local image a reference (tag, short id or digest) names, or None."""
+    reference = (reference or "").strip()
+    if not reference:
+        return None
+    with _lock:
+        if reference in _by_tag:
+            return _images[_by_tag[reference]]
+        try:
+            normalized = image_reference(reference)
+        except ValueError:
+            return None
+        if normalized in _by_tag:
+            return _images[_by_tag[normalized]]
+        bare = reference.split(":", 1)[-1] if reference.startswith("sha256:") else reference
+        for image_id, entry in _images.items():
+            if len(bare) >= 12 and image_id.split(":")[-1].startswith(bare):
+                return entry
+            if reference in entry["digests"]:
+                return entry
+    return None
+
+
+def suggest(reference, limit=3):
+    """Closest local tags for a reference that did not resolve."""
+    return [e["tags"][0] for e in search(reference, limit=limit) if e["tags"]]
+
+
+def list_tags():
+    with _lock:
+        return list(_tags)
+
+
+def index_stats():
+    with _lock:
+        return {"images": len(_images), "tags": len(_tags), "live": _state["live"],
+                "total_size": sum(e["size"] for e in _images.values())}
@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+import time
+
+import docker
+
+import coalesce
+from docker_client import require_client
+from metrics import Counter, instrument
+
+# ================================
+# 📥 Image Pulls
+# ================================
+# "pull image nginx:latest" runs as a background job (see jobs.py) that
+# streams the daemon's pull progress into the job's progress/message, so the
+# chat can follow it at GET /jobs/<id>.
+#
+# - Concurrency: at most IMAGE_PULL_CONCURRENCY pulls talk to registries at
+#   once; further pulls wait for a slot (the job shows "Waiting for a pull
+#   slot"). This is the bandwidth budget — dockerd has no per-pull rate limit.
+# - Coalescing: references are normalized ("nginx", "docker.io/library/nginx"
+#   and "nginx:latest" are one image), so duplicate requests join the job
+#   that is already queued or running instead of pulling again.
+# - Shared layers: dockerd downloads a layer once even when several images
+#   being pulled need it; the other pulls report it as "Waiting" and the
+#   summary counts it as reused.
+
+IMAGE_PULL_CONCURRENCY = int(os.getenv("IMAGE_PULL_CONCURRENCY", "3"))
+PULL_PROGRESS_INTERVAL_SECONDS = 0.5  # how often a pull updates its job
+
+PULLS = Counter("chatbot_image_pulls_total", "Image pulls by outcome.", ["outcome"])
+
+_slots = threading.BoundedSemaphore(IMAGE_PULL_CONCURRENCY)
+
+_DIGEST = re.compile(r"Digest: (sha256:[0-9a-f]+)")
+
+# Reference grammar: optional registry host[:port], then lowercase path components
+_COMPONENT = r"[a-z0-9]+(?:(?:[._]|__|-+)[a-z0-9]+)*"
+_REPOSITORY = re.compile(rf"^(?:(?:localhost|[a-z0-9-]+(?:\.[a-z0-9-]+)+)(?::\d+)?/)?{_COMPONENT}(?:/{_COMPONENT})*$")
+_TAG = re.compile(r"^\w[\w.-]{0,127}$")
+# Bare names pulled without a tag or namespace; anything else needs "name:tag" or "namespace/name"
+OFFICIAL_IMAGES = {
+    "alpine", "busybox", "caddy", "debian", "golang", "hello-world", "httpd", "mariadb", "memcached", "mongo",
+    "mysql", "nginx", "node", "openjdk", "postgres", "python", "rabbitmq", "redis", "registry", "traefik", "ubuntu",
+}
+
+
+def normalize_reference(reference):
+    """'nginx' -> ('nginx', 'latest'); 'docker.io/library/redis:7' -> ('redis', '7'); digests are kept."""
+    reference = (reference or "").strip().strip("`'\"")
+    if not reference:
+        raise ValueError("No image name given")
+    for prefix in ("docker.io/", "index.docker.io/", "registry-1.docker.io/"):
+        if reference.startswith(prefix):
+            reference = reference[len(prefix):]
+    if reference.startswith("library/") and reference.count("/") == 1:
+        reference = reference[len("library/"):]
+    if "@" in reference:
+        repository, digest = reference.split("@", 1)
+        return repository, digest
+    # A ':' after the last '/' is a tag; one before it belongs to a registry host:port
+    name, sep, tag = reference.rpartition(":")
+    if sep and "/" not in tag:
+        return name, tag
+    return reference, "latest"
+
+
+def plausible_reference(reference):
+    """
+    Whether `reference` looks like an image someone meant to pull: valid
+    syntax, and a registry host or namespace path, an explicit tag/digest,
+    or a well-known official image ("pull image from" is not a request).
+    """
+    try:
+        repository, tag = normalize_reference(reference)
+    except ValueError:
+        return False
+    if not _REPOSITORY.match(repository) or not (tag.startswith("sha256:") or _TAG.match(tag)):
+        return False
+    explicit = "@" in reference or ":" in reference.rsplit("/", 1)[-1]
+    return "/" in repository or explicit or repository in OFFICIAL_IMAGES
+
+
+def image_reference(reference):
+    repository, tag = normalize_reference(reference)
+    return f"{repository}@{tag}" if tag.startswith("sha256:") else f"{repository}:{tag}"
+
+
+def _progress(layers):
+    """Bytes-weighted progress over layers whose size is known; finished layers count as done."""
+    total = sum(l["total"] for l in layers.values() if l["total"])
+    if not total:
+        return 0.0
+    current = sum(l["total"] if l["done"] else min(l["current"], l["total"]) for l in layers.values() if l["total"])
+    return current / total
+
+
+@instrument()
+def pull_image(reference, report=None, client=None):
+    """
+    Pull one image, calling report(progress 0..1, message) as layers download.
+    Returns a chat-ready markdown summary.
+    """
+    report = report or (lambda progress, message=None: None)
+    repository, tag = normalize_reference(reference)
+    ref = image_reference(reference)
+
+    report(0.0, "Waiting for a pull slot")
+    with _slots:
+        client = client or require_client()
+        layers = {}  # layer id -> {"current", "total", "done", "downloaded"}
+        digest, last_report = None, 0.0
+        start = time.perf_counter()
+        try:
+            for event in client.api.pull(repository, tag=tag, stream=True, decode=True):
+                if "error" in event:
+                    raise docker.errors.APIError(event["error"])
+                status, layer = event.get("status", ""), event.get("id")
+                match = _DIGEST.search(status)
+                if match:
+                    digest = match.group(1)
+                if not layer or layer == tag:
+                    continue
+                entry = layers.setdefault(layer, {"current": 0, "total": 0, "done": False, "downloaded": False})
+                detail = event.get("progressDetail") or {}
+                if status == "Downloading" and detail.get("total"):
+                    entry.update(current=detail.get("current", 0), total=detail["total"], downloaded=True)
+                elif status in ("Already exists", "Pull complete", "Download complete"):
+                    entry["done"] = True
+
+                now = time.monotonic()
+                if now - last_report >= PULL_PROGRESS_INTERVAL_SECONDS:
+                    last_report = now
+                    done = sum(1 for l in layers.values() if l["done"])
+                    report(min(0.99, _progress(layers)), f"{ref}: {done}/{len(layers)} layers")
+        except docker.errors.NotFound:
+            PULLS.inc(outcome="not_found")
+            return f"❌ Image `{ref}` was not found in the registry."
+        except Exception:
+            PULLS.inc(outcome="error")
+            raise
+
+    PULLS.inc(outcome="ok")
+    coalesce.invalidate()
+    reused = sum(1 for l in layers.values() if not l["downloaded"])
+    summary = (f"📥 Pulled `{ref}` in {time.perf_counter() - start:.1f}s — {len(layers)} layers"
+               f" ({len(layers) - reused} downloaded, {reused} already present or shared)")
+    if digest:
+        summary += f"\n\nDigest: `{digest}`"
+    return summary
+
+
+def pull_job(params, report):
+    """jobs.py handler for kind 'pull_image' (params: {"image": reference})."""
+    return pull_image(params["image"], report)
@@ -0,0 +1,250 @@
+import contextvars
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import Counter, record_cache
+
+# ================================
+# ⏳ Background Job Queue
+# ================================
+# Long chatbot actions (restart stopped containers, fix DNS, troubleshoot,
+# image pulls) run here instead of inside the /ask request. /ask enqueues a
+# job and answers at once with its id; GET /jobs/{id} reports status,
+# progress and result. Identical jobs already queued or running are not
+# duplicated — the existing job id is returned — so client retries are
+# harmless. Jobs persist in SQLite (JOBS_DB_PATH): queued jobs are picked up
+# again after a restart. A job that was *running* when the process died may be
+# what killed it (fix_dns restarts dockerd), so it is only re-run if its kind
+# was registered resumable=True, and at most JOB_MAX_ATTEMPTS times in all;
+# otherwise it is marked failed.
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "/tmp/aichatbot-jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+JOBS_SUBMITTED = Counter("chatbot_jobs_submitted_total", "Jobs submitted by kind and outcome (new/deduplicated).", ["kind", "outcome"])
+JOBS_FINISHED = Counter("chatbot_jobs_finished_total", "Jobs finished by kind and status.", ["kind", "status"])
+
+_handlers = {}  # kind -> fn(params, report) -> result
+_resumable = set()  # kinds safe to run again after being interrupted mid-way
+_queue = queue.Queue()
+_db = {"conn": None, "path": None}
+_db_lock = threading.RLock()
+_workers = []
+_submitted = contextvars.ContextVar("submitted_job", default=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+"""
+
+
+# ================================
+# 🗄 Storage
+# ================================
+def _conn():
+    if _db["conn"] is None or _db["path"] != JOBS_DB_PATH:
+        conn = sqlite3.connect(JOBS_DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _db.update(conn=conn, path=JOBS_DB_PATH)
+    return _db["conn"]
+
+
+def _update(job_id, **fields):
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with _db_lock:
+        _conn().execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    del job["dedup_key"]
+    return job
+
+
+# ================================
+# 📮 Submitting
+# ================================
+def register_job(kind, handler, resumable=False):
+    """
+    Register fn(params, report) for a job kind; report(progress 0..1, message)
+    updates status. resumable=True: idempotent, re-run if a restart interrupted it.
+    """
+    _handlers[kind] = handler
+    if resumable:
+        _resumable.add(kind)
+    else:
+        _resumable.discard(kind)
+
+
+def dedup_key(kind, params):
+    return kind + ":" + json.dumps(params, sort_keys=True)
+
+
+def submit(kind, params=None):
+    """
+    Enqueue a job, or return the identical job that is already queued/running.
+    Returns (job dict, created: bool).
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    params = params or {}
+    key = dedup_key(kind, params)
+    with _db_lock:
+        existing = _conn().execute(
+            "SELECT * FROM jobs WHERE dedup_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+            (key, *ACTIVE_STATES),
+        ).fetchone()
+        if existing is not None:
+            JOBS_SUBMITTED.inc(kind=kind, outcome="deduplicated")
+            record_cache("jobs_dedup", True)
+            _submitted.set(existing["id"])
+            return _row_to_job(existing), False
+        job_id = uuid.uuid4().hex[:12]
+        _conn().execute(
+            "INSERT INTO jobs (id, kind, params, dedup_key, status, message, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params), key, QUEUED, "Waiting for a worker", time.time()),
+        )
+    JOBS_SUBMITTED.inc(kind=kind, outcome="new")
+    record_cache("jobs_dedup", False)
+    _submitted.set(job_id)
+    _queue.put(job_id)
+    return get_job(job_id), True
+
+
+def submitted_job():
+    """Id of the job submitted (or joined) while handling the current request, if any."""
+    return _submitted.get()
+
+
+def clear_submitted():
+    _submitted.set(None)
+
+
+def get_job(job_id):
+    with _db_lock:
+        return _row_to_job(_conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def list_jobs(status=None, limit=50):
+    query, args = "SELECT * FROM jobs", ()
+    if status:
+        query, args = query + " WHERE status = ?", (status,)
+    with _db_lock:
+        rows = _conn().execute(query + " ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+# ================================
+# 👷 Workers
+# ================================
+def _claim(job_id):
+    """Atomically move a queued job to running; None if another worker got it first."""
+    with _db_lock:
+        claimed = _conn().execute(
+            "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1, message = ? WHERE id = ? AND status = ?",
+            (RUNNING, time.time(), "Running", job_id, QUEUED),
+        ).rowcount
+    return get_job(job_id) if claimed else None
+
+
+def _run(job_id):
+    job = _claim(job_id)
+    if job is None:
+        return
+    handler = _handlers.get(job["kind"])
+
+    def report(progress, message=None):
+        _update(job_id, progress=max(0.0, min(1.0, float(progress))), message=message)
+
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+        result = handler(job["params"], report)
+        _update(job_id, status=SUCCEEDED, progress=1.0, message="Done", result=json.dumps(result), finished_at=time.time())
+        JOBS_FINISHED.inc(kind=job["kind"], status=SUCCEEDED)
+    except Exception as e:
+        _update(job_id, status=FAILED, message="Failed", error=str(e), finished_at=time.time())
+        JOBS_FINISHED.inc(kind=job["kind"], status=FAILED)
+
+
+def _worker_loop():
+    while True:
+        job_id = _queue.get()
+        try:
+            _run(job_id)
+        except Exception as e:
+            print(f"⚠️ Job worker error for {job_id}: {e}")
+        finally:
+            _queue.task_done()
+
+
+def _recover():
+    """Requeue jobs left queued (or running, if resumable) by a previous process; drop old finished ones."""
+    with _db_lock:
+        conn = _conn()
+        for row in conn.execute("SELECT id, kind, attempts FROM jobs WHERE status = ?", (RUNNING,)).fetchall():
+            if row["kind"] in _resumable and row["attempts"] < JOB_MAX_ATTEMPTS:
+                _update(row["id"], status=QUEUED, message=f"Requeued after restart (attempt {row['attempts'] + 1})")
+                continue
+            reason = (f"gave up after {row['attempts']} attempts" if row["kind"] in _resumable
+                      else "not resumable; submit it again if still needed")
+            _update(row["id"], status=FAILED, message="Failed", finished_at=time.time(),
+                    error=f"Interrupted by a restart ({reason})")
+            JOBS_FINISHED.inc(kind=row["kind"], status=FAILED)
+        conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                     (SUCCEEDED, FAILED, time.time() - JOB_RETENTION_SECONDS))
+        pending = [row["id"] for row in conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,))]
+    for job_id in pending:
+        _queue.put(job_id)
+    return len(pending)
+
+
+def start_job_workers(workers=None):
+    """Start the worker pool once and resume persisted jobs."""
+    if _workers:
+        return
+    _recover()
+    for i in range(workers or JOB_WORKERS):
+        thread = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+
+
+def wait_for_job(job_id, timeout=60, interval=0.1):
+    """Poll until the job finishes (or timeout); returns the job dict."""
+    deadline = time.monotonic() + timeout
+    job = get_job(job_id)
+    while job and job["status"] in ACTIVE_STATES and time.monotonic() < deadline:
+        time.sleep(interval)
+        job = get_job(job_id)
+    return job
@@ -0,0 +1,150 @@
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from metrics import record_cache
+
+# ================================
+# 📚 Static Knowledge Base
+# ================================
+# The static answers (DNS fix, port conflict, troubleshooting guide, create
+# container help, exit codes) are loaded from knowledge/*.md once, rendered to
+# markdown and HTML up front and served from an immutable table with ETags —
+# no per-request string building.
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge")
+
+# Documents assembled from several data files
+COMPOSITE_DOCUMENTS = {
+    "create_container_help": ["create_container_help", "popular_images"],
+}
+
+Document = namedtuple("Document", ["doc_id", "markdown", "html", "etag", "html_etag"])
+
+_table = {"documents": None}
+_load_lock = threading.Lock()
+
+
+# ================================
+# 🖨 Markdown -> HTML
+# ================================
+def _inline(text):
+    text = html.escape(text, quote=False)
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    text = re.sub(r"(?<![\w*])_([^_]+)_(?!\w)", r"<em>\1</em>", text)
+    text = re.sub(r"\[([^\]]+)\]\((https?://[^)\s]+)\)", r'<a href="\2">\1</a>', text)
+    return text
+
+
+def render_html(markdown):
+    """Small markdown renderer for the subset used by the knowledge files."""
+    out = []
+    in_code = False
+    in_list = False
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("```") or stripped.startswith("#```"):
+            if in_list:
+                out.append("</ul>")
+                in_list = False
+            out.append("</code></pre>" if in_code else "<pre><code>")
+            in_code = not in_code
+            continue
+        if in_code:
+            out.append(html.escape(line, quote=False))
+            continue
+        if stripped.startswith(("- ", "• ")):
+            if not in_list:
+                out.append("<ul>")
+                in_list = True
+            out.append(f"<li>{_inline(stripped[2:])}</li>")
+            continue
+        if in_list:
+            out.append("</ul>")
+            in_list = False
+        heading = re.match(r"^(#{1,6})\s+(.*)$", stripped)
+        if heading:
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif stripped == "---":
+            out.append("<hr>")
+        elif stripped:
+            out.append(f"<p>{_inline(stripped)}</p>")
+    if in_list:
+        out.append("</ul>")
+    if in_code:
+        out.append("</code></pre>")
+    return "\n".join(out)
+
+
+def _etag(content):
+    return '"' + hashlib.sha256(content.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _make_document(doc_id, markdown):
+    rendered = render_html(markdown)
+    return Document(doc_id, markdown, rendered, _etag(markdown), _etag(rendered))
+
+
+# ================================
+# 📥 Loading
+# ================================
+def _read_data_files():
+    sources = {}
+    for filename in sorted(os.listdir(KNOWLEDGE_DIR)):
+        if filename.endswith(".md"):
+            with open(os.path.join(KNOWLEDGE_DIR, filename), encoding="utf-8") as f:
+                sources[filename[:-3]] = f.read()
+    for doc_id, parts in COMPOSITE_DOCUMENTS.items():
+        sources[doc_id] = "".join(sources[part] for part in parts)
+    return sources
+
+
+def _exit_code_sources():
+    # Imported here: exit_codes serves its answers from this table
+    from exit_codes import render_exit_code
+    return {f"exit_code/{code}": render_exit_code(code) for code in range(256)}
+
+
+def load():
+    """Load and pre-render every document once; later calls are no-ops."""
+    if _table["documents"] is not None:
+        return _table["documents"]
+    with _load_lock:
+        if _table["documents"] is None:
+            sources = _read_data_files()
+            sources.update(_exit_code_sources())
+            documents = {doc_id: _make_document(doc_id, md) for doc_id, md in sources.items()}
+            _table["documents"] = MappingProxyType(documents)
+    return _table["documents"]
+
+
+def reload():
+    """Drop the table and load it again (after editing data files)."""
+    with _load_lock:
+        _table["documents"] = None
+    return load()
+
+
+# ================================
+# 🔎 Lookup
+# ================================
+def get_document(doc_id):
+    """Return the pre-rendered Document, or None if unknown."""
+    document = load().get(doc_id)
+    record_cache("knowledge_base", document is not None)
+    return document
+
+
+def get_markdown(doc_id):
+    record_cache("knowledge_base", True)
+    return load()[doc_id].markdown
+
+
+def list_documents():
+    return sorted(load())
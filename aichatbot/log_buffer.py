@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+from collections import deque
+
+import docker_ops
+import docker_events
+import log_index
+from metrics import record_cache
+from tracing import traced
+
+# ================================
+# 🪵 Crash-time Log Ring Buffers
+# ================================
+# Follow-mode log streams for watched containers feed a bounded ring buffer
+# per container. The whole fleet shares one memory cap; when a container
+# dies its buffer is snapshotted to disk so troubleshooting can read the
+# lines even after the container is restarted or removed.
+
+LOG_BUFFER_MAX_LINES = int(os.getenv("LOG_BUFFER_MAX_LINES", "500"))                  # per container
+LOG_BUFFER_MAX_BYTES = int(os.getenv("LOG_BUFFER_MAX_BYTES", str(16 * 1024 * 1024)))  # whole fleet
+LOG_WATCH_MAX_STREAMS = int(os.getenv("LOG_WATCH_MAX_STREAMS", "200"))
+LOG_SNAPSHOT_DIR = os.getenv("LOG_SNAPSHOT_DIR", "/tmp/aichatbot-log-snapshots")
+LOG_DRAIN_SECONDS = 2  # how long a snapshot waits for a dying container's stream to deliver its last lines
+
+_buffers = {}     # container name -> deque of (timestamp, line)
+_bytes = {}       # container name -> bytes currently buffered
+_total = {"bytes": 0}
+_streams = {}     # container name -> {"thread", "stream", "dying"}; a follower only touches its own entry
+_snapshots = {}   # container name -> latest snapshot path
+_lock = threading.Lock()
+
+
+# ================================
+# 📥 Buffering
+# ================================
+def _evict_locked():
+    """Drop the oldest lines of the biggest buffers until the fleet cap is met."""
+    while _total["bytes"] > LOG_BUFFER_MAX_BYTES:
+        name = max(_bytes, key=_bytes.get)
+        buffer = _buffers[name]
+        if not buffer:
+            break
+        _, line = buffer.popleft()
+        _bytes[name] -= len(line)
+        _total["bytes"] -= len(line)
+
+
+def append_line(name, line, timestamp=None):
+    """Add one log line to a container's ring buffer (and to the search index, see log_index.py)."""
+    log_index.add_line(name, line, timestamp)
+    with _lock:
+        buffer = _buffers.get(name)
+        if buffer is None:
+            buffer = _buffers[name] = deque()
+            _bytes[name] = 0
+        if len(buffer) >= LOG_BUFFER_MAX_LINES:
+            _, dropped = buffer.popleft()
+            _bytes[name] -= len(dropped)
+            _total["bytes"] -= len(dropped)
+        buffer.append((timestamp, line))
+        _bytes[name] += len(line)
+        _total["bytes"] += len(line)
+        _evict_locked()
+
+
+def _split_timestamp(raw):
+    """`2025-11-11T12:05:23.123456789Z message` -> (timestamp, message)."""
+    stamp, sep, message = raw.partition(" ")
+    if sep and stamp[:4].isdigit() and stamp.endswith("Z"):
+        return stamp, message
+    return None, raw
+
+
+def _follow_container(name, container, entry):
+    pending = ""
+    with _lock:
+        # After a restart the buffer already holds the old lines — only follow new ones
+        tail = 0 if _buffers.get(name) else LOG_BUFFER_MAX_LINES
+    try:
+        stream = container.logs(stream=True, follow=True, timestamps=True, tail=tail)
+        entry["stream"] = stream
+        for chunk in stream:
+            # Chunks are not line-aligned; keep the partial tail for the next one
+            pending += chunk.decode("utf-8", errors="ignore")
+            *lines, pending = pending.split("\n")
+            for raw in lines:
+                timestamp, line = _split_timestamp(raw.rstrip("\r"))
+                append_line(name, line, timestamp)
+    except Exception as e:
+        print(f"⚠️ Log stream for {name} stopped: {e}")
+    finally:
+        if pending:
+            timestamp, line = _split_timestamp(pending)
+            append_line(name, line, timestamp)
+        with _lock:
+            # A restarted container may already have a new follower in this slot
+            if _streams.get(name) is entry:
+                del _streams[name]
+
+
+def watch_container(name):
+    """
+    Start a follow-mode log stream for one container. No-op if it is already
+    watched — unless that stream belongs to a container that died (a restart
+    whose "start" arrives before the old stream ended), which it replaces.
+    """
+    with _lock:
+        current = _streams.get(name)
+        if current is not None and not current["dying"]:
+            return False
+        if current is None and len(_streams) >= LOG_WATCH_MAX_STREAMS:
+            return False
+        entry = _streams[name] = {"thread": None, "stream": None, "dying": False}
+    try:
+        container = docker_ops.client.containers.get(name)
+    except Exception as e:
+        with _lock:
+            if _streams.get(name) is entry:
+                del _streams[name]
+        print(f"⚠️ Cannot watch logs for {name}: {e}")
+        return False
+
+    thread = threading.Thread(target=_follow_container, args=(name, container, entry), name=f"logs-{name}", daemon=True)
+    entry["thread"] = thread
+    thread.start()
+    return True
+
+
+def unwatch_container(name):
+    with _lock:
+        entry = _streams.pop(name, None)
+    if entry and entry["stream"] is not None:
+        try:
+            entry["stream"].close()
+        except Exception:
+            pass
+
+
+def forget_container(name):
+    """Drop a container's buffer (its on-disk snapshots are kept)."""
+    unwatch_container(name)
+    with _lock:
+        _buffers.pop(name, None)
+        _total["bytes"] -= _bytes.pop(name, 0)
+
+
+# ================================
+# 💾 Snapshots
+# ================================
+def snapshot_to_disk(name):
+    """Write the container's current buffer to LOG_SNAPSHOT_DIR and return the path."""
+    with _lock:
+        lines = list(_buffers.get(name, ()))
+    if not lines:
+        return None
+    os.makedirs(LOG_SNAPSHOT_DIR, exist_ok=True)
+    safe_name = name.replace("/", "_")
+    path = os.path.join(LOG_SNAPSHOT_DIR, f"{safe_name}-{int(time.time())}.log")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for timestamp, line in lines:
+            f.write(f"{timestamp} {line}\n" if timestamp else f"{line}\n")
+    os.replace(tmp_path, path)
+    with _lock:
+        _snapshots[name] = path
+    return path
+
+
+def _read_snapshot(path, tail):
+    """(timestamp, line) pairs of the last `tail` lines of a snapshot."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = deque(f, maxlen=tail)
+    except OSError:
+        return []
+    return [_split_timestamp(line.rstrip("\n")) for line in lines]
+
+
+@traced("logs.ring_buffer")
+def get_recent_logs(name, tail=30):
+    """
+    Return the last `tail` pre-captured lines for a container as one string,
+    from the live buffer or else the latest crash snapshot. None if nothing was captured.
+    """
+    entries = get_recent_entries(name, tail)
+    return "\n".join(line for _, line in entries) if entries else None
+
+
+def get_recent_entries(name, tail=LOG_BUFFER_MAX_LINES):
+    """The last `tail` pre-captured (timestamp, line) pairs (live buffer, else crash snapshot); [] if none."""
+    with _lock:
+        buffer = _buffers.get(name)
+        entries = list(buffer)[-tail:] if buffer else []
+        snapshot = _snapshots.get(name)
+    if not entries and snapshot:
+        entries = _read_snapshot(snapshot, tail)
+    record_cache("log_buffer", bool(entries))
+    return entries
+
+
+def buffer_stats():
+    with _lock:
+        return {
+            "containers": len(_buffers),
+            "streams": len(_streams),
+            "bytes": _total["bytes"],
+            "max_bytes": LOG_BUFFER_MAX_BYTES,
+        }
+
+
+# ================================
+# 📡 Event Wiring
+# ================================
+def _snapshot_after_drain(name, entry):
+    """Let the dying container's stream deliver its final lines (up to LOG_DRAIN_SECONDS), then snapshot."""
+    thread = entry["thread"] if entry else None
+    if thread is not None:
+        thread.join(LOG_DRAIN_SECONDS)
+    path = snapshot_to_disk(name)
+    if path:
+        print(f"🪵 Saved crash-time logs for {name} → {path}")
+
+
+def handle_container_event(event):
+    """docker_events subscriber: follow started containers, snapshot dying ones."""
+    action = (event.get("Action") or event.get("status") or "").split(":")[0]
+    attributes = event.get("Actor", {}).get("Attributes", {})
+    name = attributes.get("name")
+    if not name:
+        return
+    if action in ("start", "restart", "unpause"):
+        watch_container(name)
+    elif action == "die":
+        with _lock:
+            entry = _streams.get(name)
+            if entry is not None:
+                entry["dying"] = True
+        # Off the shared events thread: waiting here would stall every other subscriber
+        threading.Thread(target=_snapshot_after_drain, args=(name, entry), name=f"logs-snapshot-{name}",
+                         daemon=True).start()
+    elif action == "destroy":
+        forget_container(name)
+
+
+def start_log_capture():
+    """Watch every running container now and any container that starts later."""
+    docker_events.subscribe(handle_container_event, "container")
+    docker_events.start_event_follower()
+    try:
+        # One list call; the low-level API skips the per-container inspect of containers.list()
+        for c in docker_ops.client.api.containers():
+            watch_container(c["Names"][0].lstrip("/"))
+    except Exception as e:
+        print(f"⚠️ Could not list containers for log capture: {e}")
@@ -0,0 +1,489 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from metrics import Counter
+
+# ================================
+# 🔎 Cross-container Log Search Index
+# ================================
+# Every line the log capture (log_buffer.py) follows is also added to an
+# inverted index: token -> postings, each posting a line of a segment with
+# its (container, timestamp, offset). Lines go to an in-memory active
+# segment, sealed to disk every LOG_INDEX_SEGMENT_LINES lines or
+# LOG_INDEX_SEGMENT_SECONDS seconds as two files:
+#
+#   <min ms>-<max ms>-<id>.log   "container<TAB>timestamp<TAB>line" records
+#   <min ms>-<max ms>-<id>.idx   JSON: containers, timestamps, byte offsets, postings
+#
+# The time range in the file name lets a query skip segments without opening
+# them. Maintenance merges the segments of each closed hour into one
+# (time-based compaction) and deletes segments older than
+# LOG_INDEX_RETENTION_SECONDS. A query intersects the postings of its tokens
+# (shortest list first), filters by time range and container, checks quoted
+# phrases against the line itself and reads only the lines it returns.
+
+LOG_INDEX_ENABLED = os.getenv("LOG_INDEX_ENABLED", "1").lower() not in ("0", "false", "no")
+LOG_INDEX_DIR = os.getenv("LOG_INDEX_DIR", "/tmp/aichatbot-log-index")
+LOG_INDEX_SEGMENT_LINES = int(os.getenv("LOG_INDEX_SEGMENT_LINES", "50000"))
+LOG_INDEX_SEGMENT_SECONDS = int(os.getenv("LOG_INDEX_SEGMENT_SECONDS", "300"))
+LOG_INDEX_RETENTION_SECONDS = int(os.getenv("LOG_INDEX_RETENTION_SECONDS", str(24 * 3600)))
+LOG_INDEX_COMPACT_BUCKET_SECONDS = 3600  # sealed segments of one closed hour are merged
+LOG_INDEX_MAINTENANCE_SECONDS = 30
+LOG_INDEX_CACHED_SEGMENTS = 16           # sealed segment indexes kept loaded (LRU)
+LOG_SEARCH_MAX_SCAN = 50000              # phrase candidates checked per query
+MAX_LINE_CHARS = 2000
+
+INDEXED_LINES = Counter("chatbot_log_index_lines_total", "Log lines offered to the search index, by outcome.", ["outcome"])
+
+_TOKEN = re.compile(r"[a-z0-9_]{2,64}")
+
+_segments = []                 # sealed segment metadata, oldest first: {"base", "min_ts", "max_ts"}
+_loaded = OrderedDict()        # base path -> loaded index (LRU)
+_latest = {}                   # container -> newest timestamp indexed (skips re-tailed lines)
+_active = {"segment": None}
+_maintainer = {"thread": None, "stop": threading.Event()}
+_lock = threading.RLock()
+
+
+def tokenize(text):
+    return set(_TOKEN.findall(text.lower()))
+
+
+def parse_timestamp(stamp):
+    """Docker's RFC 3339 nano timestamp ('2025-11-11T12:05:23.123456789Z') -> epoch seconds."""
+    if not stamp:
+        return None
+    if isinstance(stamp, (int, float)):
+        return float(stamp)
+    try:
+        whole, _, fraction = stamp.rstrip("Z").partition(".")
+        seconds = datetime.fromisoformat(whole[:19]).replace(tzinfo=timezone.utc).timestamp()
+        return seconds + (float("0." + fraction[:9]) if fraction.isdigit() else 0.0)
+    except ValueError:
+        return None
+
+
+# ================================
+# 🧱 Segments
+# ================================
+def _new_segment():
+    return {"names": [], "name_ids": {}, "containers": [], "timestamps": [], "lines": [],
+            "postings": {}, "latest": {}, "min_ts": None, "max_ts": None, "opened": time.time()}
+
+
+def _add(segment, name, timestamp, line):
+    name_id = segment["name_ids"].get(name)
+    if name_id is None:
+        name_id = segment["name_ids"][name] = len(segment["names"])
+        segment["names"].append(name)
+    ordinal = len(segment["lines"])
+    segment["containers"].append(name_id)
+    segment["timestamps"].append(timestamp)
+    segment["lines"].append(line)
+    for token in tokenize(line):
+        segment["postings"].setdefault(token, []).append(ordinal)
+    segment["latest"][name] = max(timestamp, segment["latest"].get(name, timestamp))
+    segment["min_ts"] = timestamp if segment["min_ts"] is None else min(segment["min_ts"], timestamp)
+    segment["max_ts"] = timestamp if segment["max_ts"] is None else max(segment["max_ts"], timestamp)
+
+
+def _write_segment(segment):
+    """Write a segment as <base>.log + <base>.idx (the .idx last, so it marks a complete segment)."""
+    os.makedirs(LOG_INDEX_DIR, exist_ok=True)
+    base = os.path.join(LOG_INDEX_DIR, f"{int(segment['min_ts'] * 1000)}-{int(segment['max_ts'] * 1000)}-{uuid.uuid4().hex[:8]}")
+    offsets, offset = [], 0
+    with open(base + ".log.tmp", "wb") as f:
+        for name_id, timestamp, line in zip(segment["containers"], segment["timestamps"], segment["lines"]):
+            record = f"{segment['names'][name_id]}\t{timestamp!r}\t{line}\n".encode("utf-8", errors="replace")
+            offsets.append(offset)
+            offset += f.write(record)
+    os.replace(base + ".log.tmp", base + ".log")
+    index = {"names": segment["names"], "containers": segment["containers"], "timestamps": segment["timestamps"],
+             "offsets": offsets, "postings": segment["postings"], "latest": segment["latest"]}
+    with open(base + ".idx.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(base + ".idx.tmp", base + ".idx")
+    return {"base": base, "min_ts": segment["min_ts"], "max_ts": segment["max_ts"]}
+
+
+def _load_index(meta):
+    """A sealed segment's index, from the LRU or disk."""
+    with _lock:
+        index = _loaded.get(meta["base"])
+        if index is not None:
+            _loaded.move_to_end(meta["base"])
+            return index
+    with open(meta["base"] + ".idx", encoding="utf-8") as f:
+        index = json.load(f)
+    with _lock:
+        _loaded[meta["base"]] = index
+        while len(_loaded) > LOG_INDEX_CACHED_SEGMENTS:
+            _loaded.popitem(last=False)
+    return index
+
+
+def _read_records(meta):
+    """(container, timestamp, line) of every line of a sealed segment."""
+    # newline="\n": split on the record separator only, never on a '\r' inside a line
+    with open(meta["base"] + ".log", encoding="utf-8", errors="replace", newline="\n") as f:
+        for record in f:
+            name, timestamp, line = record.rstrip("\n").split("\t", 2)
+            yield name, float(timestamp), line
+
+
+def _delete_segment(meta):
+    with _lock:
+        _loaded.pop(meta["base"], None)
+    for ext in (".idx", ".log"):
+        try:
+            os.remove(meta["base"] + ext)
+        except OSError:
+            pass
+
+
+# ================================
+# 📥 Ingestion
+# ================================
+def _clean(line):
+    """Tabs and line breaks separate fields and records on disk."""
+    return line.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+def add_line(name, line, timestamp=None):
+    """Index one log line of a container (called by log_buffer for every captured line)."""
+    if not LOG_INDEX_ENABLED:
+        return
+    epoch = parse_timestamp(timestamp)
+    with _lock:
+        if epoch is not None and epoch < _latest.get(name, float("-inf")):
+            # Already indexed before a restart re-tailed the stream
+            INDEXED_LINES.inc(outcome="duplicate")
+            return
+        epoch = epoch if epoch is not None else time.time()
+        _latest[name] = max(epoch, _latest.get(name, epoch))
+        segment = _active["segment"]
+        if segment is None:
+            segment = _active["segment"] = _new_segment()
+        _add(segment, name, epoch, _clean(line[:MAX_LINE_CHARS]))
+        INDEXED_LINES.inc(outcome="indexed")
+        if len(segment["lines"]) >= LOG_INDEX_SEGMENT_LINES:
+            seal()
+
+
+def seal():
+    """Write the active segment to disk (no-op when it is empty)."""
+    with _lock:
+        segment = _active["segment"]
+        if not segment or not segment["lines"]:
+            return None
+        meta = _write_segment(segment)
+        _segments.append(meta)
+        _segments.sort(key=lambda m: m["min_ts"])
+        _active["segment"] = None
+        return meta
+
+
+# ================================
+# 🧹 Compaction & Retention
+# ================================
+def compact(now=None):
+    """Merge the sealed segments of every closed hour into one segment; returns segments merged."""
+    now = now or time.time()
+    with _lock:
+        buckets = {}
+        for meta in _segments:
+            bucket = int(meta["min_ts"] // LOG_INDEX_COMPACT_BUCKET_SECONDS)
+            if (bucket + 1) * LOG_INDEX_COMPACT_BUCKET_SECONDS <= now:
+                buckets.setdefault(bucket, []).append(meta)
+        groups = [group for group in buckets.values() if len(group) > 1]
+    merged = 0
+    for group in groups:
+        segment = _new_segment()
+        records = sorted((r for meta in group for r in _read_records(meta)), key=lambda r: r[1])
+        for name, timestamp, line in records:
+            _add(segment, name, timestamp, line)
+        meta = _write_segment(segment)
+        with _lock:
+            _segments[:] = [m for m in _segments if m not in group] + [meta]
+            _segments.sort(key=lambda m: m["min_ts"])
+        for old in group:
+            _delete_segment(old)
+        merged += len(group)
+    return merged
+
+
+def apply_retention(now=None):
+    """Delete segments whose newest line is older than LOG_INDEX_RETENTION_SECONDS; returns how many."""
+    cutoff = (now or time.time()) - LOG_INDEX_RETENTION_SECONDS
+    with _lock:
+        expired = [m for m in _segments if m["max_ts"] < cutoff]
+        _segments[:] = [m for m in _segments if m["max_ts"] >= cutoff]
+    for meta in expired:
+        _delete_segment(meta)
+    return len(expired)
+
+
+def maintain(now=None):
+    """Seal the active segment when it is old enough, compact closed hours, apply retention."""
+    now = now or time.time()
+    with _lock:
+        segment = _active["segment"]
+        if segment and now - segment["opened"] >= LOG_INDEX_SEGMENT_SECONDS:
+            seal()
+    # Retention must run even when compaction fails, or the index grows without bound
+    try:
+        merged = compact(now)
+    except Exception as e:
+        print(f"⚠️ Log index compaction failed: {e}")
+        merged = 0
+    return {"merged": merged, "expired": apply_retention(now)}
+
+
+def _maintenance_loop():
+    stop = _maintainer["stop"]
+    while not stop.wait(LOG_INDEX_MAINTENANCE_SECONDS):
+        try:
+            maintain()
+        except Exception as e:
+            print(f"⚠️ Log index maintenance failed: {e}")
+
+
+def load_segments():
+    """Pick up the sealed segments in LOG_INDEX_DIR (their time range is in the file name)."""
+    metas = []
+    if os.path.isdir(LOG_INDEX_DIR):
+        for entry in os.listdir(LOG_INDEX_DIR):
+            if not entry.endswith(".idx"):
+                continue
+            base = os.path.join(LOG_INDEX_DIR, entry[:-len(".idx")])
+            try:
+                min_ms, max_ms, _ = os.path.basename(base).split("-", 2)
+                metas.append({"base": base, "min_ts": int(min_ms) / 1000, "max_ts": int(max_ms) / 1000})
+            except ValueError:
+                continue
+    with _lock:
+        _segments[:] = sorted(metas, key=lambda m: m["min_ts"])
+        _loaded.clear()
+    # Newest indexed line per container, so a re-tailed stream is not indexed twice
+    for meta in _segments[-LOG_INDEX_CACHED_SEGMENTS:]:
+        try:
+            for name, latest in _load_index(meta).get("latest", {}).items():
+                _latest[name] = max(latest, _latest.get(name, latest))
+        except (OSError, ValueError):
+            continue
+    return len(_segments)
+
+
+def start_log_index():
+    """Load sealed segments and start the seal/compaction/retention thread."""
+    if not LOG_INDEX_ENABLED:
+        return None
+    try:
+        print(f"🔎 Log index ready: {load_segments()} segments")
+    except Exception as e:
+        print(f"⚠️ Could not load log index segments: {e}")
+    thread = _maintainer["thread"]
+    if thread and thread.is_alive():
+        return thread
+    _maintainer["stop"].clear()
+    thread = threading.Thread(target=_maintenance_loop, name="log-index-maintenance", daemon=True)
+    _maintainer["thread"] = thread
+    thread.start()
+    return thread
+
+
+# ================================
+# 🔍 Search
+# ================================
+def parse_query(query):
+    """'"connection refused" db' -> (tokens, quoted phrases); every token must match."""
+    query = (query or "").strip()
+    phrases = [p.lower() for p in re.findall(r"\"([^\"]+)\"", query) if p.strip()]
+    return tokenize(query), phrases
+
+
+def _candidates(index, tokens):
+    """Ordinals (ascending) of lines containing every token; all lines without tokens."""
+    if not tokens:
+        return range(len(index["timestamps"]))
+    lists = [index["postings"].get(token) for token in tokens]
+    if any(postings is None for postings in lists):
+        return []
+    lists.sort(key=len)
+    result = lists[0]
+    for postings in lists[1:]:
+        members = set(postings)
+        result = [o for o in result if o in members]
+        if not result:
+            break
+    return result
+
+
+def search(query="", since=None, until=None, containers=None, limit=100):
+    """
+    Lines matching `query` between `since` and `until` (epoch seconds), newest first.
+    Returns {"hits": [{"container", "timestamp", "line"}], "total", "by_container": {name: {"count", "first", "last"}},
+    "segments_scanned", "truncated", "seconds"}.
+    """
+    started_at = time.perf_counter()
+    tokens, phrases = parse_query(query)
+    wanted = set(containers) if containers else None
+    with _lock:
+        active = _active["segment"]
+        # The active segment is searched in place; snapshot its length so ingestion can continue
+        sources = [(meta, None) for meta in _segments]
+        if active and active["lines"]:
+            sources.append(({"min_ts": active["min_ts"], "max_ts": active["max_ts"]}, (active, len(active["lines"]))))
+
+    hits, by_container = [], {}
+    total, scanned, checked, truncated = 0, 0, 0, False
+    for meta, live in sorted(sources, key=lambda s: -s[0]["max_ts"]):
+        if (since is not None and meta["max_ts"] < since) or (until is not None and meta["min_ts"] > until):
+            continue
+        scanned += 1
+        if live:
+            index, size = live
+            with _lock:
+                ordinals = [o for o in _candidates(index, tokens) if o < size]
+        else:
+            try:
+                index = _load_index(meta)
+            except (OSError, ValueError):
+                continue  # removed by retention/compaction meanwhile
+            ordinals = _candidates(index, tokens)
+        reader = _LineReader(meta, index, live)
+        try:
+            for ordinal in reversed(ordinals):
+                timestamp = index["timestamps"][ordinal]
+                if (since is not None and timestamp < since) or (until is not None and timestamp > until):
+                    continue
+                name = index["names"][index["containers"][ordinal]]
+                if wanted is not None and name not in wanted:
+                    continue
+                line = None
+                if phrases:
+                    checked += 1
+                    if checked > LOG_SEARCH_MAX_SCAN:
+                        truncated = True
+                        break
+                    line = reader.line(ordinal)
+                    lowered = line.lower()
+                    if not all(p in lowered for p in phrases):
+                        continue
+                total += 1
+                stats = by_container.setdefault(name, {"count": 0, "first": timestamp, "last": timestamp})
+                stats["count"] += 1
+                stats["first"], stats["last"] = min(stats["first"], timestamp), max(stats["last"], timestamp)
+                if len(hits) < limit:
+                    hits.append({"container": name, "timestamp": timestamp,
+                                 "line": line if line is not None else reader.line(ordinal)})
+        except OSError:
+            pass  # segment compacted or expired while being read
+        finally:
+            reader.close()
+        if truncated:
+            break
+    hits.sort(key=lambda h: -h["timestamp"])
+    return {"hits": hits, "total": total, "by_container": by_container, "segments_scanned": scanned,
+            "truncated": truncated, "seconds": round(time.perf_counter() - started_at, 4)}
+
+
+class _LineReader:
+    """Reads lines by ordinal from the active segment or a sealed segment's .log (opened once)."""
+
+    def __init__(self, meta, index, live):
+        self.meta, self.index, self.live, self.file = meta, index, live, None
+
+    def line(self, ordinal):
+        if self.live:
+            return self.index["lines"][ordinal]
+        if self.file is None:
+            self.file = open(self.meta["base"] + ".log", "rb")
+        self.file.seek(self.index["offsets"][ordinal])
+        return self.file.readline().decode("utf-8", errors="replace").rstrip("\n").split("\t", 2)[2]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def index_stats():
+    with _lock:
+        active = _active["segment"]
+        return {
+            "enabled": LOG_INDEX_ENABLED,
+            "segments": len(_segments),
+            "active_lines": len(active["lines"]) if active else 0,
+            "containers": len(_latest),
+            "oldest": _segments[0]["min_ts"] if _segments else (active["min_ts"] if active else None),
+            "bytes": sum(os.path.getsize(m["base"] + ext) for m in _segments for ext in (".log", ".idx")
+                         if os.path.exists(m["base"] + ext)),
+        }
+
+
+# ================================
+# 💬 Chat Answers
+# ================================
+_WINDOW = re.compile(r"\b(?:last|past)\s+(\d+\s*)?(minute|min|hour|day|week)s?\b")
+_WINDOW_SECONDS = {"minute": 60, "min": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def parse_window(text):
+    """'in the last hour' -> 3600, 'past 15 minutes' -> 900; None without a window."""
+    match = _WINDOW.search((text or "").lower())
+    if not match:
+        return None
+    return int(match.group(1) or 1) * _WINDOW_SECONDS[match.group(2)]
+
+
+def _search_terms(question):
+    """The text to look for: a quoted part, or whatever follows 'logged' / 'search logs for'."""
+    quoted = re.search(r"[\"'“‘]([^\"'”’]+)[\"'”’]", question)
+    if quoted:
+        return f"\"{quoted.group(1)}\""
+    match = re.search(r"\b(?:logged|log|printed|reported|search logs for|grep logs for)\s+(.+)", question, re.IGNORECASE)
+    text = match.group(1) if match else ""
+    return _WINDOW.sub("", text.lower()).replace(" in the ", " ").strip(" ?.") or ""
+
+
+def _fmt_time(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _fmt_window(seconds):
+    for unit, size in (("week", 7 * 86400), ("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds % size == 0:
+            count = seconds // size
+            return unit if count == 1 else f"{count} {unit}s"
+    return f"{seconds} seconds"
+
+
+def search_report(question, sample_lines=10):
+    """Chat answer for "which containers logged 'connection refused' in the last hour"."""
+    if not LOG_INDEX_ENABLED:
+        return "⚠️ The log search index is disabled (LOG_INDEX_ENABLED=0)."
+    query = _search_terms(question)
+    if not query:
+        return "⚠️ Tell me what to look for, e.g. `which containers logged \"connection refused\" in the last hour`."
+    window = parse_window(question)
+    result = search(query, since=time.time() - window if window else None, limit=sample_lines)
+    span = f"in the last {_fmt_window(window)}" if window else "in the indexed logs"
+    if not result["total"]:
+        return f"✅ No container logged {query} {span}."
+    lines = [f"### 🔎 {len(result['by_container'])} container(s) logged {query} {span}", "",
+             "| Container | Matches | First | Last |", "|---|---|---|---|"]
+    for name, stats in sorted(result["by_container"].items(), key=lambda item: -item[1]["count"]):
+        lines.append(f"| `{name}` | {stats['count']} | {_fmt_time(stats['first'])} | {_fmt_time(stats['last'])} |")
+    lines += ["", "**Latest lines:**", "```"]
+    lines += [f"{_fmt_time(h['timestamp'])} {h['container']}: {h['line']}" for h in result["hits"]]
+    lines.append("```")
+    if result["truncated"]:
+        lines.append(f"⚠️ Stopped after checking {LOG_SEARCH_MAX_SCAN} candidate lines — narrow the time range.")
+    lines.append(f"\n⏱ {result['total']} match(es) from {result['segments_scanned']} segment(s) in {result['seconds'] * 1000:.1f} ms.")
+    return "\n".join(lines)
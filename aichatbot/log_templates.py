@@ -0,0 +1,176 @@
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from log_index import parse_timestamp
+
+# ================================
+# 🧬 Log Template Mining (Drain)
+# ================================
+# Noisy containers repeat the same few messages thousands of times with
+# different ids, ports and durations. An online Drain-style miner clusters
+# lines into templates in one streaming pass:
+#
+#   1. variables (timestamps, UUIDs, IPs, hex ids, numbers) are masked;
+#   2. a fixed-depth prefix tree routes the line by token count and its
+#      first LOG_TEMPLATE_DEPTH - 2 tokens to a leaf of candidate clusters;
+#   3. the most similar cluster (share of equal tokens at equal positions)
+#      absorbs the line if similarity >= LOG_TEMPLATE_SIMILARITY, turning
+#      differing positions into <*>; otherwise the line starts a new cluster.
+#
+# Each cluster keeps its count, first/last timestamps and one example line.
+# "Top templates" summaries of hundreds of lines fit in a few lines of chat.
+
+LOG_TEMPLATE_DEPTH = int(os.getenv("LOG_TEMPLATE_DEPTH", "4"))
+LOG_TEMPLATE_SIMILARITY = float(os.getenv("LOG_TEMPLATE_SIMILARITY", "0.4"))
+LOG_TEMPLATE_MAX_CHILDREN = 100     # per tree node; more distinct tokens share the <*> branch
+LOG_TEMPLATE_MAX_CLUSTERS = 1000    # least recently matched clusters are evicted beyond this
+LOG_TEMPLATE_TOP = 8                # templates shown in a summary
+LOG_TEMPLATE_MAX_CHARS = 200        # per template line in a summary
+
+WILDCARD = "<*>"
+
+_MASKS = [
+    (re.compile(r"\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?"), "<TS>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?:0x)?(?=[0-9a-f]*\d)[0-9a-f]{8,}\b", re.I), "<HEX>"),
+    (re.compile(r"(?<![A-Za-z<])[-+]?\d+(?:\.\d+)?"), "<NUM>"),
+]
+
+_STAMP = re.compile(r"^(\d{4}-\d\d-\d\dT[\d:.]+Z) ")
+
+
+def mask(line):
+    for pattern, replacement in _MASKS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+def _has_variable(token):
+    return "<" in token or any(ch.isdigit() for ch in token)
+
+
+class TemplateMiner:
+    """Online Drain clustering of log lines; see the module comment."""
+
+    def __init__(self, depth=None, similarity=None, max_children=LOG_TEMPLATE_MAX_CHILDREN,
+                 max_clusters=LOG_TEMPLATE_MAX_CLUSTERS):
+        self.depth = max(3, depth or LOG_TEMPLATE_DEPTH)
+        self.similarity = similarity if similarity is not None else LOG_TEMPLATE_SIMILARITY
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root = {}                 # token count -> prefix tree node {"children": {}, "clusters": []}
+        self.clusters = OrderedDict()  # id -> cluster, least recently matched first
+        self.lines = 0
+        self.last_line = None          # the most recent line (usually the fatal one)
+        self._next_id = 0
+
+    # --- tree ---
+    def _leaf(self, tokens):
+        node = self.root.setdefault(len(tokens), {"children": {}, "clusters": []})
+        for token in tokens[:self.depth - 2]:
+            key = WILDCARD if _has_variable(token) else token
+            children = node["children"]
+            if key not in children and len(children) >= self.max_children:
+                key = WILDCARD
+            node = children.setdefault(key, {"children": {}, "clusters": []})
+        return node
+
+    def _score(self, template, tokens):
+        same = params = 0
+        for expected, token in zip(template, tokens):
+            if expected == WILDCARD:
+                params += 1
+            elif expected == token:
+                same += 1
+        return same / len(tokens), params
+
+    # --- ingestion ---
+    def add(self, line, timestamp=None):
+        """Cluster one line; returns its cluster (None for blank lines)."""
+        if timestamp is None:
+            match = _STAMP.match(line)
+            if match:
+                timestamp, line = match.group(1), line[match.end():]
+        line = line.rstrip()
+        tokens = mask(line).split()
+        if not tokens:
+            return None
+        epoch = parse_timestamp(timestamp)
+        self.lines += 1
+        leaf = self._leaf(tokens)
+
+        best, best_score = None, (-1.0, -1)
+        for cluster in leaf["clusters"]:
+            score = self._score(cluster["template"], tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is None or best_score[0] < self.similarity:
+            best = {"id": self._next_id, "template": tokens, "count": 0, "first": epoch, "last": epoch,
+                    "example": line, "leaf": leaf}
+            self._next_id += 1
+            leaf["clusters"].append(best)
+            self.clusters[best["id"]] = best
+            if len(self.clusters) > self.max_clusters:
+                _, evicted = self.clusters.popitem(last=False)
+                evicted["leaf"]["clusters"].remove(evicted)
+        else:
+            best["template"] = [t if t == token else WILDCARD for t, token in zip(best["template"], tokens)]
+            self.clusters.move_to_end(best["id"])
+        best["count"] += 1
+        if epoch is not None:
+            best["first"] = epoch if best["first"] is None else min(best["first"], epoch)
+            best["last"] = epoch if best["last"] is None else max(best["last"], epoch)
+        self.last_line = line
+        return best
+
+    def add_all(self, entries):
+        """Add lines, or (timestamp, line) pairs."""
+        for entry in entries:
+            if isinstance(entry, tuple):
+                self.add(entry[1], entry[0])
+            else:
+                self.add(entry)
+        return self
+
+    # --- queries ---
+    def top(self, n=LOG_TEMPLATE_TOP):
+        """Clusters by count, most frequent first: [{"template", "count", "first", "last", "example"}]."""
+        ranked = sorted(self.clusters.values(), key=lambda c: (-c["count"], c["id"]))[:n]
+        return [{"template": " ".join(c["template"]), "count": c["count"], "first": c["first"], "last": c["last"],
+                 "example": c["example"]} for c in ranked]
+
+
+def mine(entries, **options):
+    """A TemplateMiner fed with `entries` (lines, (timestamp, line) pairs, or one text blob)."""
+    if isinstance(entries, str):
+        entries = entries.splitlines()
+    return TemplateMiner(**options).add_all(entries)
+
+
+def _clock(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%H:%M:%S") if epoch is not None else "?"
+
+
+def summarize(entries, top=LOG_TEMPLATE_TOP, miner=None):
+    """
+    Compact "top templates" text for the UI / LLM: one line per template with
+    its count and time span, plus the last line seen (usually the fatal one).
+    """
+    miner = miner or mine(entries)
+    if not miner.lines:
+        return "No logs found."
+    clusters = miner.top(top)
+    lines = [f"{miner.lines} lines → {len(miner.clusters)} templates (top {len(clusters)}):"]
+    width = len(str(clusters[0]["count"])) if clusters else 1
+    for c in clusters:
+        # A template seen once says less than the line itself
+        text = c["example"] if c["count"] == 1 else c["template"]
+        span = f"{_clock(c['first'])}–{_clock(c['last'])}" if c["first"] is not None and c["count"] > 1 else (
+            _clock(c["first"]) if c["first"] is not None else "")
+        lines.append(f"{c['count']:>{width}}× {span + '  ' if span else ''}{text[:LOG_TEMPLATE_MAX_CHARS]}")
+    if miner.last_line is not None:
+        lines.append(f"Last line: {miner.last_line[:LOG_TEMPLATE_MAX_CHARS]}")
+    return "\n".join(lines)
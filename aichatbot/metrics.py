@@ -0,0 +1,226 @@
+import contextvars
+import functools
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# ================================
+# 📊 Prometheus-style Metrics
+# ================================
+# Dependency-free counters and histograms rendered in the Prometheus text
+# exposition format by the FastAPI `/metrics` endpoint. Set METRICS_ENABLED=0
+# to turn everything into no-ops: `instrument` then returns the original
+# function untouched, so disabled metrics cost nothing on hot paths.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_intent = contextvars.ContextVar("intent", default="unknown")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, values, extra=()):
+    pairs = list(zip(label_names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.label_names), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class RatioGauge:
+    """Gauge computed at scrape time, e.g. cache hit ratio from two counters."""
+
+    def __init__(self, name, documentation, compute):
+        self.name = name
+        self.documentation = documentation
+        self.compute = compute  # -> {label tuple: value}, label_names
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        label_names, values = self.compute()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(label_names, key)} {value}")
+        return lines
+
+
+# ================================
+# 📏 Metric Definitions
+# ================================
+ASK_LATENCY = Histogram("chatbot_ask_duration_seconds", "Latency of /ask requests by routed intent.", ["intent"])
+ASK_REQUESTS = Counter("chatbot_ask_requests_total", "/ask requests by routed intent.", ["intent"])
+DOCKER_API_CALLS = Counter("docker_api_requests_total", "Docker Engine API round trips by endpoint.", ["method", "endpoint", "status"])
+DOCKER_API_LATENCY = Histogram("docker_api_request_duration_seconds", "Docker Engine API latency by endpoint.", ["method", "endpoint"])
+CACHE_REQUESTS = Counter("chatbot_cache_requests_total", "Cache lookups by cache and result (hit/miss).", ["cache", "result"])
+LLM_REQUESTS = Counter("llm_requests_total", "LLM calls by outcome (ok/error/fallback).", ["model", "outcome"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by kind (prompt/completion).", ["model", "kind"])
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM call latency.", ["model"])
+FUNCTION_CALLS = Counter("chatbot_function_calls_total", "Calls of instrumented functions.", ["function", "outcome"])
+FUNCTION_LATENCY = Histogram("chatbot_function_duration_seconds", "Latency of instrumented functions.", ["function"])
+
+
+def _cache_hit_ratios():
+    caches = {}
+    for (cache, result), value in list(CACHE_REQUESTS._values.items()):
+        caches.setdefault(cache, {"hit": 0, "miss": 0})[result] = value
+    ratios = {(cache, ): c["hit"] / (c["hit"] + c["miss"]) for cache, c in caches.items() if c["hit"] + c["miss"]}
+    return ("cache",), ratios
+
+
+CACHE_HIT_RATIO = RatioGauge("chatbot_cache_hit_ratio", "Cache hit ratio by cache.", _cache_hit_ratios)
+
+
+# ================================
+# 🧰 Helpers
+# ================================
+def set_intent(intent):
+    """Record which intent the current /ask request was routed to."""
+    _intent.set(intent)
+
+
+def get_intent():
+    return _intent.get()
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def instrument(name=None):
+    """
+    Decorator counting calls and latency of a function. When metrics are
+    disabled the function is returned as-is (no wrapper, no overhead).
+    """
+    def decorator(fn):
+        if not METRICS_ENABLED:
+            return fn
+        label = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                FUNCTION_LATENCY.observe(time.perf_counter() - start, function=label)
+                FUNCTION_CALLS.inc(function=label, outcome=outcome)
+        return wrapper
+    return decorator
+
+
+# Collapse ids and names so endpoints stay low-cardinality
+_API_VERSION_RE = re.compile(r"^/v[\d.]+")
+_OBJECT_PATH_RE = re.compile(r"^/(containers|volumes|networks|exec|plugins|secrets|configs|services|nodes|tasks)/([^/]+)(/.*)?$")
+_IMAGE_PATH_RE = re.compile(r"^/(images|distribution)/(.+?)(/(json|history|push|tag|get))?$")
+
+
+def normalize_docker_endpoint(path):
+    path = _API_VERSION_RE.sub("", path.split("?", 1)[0])
+    match = _IMAGE_PATH_RE.match(path)
+    if match and match.group(2) not in ("json", "create", "search", "prune", "load", "get"):
+        return f"/{match.group(1)}/{{name}}{match.group(3) or ''}"
+    match = _OBJECT_PATH_RE.match(path)
+    if match and match.group(2) not in ("json", "create", "prune"):
+        return f"/{match.group(1)}/{{id}}{match.group(3) or ''}"
+    return path
+
+
+def _record_docker_response(response, *args, **kwargs):
+    request = response.request
+    endpoint = normalize_docker_endpoint(urlparse(request.url).path)
+    DOCKER_API_CALLS.inc(method=request.method, endpoint=endpoint, status=str(response.status_code))
+    DOCKER_API_LATENCY.observe(response.elapsed.total_seconds(), method=request.method, endpoint=endpoint)
+
+
+def instrument_docker_client(client):
+    """Count every HTTP round trip a docker.DockerClient makes (requests response hook)."""
+    if METRICS_ENABLED and client is not None:
+        hooks = client.api.hooks.setdefault("response", [])
+        if _record_docker_response not in hooks:
+            hooks.append(_record_docker_response)
+    return client
+
+
+def render():
+    """Prometheus text exposition of every registered metric."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,5 @@
 import subprocess
+import knowledge_base
 
 def check_port_usage(port):
     """
@@ -59,14 +60,4 @@ def PortConflict():
     """
     Initial response when user reports a port conflict.
     """
-    return """
-⚓ **Port Conflict Detected**
-
-It seems a container failed to start because the required port is already in use.
-
-Please provide the port number you'd like me to check (for example: **8080** or **80**).
-
-Just type:
-**check port 8080**
-and I’ll tell you which process is using it and how to fix it.
-"""
+    return knowledge_base.get_markdown("port_conflict")
@@ -0,0 +1,146 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# ================================
+# 🔥 Sampling Profiler
+# ================================
+# Opt-in in-process profiler for the FastAPI service. A background thread
+# samples `sys._current_frames()` every PROFILER_INTERVAL_SECONDS, but only
+# for threads currently serving /ask, and aggregates the stacks into a
+# flamegraph-compatible collapsed-stack dump ("a;b;c 42" per line, readable by
+# flamegraph.pl / speedscope). Off unless PROFILER_ENABLED=1: then /ask pays a
+# single dict lookup and nothing samples.
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILER_INTERVAL_SECONDS = float(os.getenv("PROFILER_INTERVAL_SECONDS", "0.005"))
+PROFILER_MAX_DEPTH = 64
+
+_state = {"thread": None, "stop": None, "started_at": None, "samples": 0}
+_stacks = Counter()
+_active_threads = {}  # thread id -> number of /ask requests in flight on it
+_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame):
+    labels = []
+    while frame is not None and len(labels) < PROFILER_MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _sample_loop(stop, interval):
+    while not stop.wait(interval):
+        if not _active_threads:
+            continue
+        frames = sys._current_frames()
+        with _lock:
+            for thread_id in list(_active_threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    _stacks[_collapse(frame)] += 1
+                    _state["samples"] += 1
+
+
+# ================================
+# 🎛 Control
+# ================================
+def start_profiler(interval=None):
+    """Start the sampler thread (no-op if already running)."""
+    with _lock:
+        if _state["thread"] is not None:
+            return False
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_sample_loop,
+            args=(stop, interval or PROFILER_INTERVAL_SECONDS),
+            name="ask-profiler",
+            daemon=True,
+        )
+        _state.update(thread=thread, stop=stop, started_at=time.time())
+    thread.start()
+    return True
+
+
+def stop_profiler():
+    """Stop sampling; aggregated stacks are kept until reset_profile()."""
+    with _lock:
+        thread, stop = _state["thread"], _state["stop"]
+        _state.update(thread=None, stop=None)
+    if thread is None:
+        return False
+    stop.set()
+    thread.join(timeout=1)
+    return True
+
+
+def is_running():
+    return _state["thread"] is not None
+
+
+def reset_profile():
+    with _lock:
+        _stacks.clear()
+        _state["samples"] = 0
+
+
+# ================================
+# 🏷 Request Marking
+# ================================
+@contextlib.contextmanager
+def profile_request():
+    """Mark the current thread as serving /ask while the sampler is running."""
+    if _state["thread"] is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    with _lock:
+        _active_threads[thread_id] = _active_threads.get(thread_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _lock:
+            remaining = _active_threads.pop(thread_id, 1) - 1
+            if remaining > 0:
+                _active_threads[thread_id] = remaining
+
+
+def follow_request(fn):
+    """Wrap `fn` so pool threads running it on behalf of a profiled /ask are sampled too."""
+    if threading.get_ident() not in _active_threads:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with profile_request():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ================================
+# 📤 Dump
+# ================================
+def collapsed_stacks():
+    """Collapsed-stack text, heaviest stacks first."""
+    with _lock:
+        items = _stacks.most_common()
+    return "".join(f"{stack} {count}\n" for stack, count in items)
+
+
+def profile_status():
+    return {
+        "enabled": PROFILER_ENABLED,
+        "running": is_running(),
+        "interval_seconds": PROFILER_INTERVAL_SECONDS,
+        "samples": _state["samples"],
+        "unique_stacks": len(_stacks),
+        "started_at": _state["started_at"],
+    }
@@ -0,0 +1,257 @@
+import re
+
+from docker_client import require_client
+from metrics import instrument
+
+# ================================
+# 🧹 Disk Reclamation Planner
+# ================================
+# A targeted alternative to `docker system prune -a -v` on shared hosts:
+# from ONE /system/df call, work out what each deletion would actually free
+# and propose the fewest deletions that reach a target.
+#
+# Images form a DAG through ParentId (locally built images): a child holds its
+# parent's layers plus its own, and dockerd refuses to delete an image with
+# children, so the unit of deletion is an unused subtree. Bytes are counted as
+#   - guaranteed: an image's own layers (size minus its parent's size), or
+#     Size - SharedSize for a standalone image — no image outside the
+#     deletion uses them;
+#   - shared:     layers that other images may still use (base layers of a
+#     subtree root, SharedSize of standalone images); freed only if every
+#     image using them goes too. /system/df has no per-layer sizes, so these
+#     are reported as "up to" and never counted towards the target.
+# Build-cache entries not in use, and volumes no container mounts (only when
+# asked), are candidates as well. Everything is O(n log n) in the number of
+# images, cache entries and volumes.
+
+UNITS = {"b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+# A unit is required: a bare number ("port 8080") is not a size
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:([kmgt])i?b?|b(?:ytes?)?)\b", re.IGNORECASE)
+
+
+def parse_size(text):
+    """'5GB' / '500 mb' / '1.5g' -> bytes; None without a unit."""
+    match = _SIZE.search(text or "")
+    if not match:
+        return None
+    return int(float(match.group(1)) * UNITS[(match.group(2) or "b").lower()])
+
+
+def human_size(size):
+    size = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+# ================================
+# 🌳 Candidates from /system/df
+# ================================
+def _image_label(image):
+    tags = image.get("RepoTags") or []
+    tags = [t for t in tags if t != "<none>:<none>"]
+    return tags[0] if tags else f"<none> ({image['Id'].split(':')[-1][:12]})"
+
+
+def _image_candidates(df):
+    images = {i["Id"]: i for i in df.get("Images") or []}
+    in_use = {i["Id"] for i in images.values() if (i.get("Containers") or 0) > 0}
+    in_use |= {c.get("ImageID") for c in df.get("Containers") or []}
+
+    children = {}
+    for image in images.values():
+        parent = image.get("ParentId") or ""
+        if parent in images:
+            children.setdefault(parent, []).append(image["Id"])
+
+    # Post-order over the ParentId forest: each unused subtree is a candidate
+    subtree = {}  # id -> {"guaranteed", "shared", "ids", "used"}
+    roots = [i for i in images if (images[i].get("ParentId") or "") not in images]
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            image_id, expanded = stack.pop()
+            if not expanded:
+                stack.append((image_id, True))
+                stack.extend((child, False) for child in children.get(image_id, []))
+                continue
+            image = images[image_id]
+            size, shared = image.get("Size") or 0, max(0, image.get("SharedSize") or 0)
+            parent = images.get(image.get("ParentId") or "")
+            if parent is not None:
+                own, maybe = max(0, size - (parent.get("Size") or 0)), 0
+            elif children.get(image_id):
+                own, maybe = max(0, size - shared), min(shared, size)
+            else:
+                own, maybe = max(0, size - shared), shared
+            node = {"guaranteed": own, "shared": maybe, "ids": [image_id], "used": image_id in in_use}
+            for child in children.get(image_id, []):
+                child_node = subtree[child]
+                node["guaranteed"] += child_node["guaranteed"]
+                node["shared"] += child_node["shared"]
+                node["ids"] = child_node["ids"] + node["ids"]  # children are deleted first
+                node["used"] = node["used"] or child_node["used"]
+            subtree[image_id] = node
+
+    candidates = []
+    for image_id, node in subtree.items():
+        if node["used"]:
+            continue
+        image = images[image_id]
+        parent = image.get("ParentId") or ""
+        extra = len(node["ids"]) - 1
+        candidates.append({
+            "kind": "image",
+            "key": image_id,
+            "label": _image_label(image) + (f" (+{extra} child image{'s' if extra > 1 else ''})" if extra else ""),
+            "guaranteed": node["guaranteed"],
+            "shared": node["shared"],
+            "deletions": len(node["ids"]),
+            "covers": set(node["ids"]),
+            "maximal": parent not in subtree or subtree[parent]["used"],
+            "commands": [f"docker image rm {i.split(':')[-1][:12]}" for i in node["ids"]],
+        })
+    return candidates
+
+
+def _cache_candidates(df):
+    candidates = []
+    for entry in df.get("BuildCache") or []:
+        if entry.get("InUse"):
+            continue
+        shared = bool(entry.get("Shared"))
+        size = entry.get("Size") or 0
+        candidates.append({
+            "kind": "build cache",
+            "key": entry["ID"],
+            "label": f"{entry.get('Type', 'cache')} {entry['ID']}",
+            "guaranteed": 0 if shared else size,
+            "shared": size if shared else 0,
+            "deletions": 1,
+            "covers": {entry["ID"]},
+            "commands": [f"docker builder prune -f --filter id={entry['ID']}"],
+        })
+    return candidates
+
+
+def _volume_candidates(df):
+    candidates = []
+    for volume in df.get("Volumes") or []:
+        usage = volume.get("UsageData") or {}
+        if usage.get("RefCount", 1) != 0:
+            continue
+        size = max(0, usage.get("Size") or 0)
+        candidates.append({
+            "kind": "volume",
+            "key": volume["Name"],
+            "label": volume["Name"],
+            "guaranteed": size,
+            "shared": 0,
+            "deletions": 1,
+            "covers": {volume["Name"]},
+            "commands": [f"docker volume rm {volume['Name']}"],
+        })
+    return candidates
+
+
+# ================================
+# 🎯 Planning
+# ================================
+def _select(candidates, target):
+    """
+    Fewest deletions reaching `target` guaranteed bytes (greedy): best single
+    candidate that reaches it alone, vs. the best bytes-per-deletion picks
+    trimmed of anything not needed. Image subtrees nest: a picked child is
+    replaced by a later-picked ancestor (which adds only its remaining
+    bytes), and a descendant of a picked subtree adds nothing.
+    """
+    def pick(ordered):
+        chosen, covered_by, freed = [], {}, 0  # covered_by: id -> the chosen candidate deleting it
+        for c in ordered:
+            if freed >= target:
+                break
+            if c["key"] in covered_by:
+                continue  # inside a subtree already picked
+            nested = {id(covered_by[i]): covered_by[i] for i in c["covers"] if i in covered_by}.values()
+            for inner in nested:
+                chosen.remove(inner)
+                freed -= inner["guaranteed"]
+            chosen.append(c)
+            covered_by.update(dict.fromkeys(c["covers"], c))
+            freed += c["guaranteed"]
+        # Drop picks the target does not need, smallest first
+        for c in sorted(chosen, key=lambda c: c["guaranteed"]):
+            if freed - c["guaranteed"] >= target:
+                chosen.remove(c)
+                freed -= c["guaranteed"]
+        return chosen, freed
+
+    useful = [c for c in candidates if c["guaranteed"] > 0]
+    greedy = pick(sorted(useful, key=lambda c: (-c["guaranteed"] / c["deletions"], c["deletions"])))
+    single = min((c for c in useful if c["guaranteed"] >= target),
+                 key=lambda c: (c["deletions"], c["guaranteed"]), default=None)
+    if single is not None and single["deletions"] <= sum(c["deletions"] for c in greedy[0]):
+        return [single], single["guaranteed"]
+    return greedy
+
+
+@instrument()
+def plan_reclaim(target=None, include_volumes=False, client=None):
+    """
+    Plan deletions freeing at least `target` bytes (None = everything safely reclaimable).
+    Returns {"items", "guaranteed", "shared", "deletions", "target", "reached", "reclaimable", "skipped_volumes"}.
+    """
+    df = (client or require_client()).api.df()
+    candidates = _image_candidates(df) + _cache_candidates(df)
+    volumes = _volume_candidates(df)
+    if include_volumes:
+        candidates += volumes
+
+    # Maximal image subtrees only, so nested candidates are not counted twice
+    reclaimable = sum(c["guaranteed"] for c in candidates if c.get("maximal", True))
+
+    if target is None:
+        # Everything: every maximal candidate, no search needed
+        items = [c for c in candidates if c.get("maximal", True) and c["guaranteed"] > 0]
+        freed = sum(c["guaranteed"] for c in items)
+    else:
+        items, freed = _select(candidates, target)
+    return {
+        "items": sorted(items, key=lambda c: -c["guaranteed"]),
+        "guaranteed": freed,
+        "shared": sum(c["shared"] for c in items),
+        "deletions": sum(c["deletions"] for c in items),
+        "target": target,
+        "reached": target is None or freed >= target,
+        "reclaimable": reclaimable,
+        "skipped_volumes": [] if include_volumes else volumes,
+    }
+
+
+def reclaim_report(question="", client=None):
+    """Chat answer for 'free up 5GB' / 'disk cleanup plan' (a plan only — nothing is deleted)."""
+    q_lower = question.lower()
+    plan = plan_reclaim(parse_size(q_lower), include_volumes="volume" in q_lower, client=client)
+    title = f"target {human_size(plan['target'])}" if plan["target"] else "everything safely reclaimable"
+    lines = [f"### 🧹 Disk reclamation plan ({title})", ""]
+    if not plan["items"]:
+        lines.append("✅ Nothing can be freed without touching images, cache or volumes that are in use.")
+    else:
+        lines.append(f"Frees **{human_size(plan['guaranteed'])}** with {plan['deletions']} deletion(s)"
+                     + (f", up to {human_size(plan['guaranteed'] + plan['shared'])} if shared layers are no longer used elsewhere"
+                        if plan["shared"] else "") + ".")
+        if not plan["reached"]:
+            lines.append(f"⚠️ Only {human_size(plan['reclaimable'])} can be freed safely — below the target.")
+        lines += ["", "| Kind | Item | Frees | Shared (up to) |", "|---|---|---|---|"]
+        for item in plan["items"]:
+            lines.append(f"| {item['kind']} | `{item['label']}` | {human_size(item['guaranteed'])} | "
+                         f"{human_size(item['shared']) if item['shared'] else '-'} |")
+        lines += ["", "```bash"] + [cmd for item in plan["items"] for cmd in item["commands"]] + ["```"]
+    if plan["skipped_volumes"]:
+        size = sum(v["guaranteed"] for v in plan["skipped_volumes"])
+        lines += ["", f"💾 {len(plan['skipped_volumes'])} unused volume(s) hold {human_size(size)} of data — "
+                      "not included; ask again with `including volumes` to plan them too."]
+    return "\n".join(lines)
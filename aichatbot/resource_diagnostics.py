@@ -0,0 +1,210 @@
+import os
+import threading
+from collections import deque
+
+import docker_ops
+import docker_events
+
+# ================================
+# 📈 OOM & Resource-Limit Diagnostics
+# ================================
+# Reads State.OOMKilled, the configured limits and the container's cgroup v2
+# files directly (memory.events, memory.peak, cpu.stat) — plain file reads,
+# no stats() call — and keeps a short history of observed memory peaks so a
+# limit can be recommended from what the container actually used.
+
+CGROUP_ROOT = os.getenv("CGROUP_ROOT", "/sys/fs/cgroup")
+PEAK_HISTORY_SIZE = 50
+SAMPLER_INTERVAL_SECONDS = 30
+LIMIT_HEADROOM = 1.25               # recommended limit = highest peak * headroom
+LIMIT_ROUNDING = 64 * 1024 * 1024   # round recommendations up to 64 MiB
+
+_peak_history = {}   # container name -> deque of observed memory peaks (bytes)
+_lock = threading.Lock()
+_sampler = {"thread": None, "stop": threading.Event()}
+
+
+# ================================
+# 📂 cgroup v2 readers
+# ================================
+def find_cgroup_dir(container_id):
+    """Locate the container's cgroup v2 directory (systemd or cgroupfs driver)."""
+    candidates = [
+        os.path.join(CGROUP_ROOT, "system.slice", f"docker-{container_id}.scope"),
+        os.path.join(CGROUP_ROOT, "docker", container_id),
+    ]
+    for path in candidates:
+        if os.path.isdir(path):
+            return path
+    return None
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    if value == "max":
+        return 0  # unlimited
+    return int(value) if value.isdigit() else None
+
+
+def _read_flat_keyed(path):
+    """Parse `key value` files such as memory.events and cpu.stat."""
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if value.strip().isdigit():
+                    values[key] = int(value)
+    except OSError:
+        pass
+    return values
+
+
+def read_cgroup_usage(container_id):
+    """Return memory/cpu counters from cgroup v2, or None if the cgroup is gone."""
+    cgroup_dir = find_cgroup_dir(container_id)
+    if not cgroup_dir:
+        return None
+    return {
+        "memory_current": _read_int(os.path.join(cgroup_dir, "memory.current")),
+        "memory_peak": _read_int(os.path.join(cgroup_dir, "memory.peak")),
+        "memory_max": _read_int(os.path.join(cgroup_dir, "memory.max")),
+        "memory_events": _read_flat_keyed(os.path.join(cgroup_dir, "memory.events")),
+        "cpu_stat": _read_flat_keyed(os.path.join(cgroup_dir, "cpu.stat")),
+    }
+
+
+# ================================
+# 🗂 Peak History
+# ================================
+def record_peak(name, container_id):
+    """Sample the container's memory peak into its history. Returns the peak or None."""
+    usage = read_cgroup_usage(container_id)
+    if not usage:
+        return None
+    peak = usage["memory_peak"] or usage["memory_current"]
+    if peak:
+        with _lock:
+            _peak_history.setdefault(name, deque(maxlen=PEAK_HISTORY_SIZE)).append(peak)
+    return peak
+
+
+def recommend_memory_limit(name, current_limit=0, oom_killed=False):
+    """Highest recorded peak plus headroom, rounded up; None without any history."""
+    with _lock:
+        peaks = list(_peak_history.get(name, ()))
+    if not peaks and not (oom_killed and current_limit):
+        return None
+    target = max(peaks, default=0) * LIMIT_HEADROOM
+    if oom_killed and current_limit:
+        # It hit the ceiling, so the real need is above the old limit
+        target = max(target, current_limit * 1.5)
+    return int(-(-target // LIMIT_ROUNDING) * LIMIT_ROUNDING)
+
+
+def _sample_running_containers():
+    client = docker_ops.client
+    if client is None:
+        return
+    try:
+        for c in client.api.containers():
+            record_peak(c["Names"][0].lstrip("/"), c["Id"])
+    except Exception as e:
+        print(f"⚠️ Resource sampler failed: {e}")
+
+
+def _sampler_loop():
+    stop = _sampler["stop"]
+    while not stop.is_set():
+        _sample_running_containers()
+        stop.wait(SAMPLER_INTERVAL_SECONDS)
+
+
+def handle_container_event(event):
+    """docker_events subscriber: grab the peak at `oom` while the cgroup still exists."""
+    action = (event.get("Action") or event.get("status") or "").split(":")[0]
+    if action in ("oom", "die"):
+        actor = event.get("Actor", {})
+        name = actor.get("Attributes", {}).get("name")
+        if name and actor.get("ID"):
+            record_peak(name, actor["ID"])
+
+
+def start_resource_sampler():
+    """Periodically record memory peaks of running containers (cheap cgroup file reads)."""
+    docker_events.subscribe(handle_container_event, "container")
+    docker_events.start_event_follower()
+    thread = _sampler["thread"]
+    if thread and thread.is_alive():
+        return thread
+    _sampler["stop"].clear()
+    thread = threading.Thread(target=_sampler_loop, name="resource-sampler", daemon=True)
+    _sampler["thread"] = thread
+    thread.start()
+    return thread
+
+
+# ================================
+# 🩺 Diagnosis
+# ================================
+def _fmt_bytes(value):
+    if not value:
+        return "unlimited"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def diagnose_resources(container):
+    """
+    Definitive OOM / limit diagnosis for one container.
+    Returns a list of markdown lines for the troubleshooting report.
+    """
+    attrs = container.attrs
+    state = attrs.get("State", {})
+    host_config = attrs.get("HostConfig", {})
+    oom_killed = bool(state.get("OOMKilled"))
+    exit_code = state.get("ExitCode")
+    limit = host_config.get("Memory") or 0
+
+    lines = []
+    if oom_killed:
+        lines.append("💀 **OOM confirmed** — `State.OOMKilled` is true: the kernel OOM killer ended the main process.")
+    elif exit_code == 137:
+        lines.append(
+            "🔪 **Killed by SIGKILL, not by the OOM killer** (`State.OOMKilled` is false) — "
+            "look for `docker kill`, a stop timeout, or the orchestrator."
+        )
+
+    usage = read_cgroup_usage(container.id)
+    if usage:
+        limit = limit or usage["memory_max"] or 0
+        peak = usage["memory_peak"] or usage["memory_current"]
+        if peak:
+            with _lock:
+                _peak_history.setdefault(container.name, deque(maxlen=PEAK_HISTORY_SIZE)).append(peak)
+            ratio = f" ({peak / limit:.0%} of limit)" if limit else ""
+            lines.append(f"📊 Memory peak: `{_fmt_bytes(peak)}` vs limit `{_fmt_bytes(limit)}`{ratio}")
+        events = usage["memory_events"]
+        if events.get("oom_kill"):
+            lines.append(f"🧨 cgroup `memory.events`: `oom_kill={events['oom_kill']}`, `oom={events.get('oom', 0)}`, `max={events.get('max', 0)}`")
+        cpu = usage["cpu_stat"]
+        if cpu.get("nr_periods"):
+            throttled = cpu.get("nr_throttled", 0) / cpu["nr_periods"]
+            if throttled:
+                lines.append(
+                    f"🐢 CPU throttled in `{throttled:.0%}` of periods "
+                    f"(`{cpu.get('throttled_usec', 0) / 1e6:.1f}s` total) — consider raising `--cpus`."
+                )
+    else:
+        lines.append(f"📏 Memory limit: `{_fmt_bytes(limit)}` (cgroup data unavailable — container is not running)")
+
+    recommended = recommend_memory_limit(container.name, limit, oom_killed)
+    if recommended and (oom_killed or not limit or recommended > limit):
+        lines.append(f"💡 Recommended memory limit: `--memory={recommended // (1024 * 1024)}m` (from recorded peaks)")
+    return lines
@@ -0,0 +1,23 @@
+import ai_engine
+from ai_engine import interpret_docker_question
+
+
+def _provider(calls):
+    def containers():
+        calls.append(1)
+        return [{"name": "web", "status": "running"}]
+    return containers
+
+
+def test_routed_intents_do_not_fetch_container_info():
+    calls = []
+    interpret_docker_question("show images", _provider(calls))
+    assert calls == []
+
+
+def test_fallback_fetches_container_info(monkeypatch):
+    monkeypatch.setattr(ai_engine, "_load_openai", lambda: None)
+    calls = []
+    answer = interpret_docker_question("how many containers do I have", _provider(calls))
+    assert calls == [1]
+    assert "1 running" in answer
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+import coalesce
+import docker_ops
+from benchmarks import fake_fleet
+from fake_docker_daemon import make_containers
+
+CONCURRENCY = 10
+
+
+@pytest.fixture
+def fleet():
+    # A slow list call so that concurrent callers really overlap
+    containers = make_containers(3, status="running") + make_containers(3, status="exited", start=3)
+    with fake_fleet(containers, {"list": 0.2}) as (daemon, client):
+        yield daemon
+
+
+def test_concurrent_show_stopped_makes_one_list_call(fleet):
+    barrier = threading.Barrier(CONCURRENCY)
+    answers = []
+
+    def worker():
+        barrier.wait()
+        answers.append(docker_ops.show_stopped_containers())
+
+    threads = [threading.Thread(target=worker) for _ in range(CONCURRENCY)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fleet.request_counts.get("list", 0) == 1
+    assert len(answers) == CONCURRENCY and len(set(answers)) == 1
+    assert "app-3" in answers[0]
+
+
+def test_mutation_invalidates_cached_result(fleet):
+    first = docker_ops.show_stopped_containers()
+    assert docker_ops.show_stopped_containers() == first
+    assert fleet.request_counts.get("list", 0) == 1
+
+    docker_ops.smart_start_container("app-3")  # @invalidates
+
+    after = docker_ops.show_stopped_containers()
+    assert fleet.request_counts.get("list", 0) == 2
+    assert "app-3" in first and "app-3" not in after
+
+
+def test_disabled_coalescing_lists_every_time(fleet, monkeypatch):
+    monkeypatch.setattr(coalesce, "COALESCE_ENABLED", False)
+    docker_ops.show_stopped_containers()
+    docker_ops.show_stopped_containers()
+    assert fleet.request_counts.get("list", 0) == 2
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+import crash_detector
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(crash_detector, "_windows", {})
+    monkeypatch.setattr(crash_detector, "_last_death", {})
+    monkeypatch.setattr(crash_detector, "_stop_requested", {})
+    monkeypatch.setattr(crash_detector.log_buffer, "get_recent_logs", lambda name, tail: "boom")
+
+
+def _event(action, when, **attributes):
+    crash_detector.handle_container_event(
+        {"Action": action, "time": when, "Actor": {"ID": "c0ffee", "Attributes": {"name": "web", **attributes}}})
+
+
+def _crashing():
+    return [c["name"] for c in crash_detector.get_crashing_containers()]
+
+
+def test_crash_loop_is_flagged():
+    now = time.time()
+    for i in range(crash_detector.CRASH_THRESHOLD):
+        _event("die", now + i, exitCode="1")
+    assert _crashing() == ["web"]
+
+
+def test_docker_restart_counts_nothing():
+    now = time.time()
+    for i in range(crash_detector.CRASH_THRESHOLD):
+        _event("kill", now + i, signal="15")
+        _event("die", now + i, exitCode="137")
+        _event("restart", now + i)
+    assert _crashing() == []
+
+
+def test_clean_exits_are_not_crashes():
+    now = time.time()
+    for i in range(crash_detector.CRASH_THRESHOLD):
+        _event("die", now + i, exitCode="0" if i % 2 else "143")
+    assert _crashing() == []
+
+
+def test_restart_events_are_not_added_to_deaths():
+    now = time.time()
+    for i in range(crash_detector.CRASH_THRESHOLD - 1):
+        _event("die", now + i, exitCode="1")
+        _event("restart", now + i)
+    assert _crashing() == []
+
+
+def test_log_fallback_runs_off_the_events_thread(monkeypatch):
+    release = threading.Event()
+
+    def slow_logs(container_id):
+        release.wait(5)
+        return "from the daemon"
+
+    monkeypatch.setattr(crash_detector.log_buffer, "get_recent_logs", lambda name, tail: "")
+    monkeypatch.setattr(crash_detector, "_capture_log_excerpt", slow_logs)
+    now = time.time()
+    started = time.monotonic()
+    for i in range(crash_detector.CRASH_THRESHOLD):
+        _event("die", now + i, exitCode="1")
+    assert time.monotonic() - started < 1
+    assert _crashing() == ["web"]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while crash_detector.get_crashing_containers()[0]["logs"] != "from the daemon" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert crash_detector.get_crashing_containers()[0]["logs"] == "from the daemon"
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import dns_resolution_error as dns
+from fake_docker_daemon import FakeDnsResolver
+
+PROBE_TIMEOUT = 0.5
+
+
+@pytest.fixture
+def resolvers():
+    """127.0.0.2 slow, .3 fast, .4 dead, .5 REFUSED, .6 medium — all on one port."""
+    first = FakeDnsResolver("127.0.0.2", latency=0.15).start()
+    others = [FakeDnsResolver(f"127.0.0.{i}", first.port, latency=latency, rcode=rcode).start()
+              for i, latency, rcode in ((3, 0.0, 0), (4, None, 0), (5, 0.0, 5), (6, 0.05, 0))]
+    yield [first] + others
+    for r in [first] + others:
+        r.stop()
+
+
+@pytest.fixture
+def daemon_json(tmp_path, monkeypatch):
+    path = tmp_path / "daemon.json"
+    monkeypatch.setattr(dns, "DOCKER_DAEMON_JSON", str(path))
+    return path
+
+
+def test_rank_resolvers_fastest_first_failures_last(resolvers):
+    ranked = dns.rank_resolvers([r.host for r in resolvers], timeout=PROBE_TIMEOUT, port=resolvers[0].port)
+
+    assert [r["server"] for r in ranked[:3]] == ["127.0.0.3", "127.0.0.6", "127.0.0.2"]
+    assert all(r["ok"] for r in ranked[:3])
+    failed = {r["server"]: r["error"] for r in ranked[3:]}
+    assert failed == {"127.0.0.4": "timeout", "127.0.0.5": "rcode 5"}
+
+
+def test_rank_resolvers_without_candidates(monkeypatch):
+    monkeypatch.setattr(dns, "DNS_CANDIDATES", [])
+    assert dns.rank_resolvers() == []
+
+
+def test_write_daemon_dns_keeps_other_settings_and_backs_up(daemon_json):
+    original = {"log-driver": "json-file", "dns": ["8.8.8.8"]}
+    daemon_json.write_text(json.dumps(original))
+
+    assert dns.write_daemon_dns(["1.1.1.1", "9.9.9.9"]) == ["8.8.8.8"]
+
+    assert json.loads(daemon_json.read_text()) == {"log-driver": "json-file", "dns": ["1.1.1.1", "9.9.9.9"]}
+    assert json.loads((daemon_json.parent / "daemon.json.bak").read_text()) == original
+    assert sorted(p.name for p in daemon_json.parent.iterdir()) == ["daemon.json", "daemon.json.bak"]
+
+
+def test_write_daemon_dns_unchanged_list_is_a_no_op(daemon_json):
+    daemon_json.write_text(json.dumps({"dns": ["1.1.1.1"]}))
+
+    assert dns.write_daemon_dns(["1.1.1.1"]) is False
+    assert not (daemon_json.parent / "daemon.json.bak").exists()
+
+
+def test_fix_dns_leaves_config_alone_when_no_resolver_answers(resolvers, daemon_json, monkeypatch):
+    daemon_json.write_text(json.dumps({"dns": ["8.8.8.8"]}))
+    before = daemon_json.read_text()
+    monkeypatch.setattr(dns, "DNS_CANDIDATES", ["127.0.0.4", "127.0.0.5"])
+    monkeypatch.setattr(dns, "DNS_PROBE_PORT", resolvers[0].port)
+    monkeypatch.setattr(dns, "DNS_PROBE_TIMEOUT", PROBE_TIMEOUT)
+
+    def restart_daemon():
+        raise AssertionError("the daemon must not be restarted")
+
+    monkeypatch.setattr(dns, "restart_daemon", restart_daemon)
+
+    message = dns.fix_dns_issue()
+
+    assert message.startswith("❌ None of the candidate resolvers answered")
+    assert daemon_json.read_text() == before
+    assert not (daemon_json.parent / "daemon.json.bak").exists()
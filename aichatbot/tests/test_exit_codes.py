@@ -0,0 +1,17 @@
+import pytest
+
+from exit_codes import decode_exit_code
+
+
+@pytest.mark.parametrize("code, signal", [(137, "SIGKILL"), (143, "SIGTERM"), (192, "SIGRTMAX")])
+def test_signal_codes(code, signal):
+    info = decode_exit_code(code)
+    assert info["category"] == "signal"
+    assert info["signal"] == signal
+
+
+@pytest.mark.parametrize("code", [200, 193, 254])
+def test_codes_above_signal_range_are_application_specific(code):
+    info = decode_exit_code(code)
+    assert info["category"] == "application"
+    assert info["signal"] is None and info["signal_number"] is None
@@ -0,0 +1,25 @@
+import pytest
+
+import fleet_hosts
+from fake_docker_daemon import FakeDockerDaemon, make_containers
+
+
+@pytest.fixture
+def host():
+    with FakeDockerDaemon(make_containers(2, status="exited")) as daemon:
+        fleet_hosts.register_host("web-1", daemon.base_url)
+        yield "web-1"
+        fleet_hosts.unregister_host("web-1")
+
+
+def test_actions_use_the_longer_http_timeout(host):
+    assert fleet_hosts.host_client(host).api.timeout == fleet_hosts.HOST_TIMEOUT_SECONDS
+    assert fleet_hosts.host_client(host, action=True).api.timeout == fleet_hosts.HOST_ACTION_TIMEOUT_SECONDS
+
+
+def test_fleet_restart_goes_through_the_action_client(host, monkeypatch):
+    seen = []
+    monkeypatch.setattr(fleet_hosts.docker_ops, "restart_stopped_containers",
+                        lambda client: seen.append(client.api.timeout) or ([], {}))
+    fleet_hosts.fleet_restart_stopped()
+    assert seen == [fleet_hosts.HOST_ACTION_TIMEOUT_SECONDS]
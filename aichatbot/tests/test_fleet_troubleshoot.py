@@ -0,0 +1,24 @@
+import pytest
+
+from fleet_troubleshoot import extract_fleet_status
+
+
+@pytest.mark.parametrize("question, status", [
+    ("troubleshoot all", "exited"),
+    ("troubleshoot all exited", "exited"),
+    ("troubleshoot all stopped containers", "exited"),
+    ("please troubleshoot every restarting container", "restarting"),
+    ("troubleshoot fleet dead", "dead"),
+])
+def test_fleet_requests(question, status):
+    assert extract_fleet_status(question) == status
+
+
+@pytest.mark.parametrize("question", [
+    "troubleshoot allocator",
+    "troubleshoot everything-api",
+    "troubleshoot fleet-mgr",
+    "troubleshoot api",
+])
+def test_container_names_are_not_fleet_requests(question):
+    assert extract_fleet_status(question) is None
@@ -0,0 +1,39 @@
+import pytest
+
+import health_index
+from benchmarks import fake_fleet
+from fake_docker_daemon import make_containers
+
+
+@pytest.fixture
+def fleet():
+    containers = make_containers(2, status="running", health="unhealthy")
+    with fake_fleet(containers) as (daemon, _):
+        health_index.rebuild(backfill=False)
+        yield daemon, containers[0]["Name"]
+        health_index._ready["at"] = None
+
+
+def _requests(daemon):
+    return sum(daemon.request_counts.values())
+
+
+def test_health_event_makes_no_api_call(fleet):
+    daemon, name = fleet
+    before = _requests(daemon)
+    health_index.handle_container_event(
+        {"Type": "container", "Action": "health_status: unhealthy", "Actor": {"Attributes": {"name": name}}})
+    assert _requests(daemon) == before
+
+
+def test_health_log_is_loaded_once_when_asked(fleet):
+    daemon, name = fleet
+    health_index.handle_container_event(
+        {"Type": "container", "Action": "health_status: unhealthy", "Actor": {"Attributes": {"name": name}}})
+    before = _requests(daemon)
+    checks = health_index.health_log(name)
+    assert checks and "Failed to connect" in checks[-1]["output"]
+    assert _requests(daemon) == before + 1
+
+    health_index.health_log(name)
+    assert _requests(daemon) == before + 1
@@ -0,0 +1,25 @@
+import pytest
+
+import docker_ops
+from benchmarks import fake_fleet
+from fake_docker_daemon import make_compose_project, make_containers
+
+
+@pytest.fixture
+def fleet():
+    containers = make_containers(1, status="exited") + make_compose_project("shop", {"db": [], "api": ["db"]}, start=1)
+    with fake_fleet(containers) as (daemon, _):
+        yield daemon, containers[0]["Name"]
+
+
+def test_single_container_action_makes_no_list_call(fleet):
+    daemon, name = fleet
+    assert docker_ops.manage_container("start", name).startswith("✅")
+    assert daemon.request_counts.get("list", 0) == 0
+
+
+def test_project_name_is_not_acted_on_without_the_project_phrasing(fleet):
+    daemon, _ = fleet
+    answer = docker_ops.manage_container("stop", "shop")
+    assert "`stop project shop`" in answer
+    assert daemon.request_counts.get("action", 0) == 0
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from reclaim_planner import parse_size, plan_reclaim, reclaim_report
+
+
+def _image(image_id, tag, size, parent=""):
+    return {"Id": f"sha256:{image_id}", "RepoTags": [tag], "Size": size, "SharedSize": 0,
+            "ParentId": f"sha256:{parent}" if parent else "", "Containers": 0}
+
+
+def _client(images, containers=()):
+    df = {"Images": images, "Containers": list(containers), "BuildCache": [], "Volumes": []}
+    return SimpleNamespace(api=SimpleNamespace(df=lambda: df))
+
+
+@pytest.fixture
+def chain():
+    """base:1 (100 B) <- app:1 (400 B, i.e. 300 B of its own): the child saves more per deletion."""
+    return _client([_image("b", "base:1", 100), _image("a", "app:1", 400, parent="b")])
+
+
+def test_child_first_pick_is_replaced_by_parent_subtree(chain):
+    plan = plan_reclaim(350, client=chain)
+
+    assert plan["reached"] and plan["guaranteed"] == 400
+    assert [item["key"] for item in plan["items"]] == ["sha256:b"]
+    assert plan["deletions"] == 2
+    assert "below the target" not in reclaim_report("free up 350b", client=chain)
+
+
+def test_small_target_only_deletes_the_child(chain):
+    plan = plan_reclaim(250, client=chain)
+
+    assert [item["key"] for item in plan["items"]] == ["sha256:a"]
+    assert plan["guaranteed"] == 300 and plan["deletions"] == 1
+
+
+def test_everything_selects_all_maximal_subtrees(chain):
+    plan = plan_reclaim(None, client=chain)
+
+    assert plan["guaranteed"] == plan["reclaimable"] == 400
+    assert [item["key"] for item in plan["items"]] == ["sha256:b"]
+
+
+def test_three_level_chain_and_used_leaf():
+    images = [_image("r", "root:1", 100), _image("m", "mid:1", 150, parent="r"), _image("l", "leaf:1", 1000, parent="m"),
+              _image("x", "other:1", 500)]
+    client = _client(images)
+    plan = plan_reclaim(1500, client=client)
+    assert plan["reached"] and plan["guaranteed"] == 1500
+
+    # A container on the leaf keeps its whole ancestry
+    client = _client([dict(i, Containers=1) if i["Id"] == "sha256:l" else i for i in images])
+    plan = plan_reclaim(None, client=client)
+    assert [item["key"] for item in plan["items"]] == ["sha256:x"]
+
+
+def test_parse_size_requires_a_unit():
+    assert parse_size("free up 5GB") == 5 * 1024 ** 3
+    assert parse_size("free up port 8080") is None
@@ -0,0 +1,197 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from urllib.parse import urlparse
+
+from metrics import normalize_docker_endpoint
+
+# ================================
+# 🧵 Per-request Tracing
+# ================================
+# OpenTelemetry-shaped spans (trace/span ids, parent ids, unix-nano
+# timestamps, attributes) around intent routing, Docker API calls, log
+# fetches and LLM calls. A trace is only recorded when a request asks for
+# it (`/ask?trace=1`) or TRACE_EXPORT_PATH is set; otherwise every span()
+# is a cheap no-op. Finished traces are appended to TRACE_EXPORT_PATH as
+# one OTLP/JSON `resourceSpans` document per line.
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+SERVICE_NAME = "aichatbot"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name, trace_id, parent=None, attributes=None, start_ns=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.children = []
+        self._lock = threading.Lock()
+        if parent is not None:
+            with parent._lock:
+                parent.children.append(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_ns=None):
+        self.end_ns = end_ns or time.time_ns()
+
+    @property
+    def duration_ms(self):
+        return round(((self.end_ns or time.time_ns()) - self.start_ns) / 1e6, 3)
+
+    def walk(self):
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def to_otlp(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()],
+            "status": {"code": 1 if self.status == "OK" else 2},
+        }
+
+    def to_tree(self):
+        """Nested dict for returning a trace inline (`/ask?trace=1`)."""
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+            "children": [child.to_tree() for child in sorted(self.children, key=lambda s: s.start_ns)],
+        }
+
+
+# ================================
+# 🎬 Recording
+# ================================
+@contextlib.contextmanager
+def start_trace(name, enabled=True, **attributes):
+    """Open a root span for one request. Yields None (and records nothing) when disabled."""
+    if not (enabled or TRACE_EXPORT_PATH):
+        yield None
+        return
+    root = Span(name, secrets.token_hex(16), attributes=attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except Exception as e:
+        root.status = "ERROR"
+        root.set_attribute("error", repr(e))
+        raise
+    finally:
+        root.end()
+        _current_span.reset(token)
+        if TRACE_EXPORT_PATH:
+            export_trace(root)
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Child span of the current span; a no-op outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent=parent, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.status = "ERROR"
+        child.set_attribute("error", repr(e))
+        raise
+    finally:
+        child.end()
+        _current_span.reset(token)
+
+
+def traced(name=None):
+    """Decorator wrapping a function call in a span."""
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current_span.get()
+
+
+def propagate(fn):
+    """Bind `fn` to the caller's trace context so spans from pool threads attach to it."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+# ================================
+# 🐳 Docker API spans
+# ================================
+def _record_docker_span(response, *args, **kwargs):
+    parent = _current_span.get()
+    if parent is None:
+        return
+    request = response.request
+    end_ns = time.time_ns()
+    start_ns = end_ns - int(response.elapsed.total_seconds() * 1e9)
+    api_span = Span(
+        f"docker {request.method} {normalize_docker_endpoint(urlparse(request.url).path)}",
+        parent.trace_id,
+        parent=parent,
+        attributes={"http.method": request.method, "http.status_code": response.status_code},
+        start_ns=start_ns,
+    )
+    api_span.end(end_ns)
+
+
+def trace_docker_client(client):
+    """Record a span for every HTTP round trip a docker.DockerClient makes."""
+    if client is not None:
+        hooks = client.api.hooks.setdefault("response", [])
+        if _record_docker_span not in hooks:
+            hooks.append(_record_docker_span)
+    return client
+
+
+# ================================
+# 📤 Export
+# ================================
+def export_trace(root, path=None):
+    """Append the trace as one OTLP/JSON line (readable by the OTel collector file receiver)."""
+    document = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "aichatbot.tracing"}, "spans": [s.to_otlp() for s in root.walk()]}],
+        }]
+    }
+    with _export_lock:
+        with open(path or TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(document) + "\n")
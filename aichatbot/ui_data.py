@@ -0,0 +1,98 @@
+import docker_ops
+from docker_ops import list_all_containers
+
+# ================================
+# 🗂 Streamlit Page Data Loaders
+# ================================
+# Everything the Dashboard / Containers / Images / Volumes pages fetch from
+# Docker, kept out of chat_ui.py so it can be benchmarked against the fake
+# daemon (see benchmarks.py) without a Streamlit session.
+
+RESTART_THRESHOLD = 2
+
+
+def _client(client):
+    return client if client is not None else docker_ops.client
+
+
+def check_frequent_restarts(container):
+    try:
+        return container.attrs.get("RestartCount", 0) > RESTART_THRESHOLD
+    except Exception:
+        return False
+
+
+def load_dashboard():
+    """Counts for the 📊 Dashboard page."""
+    containers, _ = list_all_containers()
+    return {
+        "total": len(containers),
+        "running": sum(1 for c in containers if c.status == "running"),
+        "exited": sum(1 for c in containers if c.status == "exited"),
+        "frequent_restarts": [c.name for c in containers if check_frequent_restarts(c)],
+    }
+
+
+def get_container_logs(container, lines=5):
+    try:
+        return container.logs(tail=lines).decode("utf-8")
+    except Exception:
+        return "Unable to fetch logs."
+
+
+def load_containers_page(log_lines=5):
+    """One row per container for the 📋 Containers page (object kept for the action buttons)."""
+    containers, _ = list_all_containers()
+    rows = []
+    for c in containers:
+        try:
+            health_status = c.attrs.get('State', {}).get('Health', {}).get('Status', 'unknown')
+        except Exception:
+            health_status = "unknown"
+
+        try:
+            stats = c.stats(stream=False)
+            cpu = stats.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage", "N/A")
+            mem = stats.get("memory_stats", {}).get("usage", "N/A")
+        except Exception:
+            cpu = mem = None
+
+        rows.append({
+            "container": c,
+            "name": c.name,
+            "short_id": c.short_id,
+            "image": (c.image.tags[0] if c.image.tags else '<none>'),
+            "status": c.status,
+            "health": health_status,
+            "frequent_restarts": c.attrs.get("RestartCount", 0) > RESTART_THRESHOLD,
+            "cpu": cpu,
+            "mem": mem,
+            "logs": get_container_logs(c, lines=log_lines) if c.status.lower() == "exited" else None,
+        })
+    return rows
+
+
+def load_images_page(client=None):
+    """(image, tags, used_by) for the 🖼 Images page."""
+    client = _client(client)
+    rows = []
+    for img in client.images.list():
+        used_by = [
+            c.name for c in client.containers.list(all=True)
+            if img.short_id in c.image.id
+        ]
+        rows.append({"image": img, "tags": img.tags if img.tags else ["<none>"], "used_by": used_by})
+    return rows
+
+
+def load_volumes_page(client=None):
+    """(volume, mountpoint, used_by) for the 💾 Volumes page."""
+    client = _client(client)
+    rows = []
+    for vol in client.volumes.list():
+        containers_using = [
+            c.name for c in client.containers.list(all=True)
+            if any(m.get("Name") == vol.name for m in c.attrs.get("Mounts", []))
+        ]
+        rows.append({"volume": vol, "mountpoint": vol.attrs.get('Mountpoint', 'N/A'), "used_by": containers_using})
+    return rows